@@ -41,6 +41,7 @@
 #include "lsst/ip/diffim/BuildSingleKernelVisitor.h"
 #include "lsst/ip/diffim/BuildSpatialKernelVisitor.h"
 #include "lsst/ip/diffim/KernelSumVisitor.h"
+#include "lsst/ip/diffim/VisitCandidatesParallel.h"
 
 #include "lsst/ip/diffim/DipoleAlgorithms.h"
 
@@ -42,6 +42,10 @@ namespace detail {
         int getNProcessed() {return _nProcessed;}
         void processCandidate(lsst::afw::math::SpatialCellCandidate *candidate);
 
+        /* For visitCandidatesParallel */
+        Ptr makeWorker() const;
+        void mergeWorker(AssessSpatialKernelVisitor<PixelT> const& worker);
+
     private:
         std::shared_ptr<lsst::afw::math::LinearCombinationKernel> _spatialKernel;   ///< Spatial kernel function
         lsst::afw::math::Kernel::SpatialFunctionPtr _spatialBackground; ///< Spatial background function
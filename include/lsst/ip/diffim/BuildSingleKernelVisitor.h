@@ -55,6 +55,10 @@ namespace detail {
         int getNRejected()    {return _nRejected;}
         int getNProcessed()   {return _nProcessed;}
         void reset()          {_nRejected = 0; _nProcessed = 0;}
+
+        /* For visitCandidatesParallel */
+        Ptr makeWorker() const;
+        void mergeWorker(BuildSingleKernelVisitor<PixelT> const& worker);
         
         void processCandidate(lsst::afw::math::SpatialCellCandidate *candidate);
 
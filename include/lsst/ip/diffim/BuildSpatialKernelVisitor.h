@@ -12,6 +12,9 @@
 #ifndef LSST_IP_DIFFIM_BUILDSPATIALKERNELVISITOR_H
 #define LSST_IP_DIFFIM_BUILDSPATIALKERNELVISITOR_H
 
+#include <map>
+#include <set>
+
 #include "Eigen/Core"
 #include "lsst/afw/math.h"
 #include "lsst/afw/image.h"
@@ -36,6 +39,7 @@ namespace detail {
 
         int getNCandidates() {return _nCandidates;}
 
+        void reset();
         void processCandidate(lsst::afw::math::SpatialCellCandidate *candidate);
 
         void solveLinearEquation();
@@ -46,8 +50,19 @@ namespace detail {
                   lsst::afw::math::Kernel::SpatialFunctionPtr> getSolutionPair();
 
     private:
+        /// The constraint a candidate added to the spatial solution
+        struct Constraint {
+            float xCenter;
+            float yCenter;
+            std::shared_ptr<StaticKernelSolution<PixelT> > solution; ///< Solution the constraint came from
+            Eigen::MatrixXd mMat;
+            Eigen::VectorXd bVec;
+        };
+
         std::shared_ptr<SpatialKernelSolution> _kernelSolution;
         int _nCandidates;                  ///< Number of candidates visited
+        std::map<int, Constraint> _constraints; ///< Constraints in _kernelSolution, by candidate id
+        std::set<int> _visited;            ///< Ids of the candidates visited since the last reset
     };
 
     template<typename PixelT>
@@ -35,6 +35,9 @@
 #ifndef LSST_IP_DIFFIM_IMAGESUBTRACT_H
 #define LSST_IP_DIFFIM_IMAGESUBTRACT_H
 
+#include <memory>
+#include <vector>
+
 #include "Eigen/Core"
 
 #include "lsst/afw/math.h"
@@ -89,6 +92,137 @@ namespace diffim {
         bool invert=true
         );
 
+    /**
+     * @brief Convolve template and subtract it from science image, writing into differenceImage
+     *
+     * @note The template is convolved into differenceImage and the background and
+     * science image are subtracted in one further pass; no temporaries are allocated
+     *
+     * @param differenceImage  Output difference image; must have the dimensions of templateImage
+     * @param templateImage  MaskedImage to apply convolutionKernel to
+     * @param scienceMaskedImage  MaskedImage from which convolved templateImage is subtracted
+     * @param convolutionKernel  Kernel to apply to templateImage
+     * @param background  Background scalar or function to subtract after convolution
+     * @param invert  Invert the output difference image
+     *
+     * @ingroup ip_diffim
+     */
+    template <typename PixelT, typename BackgroundT>
+    void convolveAndSubtract(
+        lsst::afw::image::MaskedImage<PixelT> &differenceImage,
+        lsst::afw::image::MaskedImage<PixelT> const& templateImage,
+        lsst::afw::image::MaskedImage<PixelT> const& scienceMaskedImage,
+        lsst::afw::math::Kernel const& convolutionKernel,
+        BackgroundT background,
+        bool invert=true
+        );
+
+    /**
+     * @brief Convolve template and subtract it from science image, writing into differenceImage
+     *
+     * @note This version accepts an Image for the template, and is thus faster during convolution
+     *
+     * @param differenceImage  Output difference image; must have the dimensions of templateImage
+     * @param templateImage  Image to apply convolutionKernel to
+     * @param scienceMaskedImage  MaskedImage from which convolved templateImage is subtracted
+     * @param convolutionKernel  Kernel to apply to templateImage
+     * @param background  Background scalar or function to subtract after convolution
+     * @param invert  Invert the output difference image
+     *
+     * @ingroup ip_diffim
+     */
+    template <typename PixelT, typename BackgroundT>
+    void convolveAndSubtract(
+        lsst::afw::image::MaskedImage<PixelT> &differenceImage,
+        lsst::afw::image::Image<PixelT> const& templateImage,
+        lsst::afw::image::MaskedImage<PixelT> const& scienceMaskedImage,
+        lsst::afw::math::Kernel const& convolutionKernel,
+        BackgroundT background,
+        bool invert=true
+        );
+
+    /**
+     * @brief Subtract a PSF-matched image and background from science image in a single pass
+     *
+     * @note differenceImage may be matchedImage or scienceMaskedImage itself
+     *
+     * @param differenceImage  Output difference image, scienceMaskedImage - (matchedImage + background)
+     * @param matchedImage  PSF-matched MaskedImage
+     * @param scienceMaskedImage  MaskedImage from which matchedImage is subtracted
+     * @param background  Background scalar or function to subtract
+     * @param invert  Invert the output difference image
+     *
+     * @ingroup ip_diffim
+     */
+    template <typename PixelT, typename BackgroundT>
+    void subtractMatchedImage(
+        lsst::afw::image::MaskedImage<PixelT> &differenceImage,
+        lsst::afw::image::MaskedImage<PixelT> const& matchedImage,
+        lsst::afw::image::MaskedImage<PixelT> const& scienceMaskedImage,
+        BackgroundT background,
+        bool invert=true
+        );
+
+    /**
+     * @brief Convolve an image with every kernel of a basis list in Fourier space
+     *
+     * @note The image is transformed once, multiplied with the transform of
+     * each basis kernel and inverse transformed.  The basis transforms are
+     * cached for the last few basis lists and transform shapes, so that the
+     * stamps of all the kernel candidates share them; the kernels are
+     * identified by their addresses and must not be modified meanwhile.  Only
+     * the pixels inside kernel->shrinkBBox() of each output are valid and they
+     * match the output of afw::math::convolve (without normalization); the edge
+     * pixels are set to 0.
+     * The basis kernels must not vary spatially.
+     *
+     * @param image  Image to convolve
+     * @param basisList  List of spatially invariant kernels to convolve image with
+     *
+     * @ingroup ip_diffim
+     */
+    template <typename PixelT>
+    std::vector<std::shared_ptr<lsst::afw::image::Image<lsst::afw::math::Kernel::Pixel>>>
+    convolveBasisFft(
+        lsst::afw::image::Image<PixelT> const& image,
+        lsst::afw::math::KernelList const& basisList
+        );
+
+    /**
+     * @brief Convolve a MaskedImage with a LinearCombinationKernel via its basis decomposition
+     *
+     * @note The input is convolved once with each basis kernel and the results
+     * are summed with the spatial weights of the kernel at each pixel.  This is
+     * much faster than afw::math::convolve for a spatially varying kernel with
+     * few basis kernels (e.g. a Pca basis); the variance needs one convolution
+     * per pair of basis kernels.  The convolutions are accumulated one at a
+     * time, so the memory used does not grow with the number of basis kernels.
+     *
+     * @param convolvedImage  Output image; must have the dimensions of inImage
+     * @param inImage  MaskedImage to convolve
+     * @param kernel  Kernel to convolve inImage with; its basis kernels must not vary spatially
+     * @param useFft  Convolve with the basis kernels in Fourier space (as convolveBasisFft, but
+     *                without its cache of basis transforms)
+     *
+     * @ingroup ip_diffim
+     */
+    template <typename PixelT>
+    void convolveLinearCombination(
+        lsst::afw::image::MaskedImage<PixelT> &convolvedImage,
+        lsst::afw::image::MaskedImage<PixelT> const &inImage,
+        lsst::afw::math::LinearCombinationKernel const &kernel,
+        bool useFft=false
+        );
+
+    /**
+     * @brief Return the smallest integer >= n with no prime factors other than 2, 3 and 5
+     *
+     * @param n  Minimum transform length
+     *
+     * @ingroup ip_diffim
+     */
+    int nextFastFftSize(int n);
+
     /**
      * @brief Turns a 2-d Image into a 2-d Eigen Matrix
      *
@@ -200,7 +200,18 @@ namespace diffim {
         std::shared_ptr<StaticKernelSolution<PixelT> > _kernelSolutionPca;  ///< Most recent  solution
 
         void _buildKernelSolution(afw::math::KernelList const& basisList,
-                                  Eigen::MatrixXd const& hMat);
+                                  Eigen::MatrixXd const& hMat,
+                                  Eigen::MatrixXd const& cMat);
+
+        /**
+         * @brief Express the design matrix for basisList through that of _kernelSolutionOrig
+         *
+         * @note If every kernel in basisList is a linear combination P of the
+         * original basis kernels (e.g. a Pca basis), its convolved images are
+         * C_orig P and no new convolutions are needed.  Returns an empty
+         * matrix if this is not possible.
+         */
+        Eigen::MatrixXd _projectDesignMatrix(afw::math::KernelList const& basisList);
     };
 
 
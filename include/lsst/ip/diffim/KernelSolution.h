@@ -12,8 +12,12 @@
 #ifndef LSST_IP_DIFFIM_KERNELSOLUTION_H
 #define LSST_IP_DIFFIM_KERNELSOLUTION_H
 
+#include <atomic>
 #include <memory>
+#include <utility>
+#include <vector>
 #include "Eigen/Core"
+#include "Eigen/Cholesky"
 
 #include "lsst/afw/math.h"
 #include "lsst/afw/geom.h"
@@ -47,6 +51,11 @@ namespace diffim {
             SVD        = 1
         };
 
+        enum BasisConvolutionType {
+            DIRECT = 0,
+            FFT    = 1
+        };
+
         explicit KernelSolution(Eigen::MatrixXd mMat,
                                 Eigen::VectorXd bVec,
                                 bool fitForBackground);
@@ -58,6 +67,10 @@ namespace diffim {
         virtual void solve(Eigen::MatrixXd const& mMat, 
                            Eigen::VectorXd const& bVec);
         KernelSolvedBy getSolvedBy() {return _solvedBy;} 
+
+        /* Factorization tried first in solve(); LU and eigenvector decomposition remain the fallback */
+        void setPreferredSolver(KernelSolvedBy solver);
+        KernelSolvedBy getPreferredSolver() const {return _preferredSolver;}
         virtual double getConditionNumber(ConditionNumberType conditionType);
         virtual double getConditionNumber(Eigen::MatrixXd const& mMat, ConditionNumberType conditionType);
 
@@ -74,8 +87,9 @@ namespace diffim {
         Eigen::VectorXd _bVec;               ///< Derived least squares B vector
         Eigen::VectorXd _aVec;               ///< Derived least squares solution matrix
         KernelSolvedBy _solvedBy;                               ///< Type of algorithm used to make solution
+        KernelSolvedBy _preferredSolver;                        ///< Type of algorithm to try first
         bool _fitForBackground;                                 ///< Background terms included in fit
-        static int _SolutionId;                                 ///< Unique identifier for solution
+        static std::atomic<int> _SolutionId;                    ///< Unique identifier for solution
 
     };
 
@@ -101,6 +115,19 @@ namespace diffim {
         virtual double getKsum();
         virtual std::pair<std::shared_ptr<lsst::afw::math::Kernel>, double> getSolutionPair();
 
+        /* How build() convolves the template with the basis kernels */
+        void setBasisConvolution(BasisConvolutionType type) {_basisConvolution = type;}
+        BasisConvolutionType getBasisConvolution() const {return _basisConvolution;}
+
+        /* Build M and B for delta-function bases without forming the design matrix */
+        void setFastDeltaFunctionBuild(bool useFastBuild) {_useFastDeltaFunctionBuild = useFastBuild;}
+        bool getFastDeltaFunctionBuild() const {return _useFastDeltaFunctionBuild;}
+
+        /* Design matrix C of convolved basis images; may be empty after a fast delta-function build */
+        Eigen::MatrixXd const& getDesignMatrix() const {return _cMat;}
+        /* Have build() use this precomputed C instead of convolving the template */
+        void setDesignMatrix(Eigen::MatrixXd const& cMat) {_cMat = cMat; _useDesignMatrix = true;}
+
     protected:
         Eigen::MatrixXd _cMat;               ///< K_i x R
         Eigen::VectorXd _iVec;               ///< Vectorized I
@@ -109,9 +136,31 @@ namespace diffim {
         std::shared_ptr<lsst::afw::math::Kernel> _kernel;                   ///< Derived single-object convolution kernel
         double _background;                                     ///< Derived differential background estimate
         double _kSum;                                           ///< Derived kernel sum
+        BasisConvolutionType _basisConvolution;                 ///< Direct or Fourier basis convolution
+        bool _useFastDeltaFunctionBuild;                        ///< Shifted-window build for delta functions
+        bool _useDesignMatrix;                                  ///< build() uses the C set by setDesignMatrix
 
         void _setKernel();                                      ///< Set kernel after solution
         void _setKernelUncertainty();                           ///< Not implemented
+
+        /* Does the subclass need _cMat after build()? */
+        virtual bool _needsDesignMatrix() {return false;}
+
+        /**
+         * @brief Fill M and B directly from shifted template windows
+         *
+         * @note Each delta-function basis image is the template shifted by
+         * the (row, col) offset of the kernel pixel, so M_jk is a windowed
+         * cross-product of the template with itself.  With constant
+         * weighting all pairs sharing a relative shift are summed from a
+         * single summed-area table of the shifted product image.
+         */
+        void _buildDeltaFunction(Eigen::MatrixXd const& tMat,
+                                 Eigen::MatrixXd const& iMat,
+                                 Eigen::MatrixXd const& ivMat,
+                                 int startRow,
+                                 int startCol,
+                                 std::vector<std::pair<int, int> > const& offsets);
     };
 
 
@@ -168,6 +217,7 @@ namespace diffim {
         lsst::pex::policy::Policy _policy;
 
         std::vector<double> _createLambdaSteps();
+        bool _needsDesignMatrix();
     };
 
 
@@ -187,6 +237,12 @@ namespace diffim {
         void addConstraint(float xCenter, float yCenter,
                            Eigen::MatrixXd const& qMat,
                            Eigen::VectorXd const& wVec);
+        void removeConstraint(float xCenter, float yCenter,
+                              Eigen::MatrixXd const& qMat,
+                              Eigen::VectorXd const& wVec);
+
+        void setIncrementalFactorization(bool incremental);
+        bool getIncrementalFactorization() const {return _useIncrementalFactorization;}
 
         void solve();
         std::shared_ptr<lsst::afw::image::Image<lsst::afw::math::Kernel::Pixel>> makeKernelImage(lsst::afw::geom::Point2D const& pos);
@@ -207,6 +263,17 @@ namespace diffim {
         int _nbt;                                                ///< Number of background terms
         int _nt;                                                 ///< Total number of terms
 
+        bool _useIncrementalFactorization;                       ///< Update a Cholesky factor of M per constraint
+        bool _hasFactorization;                                  ///< Does _mFactorization hold the factor of M
+        Eigen::LLT<Eigen::MatrixXd> _mFactorization;             ///< Cholesky factor of M
+
+        void _accumulateConstraint(float xCenter, float yCenter,
+                                   Eigen::MatrixXd const& qMat,
+                                   Eigen::VectorXd const& wVec,
+                                   double sign);
+        void _updateFactorization(Eigen::MatrixXd const& pMat,
+                                  Eigen::MatrixXd const& qMat,
+                                  double sign);
         void _setKernel();                                       ///< Set kernel after solution
         void _setKernelUncertainty();                            ///< Not implemented
     };
@@ -43,6 +43,10 @@ namespace detail {
         void resetKernelSum();
         void processCandidate(lsst::afw::math::SpatialCellCandidate *candidate);
         void processKsumDistribution();
+
+        /* For visitCandidatesParallel */
+        Ptr makeWorker() const;
+        void mergeWorker(KernelSumVisitor<PixelT> const& worker);
         
     private:
         Mode _mode;                  ///< Processing mode; AGGREGATE or REJECT
@@ -0,0 +1,114 @@
+// -*- lsst-c++ -*-
+/**
+ * @file VisitCandidatesParallel.h
+ *
+ * @brief Thread-parallel equivalent of SpatialCellSet::visitCandidates
+ *
+ * @ingroup ip_diffim
+ */
+
+#ifndef LSST_IP_DIFFIM_VISITCANDIDATESPARALLEL_H
+#define LSST_IP_DIFFIM_VISITCANDIDATESPARALLEL_H
+
+#include <algorithm>
+#include <exception>
+#include <memory>
+#include <thread>
+#include <vector>
+
+#include "lsst/afw/math.h"
+
+namespace lsst {
+namespace ip {
+namespace diffim {
+namespace detail {
+
+    /**
+     * @brief Return, in order, the candidates SpatialCellSet::visitCandidates would visit
+     *
+     * @param cellSet  Cells holding the candidates
+     * @param nMaxPerCell  Maximum number of non-BAD candidates per cell; all if <= 0
+     *
+     * @note Processing a candidate can only change its own status, not which
+     * of its cell-mates follow it, so the list may be gathered up front.
+     *
+     * @ingroup ip_diffim
+     */
+    std::vector<afw::math::SpatialCellCandidate *> getCandidatesToVisit(
+        afw::math::SpatialCellSet &cellSet,
+        int const nMaxPerCell
+        );
+
+    /**
+     * @brief Visit the candidates of cellSet with nThreads concurrent copies of visitor
+     *
+     * @param visitor  Visitor to apply; receives the merged tallies of all workers
+     * @param cellSet  Cells holding the candidates
+     * @param nMaxPerCell  Maximum number of non-BAD candidates per cell; all if <= 0
+     * @param nThreads  Number of threads; 1 processes the candidates in the calling thread
+     *
+     * @note VisitorT must provide makeWorker(), returning a copy of itself with
+     * empty tallies that is safe to use alongside the others, and
+     * mergeWorker(), which adds a worker's tallies to its own.  Each thread
+     * processes a contiguous block of the candidate list and the workers are
+     * merged in block order, so the merged tallies (e.g. reject counts) do
+     * not depend on thread scheduling.  If a worker throws, the exception
+     * from the earliest block is rethrown after all threads have finished.
+     *
+     * @ingroup ip_diffim
+     */
+    template <typename VisitorT>
+    void visitCandidatesParallel(
+        VisitorT &visitor,
+        afw::math::SpatialCellSet &cellSet,
+        int const nMaxPerCell,
+        int nThreads
+        ) {
+        std::vector<afw::math::SpatialCellCandidate *> candidates = getCandidatesToVisit(cellSet, nMaxPerCell);
+        int const nCandidates = candidates.size();
+
+        visitor.reset();
+        nThreads = std::max(1, std::min(nThreads, nCandidates));
+        if (nThreads == 1) {
+            for (auto candidate : candidates) {
+                visitor.processCandidate(candidate);
+            }
+            return;
+        }
+
+        std::vector<std::shared_ptr<VisitorT> > workers;
+        std::vector<std::exception_ptr> errors(nThreads);
+        std::vector<std::thread> threads;
+        for (int i = 0; i < nThreads; ++i) {
+            workers.push_back(visitor.makeWorker());
+        }
+        for (int i = 0; i < nThreads; ++i) {
+            int const begin = (i * nCandidates) / nThreads;
+            int const end = ((i + 1) * nCandidates) / nThreads;
+            threads.push_back(std::thread([&candidates, &workers, &errors, i, begin, end]() {
+                try {
+                    for (int j = begin; j < end; ++j) {
+                        workers[i]->processCandidate(candidates[j]);
+                    }
+                } catch (...) {
+                    errors[i] = std::current_exception();
+                }
+            }));
+        }
+        for (auto &thread : threads) {
+            thread.join();
+        }
+
+        for (auto const &worker : workers) {
+            visitor.mergeWorker(*worker);
+        }
+        for (auto const &error : errors) {
+            if (error) {
+                std::rethrow_exception(error);
+            }
+        }
+    }
+
+}}}} // end of namespace lsst::ip::diffim::detail
+
+#endif
@@ -58,7 +58,8 @@ void declareAssessSpatialKernelVisitor(py::module& mod, std::string const& suffi
     cls.def("getNGood", &AssessSpatialKernelVisitor<PixelT>::getNGood);
     cls.def("getNRejected", &AssessSpatialKernelVisitor<PixelT>::getNRejected);
     cls.def("getNProcessed", &AssessSpatialKernelVisitor<PixelT>::getNProcessed);
-    cls.def("processCandidate", &AssessSpatialKernelVisitor<PixelT>::processCandidate, "candidate"_a);
+    cls.def("processCandidate", &AssessSpatialKernelVisitor<PixelT>::processCandidate, "candidate"_a,
+            py::call_guard<py::gil_scoped_release>());
 
     mod.def("makeAssessSpatialKernelVisitor", &makeAssessSpatialKernelVisitor<PixelT>, "spatialKernel"_a,
             "spatialBackground"_a, "policy"_a);
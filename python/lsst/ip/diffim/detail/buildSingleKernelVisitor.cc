@@ -65,7 +65,8 @@ void declareBuildSingleKernelVisitor(py::module& mod, std::string const& suffix)
     cls.def("getNRejected", &BuildSingleKernelVisitor<PixelT>::getNRejected);
     cls.def("getNProcessed", &BuildSingleKernelVisitor<PixelT>::getNProcessed);
     cls.def("reset", &BuildSingleKernelVisitor<PixelT>::reset);
-    cls.def("processCandidate", &BuildSingleKernelVisitor<PixelT>::processCandidate, "candidate"_a);
+    cls.def("processCandidate", &BuildSingleKernelVisitor<PixelT>::processCandidate, "candidate"_a,
+            py::call_guard<py::gil_scoped_release>());
 
     mod.def("makeBuildSingleKernelVisitor",
             (std::shared_ptr<BuildSingleKernelVisitor<PixelT>>(*)(afw::math::KernelList const&,
@@ -59,8 +59,11 @@ void declareBuildSpatialKernelVisitor(py::module& mod, std::string const& suffix
             "regionBBox"_a, "policy"_a);
 
     cls.def("getNCandidates", &BuildSpatialKernelVisitor<PixelT>::getNCandidates);
-    cls.def("processCandidate", &BuildSpatialKernelVisitor<PixelT>::processCandidate, "candidate"_a);
-    cls.def("solveLinearEquation", &BuildSpatialKernelVisitor<PixelT>::solveLinearEquation);
+    cls.def("reset", &BuildSpatialKernelVisitor<PixelT>::reset);
+    cls.def("processCandidate", &BuildSpatialKernelVisitor<PixelT>::processCandidate, "candidate"_a,
+            py::call_guard<py::gil_scoped_release>());
+    cls.def("solveLinearEquation", &BuildSpatialKernelVisitor<PixelT>::solveLinearEquation,
+            py::call_guard<py::gil_scoped_release>());
     cls.def("getKernelSolution", &BuildSpatialKernelVisitor<PixelT>::getKernelSolution);
     cls.def("getSolutionPair", &BuildSpatialKernelVisitor<PixelT>::getSolutionPair);
 
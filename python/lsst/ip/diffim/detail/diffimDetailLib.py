@@ -4,3 +4,4 @@ from .buildSingleKernelVisitor import *
 from .buildSpatialKernelVisitor import *
 from .kernelPca import *
 from .kernelSumVisitor import *
+from .visitCandidatesParallel import *
@@ -78,7 +78,8 @@ void declareKernelPcaVisitor(py::module& mod, std::string const& suffix) {
     cls.def(py::init<std::shared_ptr<KernelPca<KernelImageT>>>(), "imagePca"_a);
 
     cls.def("getEigenKernels", &KernelPcaVisitor<PixelT>::getEigenKernels);
-    cls.def("processCandidate", &KernelPcaVisitor<PixelT>::processCandidate, "candidate"_a);
+    cls.def("processCandidate", &KernelPcaVisitor<PixelT>::processCandidate, "candidate"_a,
+            py::call_guard<py::gil_scoped_release>());
     cls.def("subtractMean", &KernelPcaVisitor<PixelT>::subtractMean);
     cls.def("returnMean", &KernelPcaVisitor<PixelT>::returnMean);
 
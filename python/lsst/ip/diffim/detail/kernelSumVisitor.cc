@@ -66,7 +66,8 @@ void declareKernelSumVisitor(py::module& mod, std::string const& suffix) {
     cls.def("getdkSumMax", &Class::getdkSumMax);
     cls.def("getkSumNpts", &Class::getkSumNpts);
     cls.def("resetKernelSum", &Class::resetKernelSum);
-    cls.def("processCandidate", &Class::processCandidate, "candidate"_a);
+    cls.def("processCandidate", &Class::processCandidate, "candidate"_a,
+            py::call_guard<py::gil_scoped_release>());
     cls.def("processKsumDistribution", &Class::processKsumDistribution);
 
     mod.def("makeKernelSumVisitor", &makeKernelSumVisitor<PixelT>, "policy"_a);
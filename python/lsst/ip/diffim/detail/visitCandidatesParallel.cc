@@ -0,0 +1,68 @@
+/*
+ * LSST Data Management System
+ *
+ * This product includes software developed by the
+ * LSST Project (http://www.lsst.org/).
+ * See the COPYRIGHT file
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the LSST License Statement and
+ * the GNU General Public License along with this program.  If not,
+ * see <https://www.lsstcorp.org/LegalNotices/>.
+ */
+#include "pybind11/pybind11.h"
+
+#include "lsst/afw/math/SpatialCell.h"
+#include "lsst/ip/diffim/AssessSpatialKernelVisitor.h"
+#include "lsst/ip/diffim/BuildSingleKernelVisitor.h"
+#include "lsst/ip/diffim/KernelSumVisitor.h"
+#include "lsst/ip/diffim/VisitCandidatesParallel.h"
+
+namespace py = pybind11;
+using namespace pybind11::literals;
+
+namespace lsst {
+namespace ip {
+namespace diffim {
+namespace detail {
+
+namespace {
+
+/**
+ * Wrap visitCandidatesParallel for one visitor type
+ *
+ * @tparam VisitorT  Visitor type, e.g. `BuildSingleKernelVisitor<float>`
+ * @param mod  pybind11 module
+ */
+template <typename VisitorT>
+void declareVisitCandidatesParallel(py::module& mod) {
+    mod.def("visitCandidatesParallel", &visitCandidatesParallel<VisitorT>, "visitor"_a, "cellSet"_a,
+            "nMaxPerCell"_a, "nThreads"_a, py::call_guard<py::gil_scoped_release>());
+}
+
+}  // namespace lsst::ip::diffim::detail::<anonymous>
+
+PYBIND11_MODULE(visitCandidatesParallel, mod) {
+    py::module::import("lsst.afw.math");
+    py::module::import("lsst.ip.diffim.detail.assessSpatialKernelVisitor");
+    py::module::import("lsst.ip.diffim.detail.buildSingleKernelVisitor");
+    py::module::import("lsst.ip.diffim.detail.kernelSumVisitor");
+
+    declareVisitCandidatesParallel<AssessSpatialKernelVisitor<float>>(mod);
+    declareVisitCandidatesParallel<BuildSingleKernelVisitor<float>>(mod);
+    declareVisitCandidatesParallel<KernelSumVisitor<float>>(mod);
+}
+
+}  // detail
+}  // diffim
+}  // ip
+}  // lsst
@@ -24,7 +24,9 @@ __all__ = ["backgroundSubtract", "writeKernelCellSet", "sourceToFootprintList",
 # python
 import time
 import os
-from collections import Counter
+import hashlib
+import threading
+from collections import Counter, OrderedDict
 import numpy as np
 
 # all the c++ level classes and routines
@@ -581,3 +583,96 @@ class NbasisEvaluator(object):
                  counter[1][0], counter[1][1],
                  counter[2][0], counter[2][1])
         return counter[0][0], counter[1][0], counter[2][0]
+
+
+#######
+# Caching
+#######
+
+
+class ArrayCache:
+    """Thread-safe least-recently-used cache of tuples of arrays, within a
+    budget of entries and of bytes
+
+    The cached arrays are shared by all users of the cache, so they are
+    made read-only.
+
+    Parameters
+    ----------
+    maxEntries : `int`, optional
+        maximum number of entries held; `None` for no limit
+    maxBytes : `int`, optional
+        maximum total size of the arrays held; `None` for no limit
+    """
+    def __init__(self, maxEntries=None, maxBytes=None):
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.nBytes = 0
+        self.nHits = self.nMisses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def makeKey(*arrays):
+        """Make a key from the dimensions, types and contents of ``arrays``
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for arr in arrays:
+            arr = np.ascontiguousarray(arr)
+            digest.update(repr((arr.shape, arr.dtype.str)).encode())
+            digest.update(arr)
+        return digest.hexdigest()
+
+    def lookup(self, key):
+        """Return the arrays cached under ``key`` and count a hit, or `None`
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.nHits += 1
+            return value
+
+    def insert(self, key, value):
+        """Cache the arrays ``value`` under ``key``, making them read-only,
+        unless they do not fit in the budget, evicting the least recently
+        used entries beyond it
+        """
+        nBytes = sum(arr.nbytes for arr in value)
+        with self._lock:
+            if key in self._entries or self.maxEntries == 0:
+                return
+            if self.maxBytes is not None and nBytes > self.maxBytes:
+                return
+            for arr in value:
+                arr.flags.writeable = False
+            self._entries[key] = value
+            self.nBytes += nBytes
+            while ((self.maxEntries is not None and len(self._entries) > self.maxEntries) or
+                   (self.maxBytes is not None and self.nBytes > self.maxBytes)):
+                _, evicted = self._entries.popitem(last=False)
+                self.nBytes -= sum(arr.nbytes for arr in evicted)
+
+    def get(self, key, compute):
+        """Return the arrays cached under ``key``, or else cache and return ``compute()``
+
+        Parameters
+        ----------
+        key : hashable
+            key of the arrays
+        compute : callable
+            function computing the `tuple` of arrays to cache
+        """
+        value = self.lookup(key)
+        if value is None:
+            with self._lock:
+                self.nMisses += 1
+            value = tuple(compute())
+            self.insert(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nBytes = 0
+            self.nHits = self.nMisses = 0
@@ -76,6 +76,15 @@ class DipoleFitPluginConfig(measBase.SingleFramePluginConfig):
         dtype=bool, default=False,
         doc="Include parameters to fit for negative values (flux, gradient) separately from pos.")
 
+    fitEngine = pexConfig.ChoiceField(
+        dtype=str, default="lmfit",
+        doc="Optimizer of the dipole fit",
+        allowed={
+            "lmfit": "lmfit model fit, with finite-difference derivatives",
+            "analytic": "scipy.optimize.least_squares fit, with analytic derivatives computed from "
+                        "the PSF image gradients; faster, with the same results within the fit tolerance",
+        })
+
     # Config params for classification of detected diaSources as dipole or not
     minSn = pexConfig.Field(
         dtype=float, default=np.sqrt(2) * 5.0,
@@ -532,44 +541,29 @@ class DipoleFitAlgorithm(object):
         import lsstDebug
         self.debug = lsstDebug.Info(__name__).debug
 
-    def fitDipoleImpl(self, source, tol=1e-7, rel_weight=0.5,
-                      fitBackground=1, bgGradientOrder=1, maxSepInSigma=5.,
-                      separateNegParams=True, verbose=False):
-        """Fit a dipole model to an input difference image.
+    def _prepareFit(self, source, rel_weight=0.5, fitBackground=1, bgGradientOrder=1,
+                    maxSepInSigma=5., separateNegParams=True):
+        """Extract the data and weights of a dipole fit, pre-fit the
+        background, and set the starting values and bounds of the fit
+        parameters, for `fitDipoleImpl` and `fitDipoleAnalyticImpl`
 
-        Actually, fits the subimage bounded by the input source's
-        footprint) and optionally constrain the fit using the
-        pre-subtraction images posImage and negImage.
-
-        Parameters
-        ----------
-        source : TODO: DM-17458
-            TODO: DM-17458
-        tol : float, optional
-            TODO: DM-17458
-        rel_weight : `float`, optional
-            TODO: DM-17458
-        fitBackground : `int`, optional
-            TODO: DM-17458
-        bgGradientOrder : `int`, optional
-            TODO: DM-17458
-        maxSepInSigma : `float`, optional
-            TODO: DM-17458
-        separateNegParams : `bool`, optional
-            TODO: DM-17458
-        verbose : `bool`, optional
-            TODO: DM-17458
+        The parameters are those of `fitDipoleImpl`.
 
         Returns
         -------
-        result : `lmfit.MinimizerResult`
-            return `lmfit.MinimizerResult` object containing the fit
-            parameters and other information.
+        result : `lsst.pipe.base.Struct`
+            A struct containing:
+
+            - ``z`` : the data to fit; the diffim, or a stack of the diffim
+              and the (background-subtracted) positive and negative images
+            - ``weights`` : the least-squares weights of ``z``
+            - ``in_x`` : the centered coordinate grid of the footprint bounding box
+            - ``rel_weight`` : ``rel_weight``, or 0 if the pre-subtraction images are not fit
+            - ``paramHints`` : `dict` of the starting ``value`` and (optional)
+              ``min`` and ``max`` of each fit parameter, by name
+            - ``footprint`` : the footprint of ``source``
+            - ``dipoleModel`` : the `DipoleModel`
         """
-
-        # Only import lmfit if someone wants to use the new DipoleFitAlgorithm.
-        import lmfit
-
         fp = source.getFootprint()
         bbox = fp.getBBox()
         subim = afwImage.MaskedImageF(self.diffim.getMaskedImage(), bbox=bbox, origin=afwImage.PARENT)
@@ -597,31 +591,12 @@ class DipoleFitAlgorithm(object):
         else:
             rel_weight = 0.  # a short-cut for "don't include the pre-subtraction data"
 
-        # It seems that `lmfit` requires a static functor as its optimized method, which eliminates
-        # the ability to pass a bound method or other class method. Here we write a wrapper which
-        # makes this possible.
-        def dipoleModelFunctor(x, flux, xcenPos, ycenPos, xcenNeg, ycenNeg, fluxNeg=None,
-                               b=None, x1=None, y1=None, xy=None, x2=None, y2=None,
-                               bNeg=None, x1Neg=None, y1Neg=None, xyNeg=None, x2Neg=None, y2Neg=None,
-                               **kwargs):
-            """Generate dipole model with given parameters.
-
-            It simply defers to `modelObj.makeModel()`, where `modelObj` comes
-            out of `kwargs['modelObj']`.
-            """
-            modelObj = kwargs.pop('modelObj')
-            return modelObj.makeModel(x, flux, xcenPos, ycenPos, xcenNeg, ycenNeg, fluxNeg=fluxNeg,
-                                      b=b, x1=x1, y1=y1, xy=xy, x2=x2, y2=y2,
-                                      bNeg=bNeg, x1Neg=x1Neg, y1Neg=y1Neg, xyNeg=xyNeg,
-                                      x2Neg=x2Neg, y2Neg=y2Neg, **kwargs)
-
         dipoleModel = DipoleModel()
 
-        modelFunctor = dipoleModelFunctor  # dipoleModel.makeModel does not work for now.
-        # Create the lmfit model (lmfit uses scipy 'leastsq' option by default - Levenberg-Marquardt)
-        # Note we can also tell it to drop missing values from the data.
-        gmod = lmfit.Model(modelFunctor, verbose=verbose, missing='drop')
-        # independent_vars=independent_vars) #, param_names=param_names)
+        paramHints = {}
+
+        def setParamHint(name, **kwargs):
+            paramHints.setdefault(name, {}).update(kwargs)
 
         # Add the constraints for centroids, fluxes.
         # starting constraint - near centroid of footprint
@@ -648,14 +623,14 @@ class DipoleFitAlgorithm(object):
         # parameter hints/constraints: https://lmfit.github.io/lmfit-py/model.html#model-param-hints-section
         # might make sense to not use bounds -- see http://lmfit.github.io/lmfit-py/bounds.html
         # also see this discussion -- https://github.com/scipy/scipy/issues/3129
-        gmod.set_param_hint('xcenPos', value=cenPos[0],
-                            min=cenPos[0]-maxSep, max=cenPos[0]+maxSep)
-        gmod.set_param_hint('ycenPos', value=cenPos[1],
-                            min=cenPos[1]-maxSep, max=cenPos[1]+maxSep)
-        gmod.set_param_hint('xcenNeg', value=cenNeg[0],
-                            min=cenNeg[0]-maxSep, max=cenNeg[0]+maxSep)
-        gmod.set_param_hint('ycenNeg', value=cenNeg[1],
-                            min=cenNeg[1]-maxSep, max=cenNeg[1]+maxSep)
+        setParamHint('xcenPos', value=cenPos[0],
+                     min=cenPos[0]-maxSep, max=cenPos[0]+maxSep)
+        setParamHint('ycenPos', value=cenPos[1],
+                     min=cenPos[1]-maxSep, max=cenPos[1]+maxSep)
+        setParamHint('xcenNeg', value=cenNeg[0],
+                     min=cenNeg[0]-maxSep, max=cenNeg[0]+maxSep)
+        setParamHint('ycenNeg', value=cenNeg[1],
+                     min=cenNeg[1]-maxSep, max=cenNeg[1]+maxSep)
 
         # Use the (flux under the dipole)*5 for an estimate.
         # Lots of testing showed that having startingFlux be too high was better than too low.
@@ -663,11 +638,11 @@ class DipoleFitAlgorithm(object):
         posFlux = negFlux = startingFlux
 
         # TBD: set max. flux limit?
-        gmod.set_param_hint('flux', value=posFlux, min=0.1)
+        setParamHint('flux', value=posFlux, min=0.1)
 
         if separateNegParams:
             # TBD: set max negative lobe flux limit?
-            gmod.set_param_hint('fluxNeg', value=np.abs(negFlux), min=0.1)
+            setParamHint('fluxNeg', value=np.abs(negFlux), min=0.1)
 
         # Fixed parameters (don't fit for them if there are no pre-sub images or no gradient fit requested):
         # Right now (fitBackground == 1), we fit a linear model to the background and then subtract
@@ -690,7 +665,7 @@ class DipoleFitAlgorithm(object):
                 z[1, :] -= pbg
                 z[1, :] -= np.nanmedian(z[1, :])
                 posFlux = np.nansum(z[1, :])
-                gmod.set_param_hint('flux', value=posFlux*1.5, min=0.1)
+                setParamHint('flux', value=posFlux*1.5, min=0.1)
 
                 if separateNegParams and self.negImage is not None:
                     bgParsNeg = dipoleModel.fitFootprintBackground(source, self.negImage,
@@ -700,28 +675,28 @@ class DipoleFitAlgorithm(object):
                 z[2, :] -= np.nanmedian(z[2, :])
                 if separateNegParams:
                     negFlux = np.nansum(z[2, :])
-                    gmod.set_param_hint('fluxNeg', value=negFlux*1.5, min=0.1)
+                    setParamHint('fluxNeg', value=negFlux*1.5, min=0.1)
 
             # Do not subtract the background from the images but include the background parameters in the fit
             if fitBackground == 2:
                 if bgGradientOrder >= 0:
-                    gmod.set_param_hint('b', value=bgParsPos[0])
+                    setParamHint('b', value=bgParsPos[0])
                     if separateNegParams:
-                        gmod.set_param_hint('bNeg', value=bgParsNeg[0])
+                        setParamHint('bNeg', value=bgParsNeg[0])
                 if bgGradientOrder >= 1:
-                    gmod.set_param_hint('x1', value=bgParsPos[1])
-                    gmod.set_param_hint('y1', value=bgParsPos[2])
+                    setParamHint('x1', value=bgParsPos[1])
+                    setParamHint('y1', value=bgParsPos[2])
                     if separateNegParams:
-                        gmod.set_param_hint('x1Neg', value=bgParsNeg[1])
-                        gmod.set_param_hint('y1Neg', value=bgParsNeg[2])
+                        setParamHint('x1Neg', value=bgParsNeg[1])
+                        setParamHint('y1Neg', value=bgParsNeg[2])
                 if bgGradientOrder >= 2:
-                    gmod.set_param_hint('xy', value=bgParsPos[3])
-                    gmod.set_param_hint('x2', value=bgParsPos[4])
-                    gmod.set_param_hint('y2', value=bgParsPos[5])
+                    setParamHint('xy', value=bgParsPos[3])
+                    setParamHint('x2', value=bgParsPos[4])
+                    setParamHint('y2', value=bgParsPos[5])
                     if separateNegParams:
-                        gmod.set_param_hint('xyNeg', value=bgParsNeg[3])
-                        gmod.set_param_hint('x2Neg', value=bgParsNeg[4])
-                        gmod.set_param_hint('y2Neg', value=bgParsNeg[5])
+                        setParamHint('xyNeg', value=bgParsNeg[3])
+                        setParamHint('x2Neg', value=bgParsNeg[4])
+                        setParamHint('y2Neg', value=bgParsNeg[5])
 
         y, x = np.mgrid[bbox.getBeginY():bbox.getEndY(), bbox.getBeginX():bbox.getEndX()]
         in_x = np.array([x, y]).astype(np.float)
@@ -744,19 +719,91 @@ class DipoleFitAlgorithm(object):
         if np.any(~mask):
             weights[~mask] = 0.
 
+        return Struct(z=z, weights=weights, in_x=in_x, rel_weight=rel_weight, paramHints=paramHints,
+                      footprint=fp, dipoleModel=dipoleModel)
+
+    def fitDipoleImpl(self, source, tol=1e-7, rel_weight=0.5,
+                      fitBackground=1, bgGradientOrder=1, maxSepInSigma=5.,
+                      separateNegParams=True, verbose=False):
+        """Fit a dipole model to an input difference image.
+
+        Actually, fits the subimage bounded by the input source's
+        footprint) and optionally constrain the fit using the
+        pre-subtraction images posImage and negImage.
+
+        Parameters
+        ----------
+        source : TODO: DM-17458
+            TODO: DM-17458
+        tol : float, optional
+            TODO: DM-17458
+        rel_weight : `float`, optional
+            TODO: DM-17458
+        fitBackground : `int`, optional
+            TODO: DM-17458
+        bgGradientOrder : `int`, optional
+            TODO: DM-17458
+        maxSepInSigma : `float`, optional
+            TODO: DM-17458
+        separateNegParams : `bool`, optional
+            TODO: DM-17458
+        verbose : `bool`, optional
+            TODO: DM-17458
+
+        Returns
+        -------
+        result : `lmfit.MinimizerResult`
+            return `lmfit.MinimizerResult` object containing the fit
+            parameters and other information.
+        """
+
+        # Only import lmfit if someone wants to use the new DipoleFitAlgorithm.
+        import lmfit
+
+        prep = self._prepareFit(source, rel_weight=rel_weight, fitBackground=fitBackground,
+                                bgGradientOrder=bgGradientOrder, maxSepInSigma=maxSepInSigma,
+                                separateNegParams=separateNegParams)
+
+        # It seems that `lmfit` requires a static functor as its optimized method, which eliminates
+        # the ability to pass a bound method or other class method. Here we write a wrapper which
+        # makes this possible.
+        def dipoleModelFunctor(x, flux, xcenPos, ycenPos, xcenNeg, ycenNeg, fluxNeg=None,
+                               b=None, x1=None, y1=None, xy=None, x2=None, y2=None,
+                               bNeg=None, x1Neg=None, y1Neg=None, xyNeg=None, x2Neg=None, y2Neg=None,
+                               **kwargs):
+            """Generate dipole model with given parameters.
+
+            It simply defers to `modelObj.makeModel()`, where `modelObj` comes
+            out of `kwargs['modelObj']`.
+            """
+            modelObj = kwargs.pop('modelObj')
+            return modelObj.makeModel(x, flux, xcenPos, ycenPos, xcenNeg, ycenNeg, fluxNeg=fluxNeg,
+                                      b=b, x1=x1, y1=y1, xy=xy, x2=x2, y2=y2,
+                                      bNeg=bNeg, x1Neg=x1Neg, y1Neg=y1Neg, xyNeg=xyNeg,
+                                      x2Neg=x2Neg, y2Neg=y2Neg, **kwargs)
+
+        modelFunctor = dipoleModelFunctor  # dipoleModel.makeModel does not work for now.
+        # Create the lmfit model (lmfit uses scipy 'leastsq' option by default - Levenberg-Marquardt)
+        # Note we can also tell it to drop missing values from the data.
+        gmod = lmfit.Model(modelFunctor, verbose=verbose, missing='drop')
+        # independent_vars=independent_vars) #, param_names=param_names)
+
+        for name, hint in prep.paramHints.items():
+            gmod.set_param_hint(name, **hint)
+
         # Note that although we can, we're not required to set initial values for params here,
         # since we set their param_hint's above.
         # Can add "method" param to not use 'leastsq' (==levenberg-marquardt), e.g. "method='nelder'"
         with warnings.catch_warnings():
             warnings.simplefilter("ignore")  # temporarily turn off silly lmfit warnings
-            result = gmod.fit(z, weights=weights, x=in_x,
+            result = gmod.fit(prep.z, weights=prep.weights, x=prep.in_x,
                               verbose=verbose,
                               fit_kws={'ftol': tol, 'xtol': tol, 'gtol': tol,
                                        'maxfev': 250},  # see scipy docs
                               psf=self.diffim.getPsf(),  # hereon: kwargs that get passed to genDipoleModel()
-                              rel_weight=rel_weight,
-                              footprint=fp,
-                              modelObj=dipoleModel)
+                              rel_weight=prep.rel_weight,
+                              footprint=prep.footprint,
+                              modelObj=prep.dipoleModel)
 
         if verbose:  # the ci_report() seems to fail if neg params are constrained -- TBD why.
             # Never wanted in production - this takes a long time (longer than the fit!)
@@ -769,9 +816,172 @@ class DipoleFitAlgorithm(object):
 
         return result
 
+    def fitDipoleAnalyticImpl(self, source, tol=1e-7, rel_weight=0.5,
+                              fitBackground=1, bgGradientOrder=1, maxSepInSigma=5.,
+                              separateNegParams=True, verbose=False):
+        """Fit a dipole model to an input difference image, using analytic derivatives.
+
+        This fits the same model, to the same data and from the same starting
+        parameters, as `fitDipoleImpl`, but with `scipy.optimize.least_squares`
+        and a Jacobian computed from the gradients of the PSF images rather
+        than by finite differences. The PSF image of each lobe is computed
+        only when its centroid changes, and the model is evaluated into
+        preallocated arrays.
+
+        Parameters
+        ----------
+        source : `lsst.afw.table.SourceRecord`
+            Record containing the (merged) dipole source footprint detected on the diffim
+        tol : `float`, optional
+            Tolerance parameter for the `scipy.optimize.least_squares` optimization
+        rel_weight, fitBackground, bgGradientOrder, maxSepInSigma, separateNegParams :
+            As for `fitDipoleImpl`.
+        verbose : `bool`, optional
+            Be verbose
+
+        Returns
+        -------
+        result : `lsst.pipe.base.Struct`
+            A struct with the attributes of `lmfit.model.ModelResult` used
+            by `fitDipole` and `displayFitResults`:
+
+            - ``best_values`` : `dict` of the best-fit parameters, by name
+            - ``params`` : `dict` of `lsst.pipe.base.Struct`, by name, with
+              the ``value`` and ``stderr`` (`None` if unavailable) of each parameter
+            - ``chisqr``, ``redchi`` : the chi^2 and reduced chi^2 of the fit
+            - ``data``, ``best_fit`` : the fit data and best-fit model
+            - ``nfev``, ``success``, ``message`` : from `scipy.optimize.least_squares`
+        """
+        from scipy.optimize import least_squares
+
+        prep = self._prepareFit(source, rel_weight=rel_weight, fitBackground=fitBackground,
+                                bgGradientOrder=bgGradientOrder, maxSepInSigma=maxSepInSigma,
+                                separateNegParams=separateNegParams)
+        psf = self.diffim.getPsf()
+        bbox = prep.footprint.getBBox()
+        nPlanes = 3 if prep.rel_weight > 0. else 1
+        shape = prep.z.shape[-2:]
+        z = prep.z.reshape((nPlanes,) + shape)
+        weights = prep.weights.reshape((nPlanes,) + shape)
+        good = np.isfinite(z)  # as lmfit's missing='drop'
+
+        centroidNames = ('xcenPos', 'ycenPos', 'xcenNeg', 'ycenNeg')
+        names = ['flux'] + list(centroidNames) + [name for name in prep.paramHints
+                                                  if name not in centroidNames and name != 'flux']
+        index = {name: i for i, name in enumerate(names)}
+        x0 = np.array([prep.paramHints[name]['value'] for name in names], dtype=float)
+        lower = np.array([prep.paramHints[name].get('min', -np.inf) for name in names], dtype=float)
+        upper = np.array([prep.paramHints[name].get('max', np.inf) for name in names], dtype=float)
+        x0 = np.clip(x0, lower, upper)
+
+        # The background terms, in the order of the parameters of `DipoleModel.makeBackgroundModel`
+        in_x = prep.in_x
+        bgTerms = (np.ones_like(in_x[1]), in_x[1], in_x[0], in_x[0]*in_x[1], in_x[1]*in_x[1], in_x[0]*in_x[0])
+        bgNames = ('b', 'x1', 'y1', 'xy', 'x2', 'y2')
+        bgPos = [(index[name], term) for name, term in zip(bgNames, bgTerms) if name in index]
+        bgNeg = [(index[name + 'Neg'], term) for name, term in zip(bgNames, bgTerms) if name + 'Neg' in index]
+        separateBgNeg = 'bNeg' in index
+
+        # Preallocated work arrays: the normalized PSF image of each lobe and its
+        # derivatives with respect to the lobe centroid, the model and the Jacobian
+        stars = {lobe: Struct(key=None, image=np.zeros(shape), dx=np.zeros(shape), dy=np.zeros(shape))
+                 for lobe in ('Pos', 'Neg')}
+        model = np.zeros((nPlanes,) + shape)
+        jacobian = np.zeros((len(names), nPlanes) + shape)
+
+        def renderStar(lobe, xcen, ycen):
+            star = stars[lobe]
+            if star.key == (xcen, ycen):
+                return star
+            star.key = (xcen, ycen)
+            star.image[:, :] = star.dx[:, :] = star.dy[:, :] = 0.
+            psfImg = psf.computeImage(afwGeom.Point2D(xcen, ycen))
+            psfArr = psfImg.getArray()
+            psfBox = psfImg.getBBox()
+            psfBox.clip(bbox)
+            if psfBox.isEmpty():
+                return star
+            norm = np.nansum(psfArr)
+            gradY, gradX = np.gradient(psfArr)
+            src = (slice(psfBox.getBeginY() - psfImg.getY0(), psfBox.getEndY() - psfImg.getY0()),
+                   slice(psfBox.getBeginX() - psfImg.getX0(), psfBox.getEndX() - psfImg.getX0()))
+            dst = (slice(psfBox.getBeginY() - bbox.getBeginY(), psfBox.getEndY() - bbox.getBeginY()),
+                   slice(psfBox.getBeginX() - bbox.getBeginX(), psfBox.getEndX() - bbox.getBeginX()))
+            # Moving the centroid by +dx moves the image by +dx, i.e. samples it at -dx
+            star.image[dst] = psfArr[src] / norm
+            star.dx[dst] = -gradX[src] / norm
+            star.dy[dst] = -gradY[src] / norm
+            return star
+
+        def evaluate(p):
+            pos = renderStar('Pos', p[index['xcenPos']], p[index['ycenPos']])
+            neg = renderStar('Neg', p[index['xcenNeg']], p[index['ycenNeg']])
+            flux = p[index['flux']]
+            fluxNeg = p[index['fluxNeg']] if 'fluxNeg' in index else flux
+            posIm = flux * pos.image
+            negIm = fluxNeg * neg.image
+            for i, term in bgPos:
+                posIm += p[i] * term
+            for i, term in (bgNeg if separateBgNeg else bgPos):
+                negIm += p[i] * term
+            model[0] = posIm - negIm
+            if nPlanes > 1:
+                model[1] = posIm
+                model[2] = negIm
+            return pos, neg, flux, fluxNeg
+
+        def residuals(p):
+            evaluate(p)
+            return ((model - z) * weights)[good]
+
+        def jac(p):
+            pos, neg, flux, fluxNeg = evaluate(p)
+            jacobian[:] = 0.
+            # d(model)/d(param) for the diffim, positive and negative planes
+            derivs = {'xcenPos': (flux * pos.dx, flux * pos.dx, None),
+                      'ycenPos': (flux * pos.dy, flux * pos.dy, None),
+                      'xcenNeg': (-fluxNeg * neg.dx, None, fluxNeg * neg.dx),
+                      'ycenNeg': (-fluxNeg * neg.dy, None, fluxNeg * neg.dy)}
+            if 'fluxNeg' in index:
+                derivs['flux'] = (pos.image, pos.image, None)
+                derivs['fluxNeg'] = (-neg.image, None, neg.image)
+            else:
+                derivs['flux'] = (pos.image - neg.image, pos.image, neg.image)
+            for i, term in bgPos:
+                derivs[names[i]] = (term if separateBgNeg else None, term, None if separateBgNeg else term)
+            for i, term in bgNeg:
+                derivs[names[i]] = (-term, None, term)
+            for name, planes in derivs.items():
+                for plane, deriv in enumerate(planes[:nPlanes]):
+                    if deriv is not None:
+                        jacobian[index[name], plane] = deriv
+            return (jacobian * weights)[:, good].T
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            fit = least_squares(residuals, x0, jac=jac, bounds=(lower, upper), method='trf',
+                                ftol=tol, xtol=tol, gtol=tol, max_nfev=250,
+                                verbose=2 if verbose else 0)
+
+        chisqr = float(np.sum(fit.fun**2))
+        nFree = fit.fun.size - len(names)
+        redchi = chisqr / nFree if nFree > 0 else np.nan
+        # The parameter covariance is (J^T J)^-1, unless J is (numerically) rank-deficient,
+        # as when a parameter does not affect the model
+        stderr = [None] * len(names)
+        if np.linalg.cond(fit.jac) < 1. / np.sqrt(np.finfo(float).eps):
+            stderr = np.sqrt(np.diag(np.linalg.pinv(fit.jac.T @ fit.jac)) * redchi)
+
+        evaluate(fit.x)
+        return Struct(best_values=dict(zip(names, fit.x)),
+                      params={name: Struct(value=value, stderr=err)
+                              for name, value, err in zip(names, fit.x, stderr)},
+                      chisqr=chisqr, redchi=redchi, data=prep.z, best_fit=model.reshape(prep.z.shape).copy(),
+                      nfev=fit.nfev, success=fit.success, message=fit.message)
+
     def fitDipole(self, source, tol=1e-7, rel_weight=0.1,
                   fitBackground=1, maxSepInSigma=5., separateNegParams=True,
-                  bgGradientOrder=1, verbose=False, display=False):
+                  bgGradientOrder=1, verbose=False, display=False, engine="lmfit"):
         """Fit a dipole model to an input ``diaSource`` (wraps `fitDipoleImpl`).
 
         Actually, fits the subimage bounded by the input source's
@@ -808,6 +1018,9 @@ class DipoleFitAlgorithm(object):
             Be verbose
         display
             Display input data, best fit model(s) and residuals in a matplotlib window.
+        engine : {"lmfit", "analytic"}, optional
+            Fit with `fitDipoleImpl` (``lmfit``, finite-difference derivatives)
+            or `fitDipoleAnalyticImpl` (analytic derivatives).
 
         Returns
         -------
@@ -815,7 +1028,8 @@ class DipoleFitAlgorithm(object):
             `pipeBase.Struct` object containing the fit parameters and other information.
 
         result : `callable`
-            `lmfit.MinimizerResult` object for debugging and error estimation, etc.
+            `lmfit.MinimizerResult` object (or, if ``engine`` is "analytic", a
+            `pipeBase.Struct` with its main attributes) for debugging and error estimation, etc.
 
         Notes
         -----
@@ -823,7 +1037,8 @@ class DipoleFitAlgorithm(object):
 
         """
 
-        fitResult = self.fitDipoleImpl(
+        fitImpl = self.fitDipoleAnalyticImpl if engine == "analytic" else self.fitDipoleImpl
+        fitResult = fitImpl(
             source, tol=tol, rel_weight=rel_weight, fitBackground=fitBackground,
             maxSepInSigma=maxSepInSigma, separateNegParams=separateNegParams,
             bgGradientOrder=bgGradientOrder, verbose=verbose)
@@ -1102,7 +1317,7 @@ class DipoleFitPlugin(measBase.SingleFramePlugin):
                 maxSepInSigma=self.config.maxSeparation,
                 fitBackground=self.config.fitBackground,
                 separateNegParams=self.config.fitSeparateNegParams,
-                verbose=False, display=False)
+                verbose=False, display=False, engine=self.config.fitEngine)
         except pexExcept.LengthError:
             self.fail(measRecord, measBase.MeasurementError('edge failure', self.FAILURE_EDGE))
         except Exception:
@@ -20,16 +20,22 @@
 # see <https://www.lsstcorp.org/LegalNotices/>.
 #
 
+import os
+import tempfile
+
 import numpy as np
 
 import lsst.afw.image as afwImage
 import lsst.afw.geom as afwGeom
+import lsst.afw.table as afwTable
 import lsst.meas.algorithms as measAlg
 import lsst.afw.math as afwMath
 import lsst.pex.config as pexConfig
 import lsst.pipe.base as pipeBase
 import lsst.log
 
+from . import diffimLib
+from .diffimTools import ArrayCache
 from .imageMapReduce import (ImageMapReduceConfig, ImageMapReduceTask,
                              ImageMapper)
 
@@ -48,6 +54,136 @@ class DecorrelateALKernelConfig(pexConfig.Config):
         default=("INTRP", "EDGE", "DETECTED", "SAT", "CR", "BAD", "NO_DATA", "DETECTED_NEGATIVE")
     )
 
+    useSinglePrecision = pexConfig.Field(
+        dtype=bool,
+        doc="""Compute the decorrelation kernel and the corrected diffim PSF in float32/complex64
+               rather than float64/complex128. Their pixels then differ from the double-precision
+               ones by up to ~1e-6 of the kernel peak (a few float32 epsilons).""",
+        default=False
+    )
+
+    convolutionMethod = pexConfig.ChoiceField(
+        dtype=str,
+        doc="""Method of convolving the diffim with the decorrelation kernel""",
+        default="direct",
+        allowed={
+            "direct": "direct convolution by afwMath.convolve",
+            "fft": "FFT convolution of the image and variance (overlap-add in blocks of fftBlockSize), "
+                   "with the mask propagated by dilation with the kernel footprint",
+        }
+    )
+
+    fftBlockSize = pexConfig.Field(
+        dtype=int,
+        doc="""Size (pixels) of the blocks of the overlap-add FFT convolution, if convolutionMethod
+               is 'fft'; 0 convolves the whole image with one FFT""",
+        default=1024,
+        check=lambda x: x >= 0
+    )
+
+    kernelCacheSize = pexConfig.Field(
+        dtype=int,
+        doc="""Number of decorrelation kernels and corrected diffim PSFs kept in memory by the
+               DecorrelateALKernelTasks of a process, to reuse them when decorrelating with the same
+               matching kernel, PSF and variances (e.g. on reprocessing, or in cells sampling identical
+               kernels). The least recently used are evicted first; 0 keeps none in memory.""",
+        default=0,
+        check=lambda x: x >= 0
+    )
+
+    kernelCacheDir = pexConfig.Field(
+        dtype=str,
+        doc="""Directory in which to also save the decorrelation kernels and corrected diffim PSFs,
+               to reuse them across processes and runs; None saves none""",
+        default=None,
+        optional=True
+    )
+
+
+class _DecorrelationKernelCache(ArrayCache):
+    """Least-recently-used cache of decorrelation kernels and corrected PSFs,
+    optionally backed by a directory of files
+
+    Parameters
+    ----------
+    maxEntries : `int`
+        maximum number of entries held in memory
+    """
+    # Part of the keys, so that files saved by an older computation of the
+    # kernels are not reused; increment it whenever that changes
+    version = 1
+
+    def __init__(self, maxEntries=0):
+        ArrayCache.__init__(self, maxEntries=maxEntries)
+        self.nDiskHits = 0
+
+    @classmethod
+    def makeKey(cls, *arrays):
+        """Make a key from the cache version and the dimensions, types and
+        contents of ``arrays``
+        """
+        return "v%d-%s" % (cls.version, ArrayCache.makeKey(*arrays))
+
+    def get(self, key, compute, cacheDir=None):
+        """Return the arrays cached under ``key``, or else cache and return ``compute()``
+
+        Parameters
+        ----------
+        key : `str`
+            key of the arrays, usable as a file name
+        compute : callable
+            function computing the `tuple` of arrays to cache
+        cacheDir : `str`, optional
+            directory in which the arrays are also looked for and saved
+        """
+        value = self.lookup(key)
+        if value is not None:
+            return value
+
+        path = os.path.join(cacheDir, key + ".npz") if cacheDir is not None else None
+        if path is not None and os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    value = tuple(data["arr_%d" % i] for i in range(len(data.files)))
+            except (OSError, ValueError, KeyError):
+                value = None  # An unreadable file is recomputed and overwritten
+        with self._lock:
+            if value is None:
+                self.nMisses += 1
+            else:
+                self.nDiskHits += 1
+
+        if value is None:
+            value = tuple(compute())
+            if path is not None:
+                self._save(path, value)
+        self.insert(key, value)
+        return value
+
+    @staticmethod
+    def _save(path, value):
+        """Save the arrays ``value`` to ``path`` through a temporary file, so
+        that concurrent readers never see a partial file
+        """
+        cacheDir = os.path.dirname(path)
+        os.makedirs(cacheDir, exist_ok=True)
+        fd, tmpPath = tempfile.mkstemp(dir=cacheDir, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, *value)
+            os.replace(tmpPath, path)
+        except BaseException:
+            os.remove(tmpPath)
+            raise
+
+    def clear(self):
+        ArrayCache.clear(self)
+        with self._lock:
+            self.nDiskHits = 0
+
+
+_decorrelationKernelCache = _DecorrelationKernelCache()
+
 
 class DecorrelateALKernelTask(pipeBase.Task):
     """Decorrelate the effect of convolution by Alard-Lupton matching kernel in image difference
@@ -100,6 +236,18 @@ class DecorrelateALKernelTask(pipeBase.Task):
         self.statsControl.setNumIter(3)
         self.statsControl.setAndMask(afwImage.Mask.getPlaneBitMask(self.config.ignoreMaskPlanes))
 
+        self._kernelCache = None
+        if self.config.kernelCacheSize > 0 or self.config.kernelCacheDir is not None:
+            self._kernelCache = _decorrelationKernelCache
+            self._kernelCache.maxEntries = self.config.kernelCacheSize
+
+    @staticmethod
+    def clearKernelCache():
+        """Empty the in-memory decorrelation kernel cache shared by the
+        DecorrelateALKernelTasks of this process (see `DecorrelateALKernelConfig.kernelCacheSize`)
+        """
+        _decorrelationKernelCache.clear()
+
     def computeVarianceMean(self, exposure):
         statObj = afwMath.makeStatistics(exposure.getMaskedImage().getVariance(),
                                          exposure.getMaskedImage().getMask(),
@@ -206,13 +354,29 @@ class DecorrelateALKernelTask(pipeBase.Task):
             kimg2 = afwImage.ImageD(preConvKernel.getDimensions())
             preConvKernel.computeImage(kimg2, False)
             pck = kimg2.getArray()
-        corrKernel = DecorrelateALKernelTask._computeDecorrelationKernel(kimg.getArray(), svar, tvar,
-                                                                         pck)
-        correctedExposure, corrKern = DecorrelateALKernelTask._doConvolve(subtractedExposure, corrKernel)
-
-        # Compute the subtracted exposure's updated psf
+        dtype = np.float32 if self.config.useSinglePrecision else np.float64
         psf = subtractedExposure.getPsf().computeKernelImage(afwGeom.Point2D(xcen, ycen)).getArray()
-        psfc = DecorrelateALKernelTask.computeCorrectedDiffimPsf(corrKernel, psf, svar=svar, tvar=tvar)
+
+        def computeKernels():
+            corrKernel = DecorrelateALKernelTask._computeDecorrelationKernel(kimg.getArray(), svar, tvar,
+                                                                             pck, dtype=dtype)
+            # Compute the subtracted exposure's updated psf
+            psfc = DecorrelateALKernelTask.computeCorrectedDiffimPsf(corrKernel, psf, svar=svar, tvar=tvar,
+                                                                     dtype=dtype)
+            return corrKernel, psfc
+
+        if self._kernelCache is None:
+            corrKernel, psfc = computeKernels()
+        else:
+            # The evaluated matching kernel identifies the kernel parameters and position
+            key = "%s-%s" % (np.dtype(dtype).name, _DecorrelationKernelCache.makeKey(
+                kimg.getArray(), psf, np.array([svar, tvar], dtype=float),
+                np.zeros((0, 0)) if pck is None else pck))
+            corrKernel, psfc = self._kernelCache.get(key, computeKernels, self.config.kernelCacheDir)
+        correctedExposure, corrKern = DecorrelateALKernelTask._doConvolve(
+            subtractedExposure, corrKernel, method=self.config.convolutionMethod,
+            blockSize=self.config.fftBlockSize)
+
         psfcI = afwImage.ImageD(psfc.shape[0], psfc.shape[1])
         psfcI.getArray()[:, :] = psfc
         psfcK = afwMath.FixedKernel(psfcI)
@@ -225,7 +389,7 @@ class DecorrelateALKernelTask(pipeBase.Task):
         return pipeBase.Struct(correctedExposure=correctedExposure, correctionKernel=corrKern)
 
     @staticmethod
-    def _computeDecorrelationKernel(kappa, svar=0.04, tvar=0.04, preConvKernel=None):
+    def _computeDecorrelationKernel(kappa, svar=0.04, tvar=0.04, preConvKernel=None, dtype=np.float64):
         """Compute the Lupton decorrelation post-conv. kernel for decorrelating an
         image difference, based on the PSF-matching kernel.
 
@@ -239,6 +403,9 @@ class DecorrelateALKernelTask(pipeBase.Task):
             Average variance of template image used for PSF matching
         preConvKernel If not None, then pre-filtering was applied
             to science exposure, and this is the pre-convolution kernel.
+        dtype : `numpy.dtype`, optional
+            Floating point type of the computation and of the returned kernel:
+            `numpy.float32` computes in single precision.
 
         Returns
         -------
@@ -251,10 +418,12 @@ class DecorrelateALKernelTask(pipeBase.Task):
         """
         # Psf should not be <= 0, and messes up denominator; set the minimum value to MIN_KERNEL
         MIN_KERNEL = 1.0e-4
+        complexType = np.result_type(dtype, np.complex64)
+        svar, tvar = float(svar), float(tvar)  # Python floats do not promote float32 arrays
 
-        kappa = DecorrelateALKernelTask._fixOddKernel(kappa)
+        kappa = DecorrelateALKernelTask._fixOddKernel(np.array(kappa, dtype=dtype))
         if preConvKernel is not None:
-            mk = DecorrelateALKernelTask._fixOddKernel(preConvKernel)
+            mk = DecorrelateALKernelTask._fixOddKernel(np.array(preConvKernel, dtype=dtype))
             # Need to make them the same size
             if kappa.shape[0] < mk.shape[0]:
                 diff = (mk.shape[0] - kappa.shape[0]) // 2
@@ -263,19 +432,19 @@ class DecorrelateALKernelTask(pipeBase.Task):
                 diff = (kappa.shape[0] - mk.shape[0]) // 2
                 mk = np.pad(mk, (diff, diff), mode='constant')
 
-        kft = np.fft.fft2(kappa)
+        kft = np.fft.fft2(kappa).astype(complexType, copy=False)
         kft2 = np.conj(kft) * kft
         kft2[np.abs(kft2) < MIN_KERNEL] = MIN_KERNEL
         denom = svar + tvar * kft2
         if preConvKernel is not None:
-            mk = np.fft.fft2(mk)
+            mk = np.fft.fft2(mk).astype(complexType, copy=False)
             mk2 = np.conj(mk) * mk
             mk2[np.abs(mk2) < MIN_KERNEL] = MIN_KERNEL
             denom = svar * mk2 + tvar * kft2
         denom[np.abs(denom) < MIN_KERNEL] = MIN_KERNEL
         kft = np.sqrt((svar + tvar) / denom)
         pck = np.fft.ifft2(kft)
-        pck = np.fft.ifftshift(pck.real)
+        pck = np.fft.ifftshift(pck.real.astype(dtype, copy=False))
         fkernel = DecorrelateALKernelTask._fixEvenKernel(pck)
         if preConvKernel is not None:
             # This is not pretty but seems to be necessary as the preConvKernel term seems to lead
@@ -290,7 +459,7 @@ class DecorrelateALKernelTask(pipeBase.Task):
         return fkernel
 
     @staticmethod
-    def computeCorrectedDiffimPsf(kappa, psf, svar=0.04, tvar=0.04):
+    def computeCorrectedDiffimPsf(kappa, psf, svar=0.04, tvar=0.04, dtype=np.float64):
         """Compute the (decorrelated) difference image's new PSF.
         new_psf = psf(k) * sqrt((svar + tvar) / (svar + tvar * kappa_ft(k)**2))
 
@@ -304,12 +473,17 @@ class DecorrelateALKernelTask(pipeBase.Task):
             Average variance of science image used for PSF matching
         tvar : `float`, optional
             Average variance of template image used for PSF matching
+        dtype : `numpy.dtype`, optional
+            Floating point type of the computation and of the returned PSF:
+            `numpy.float32` computes in single precision.
 
         Returns
         -------
         pcf : `numpy.ndarray`
             a 2-d numpy.array containing the new PSF
         """
+        complexType = np.result_type(dtype, np.complex64)
+
         def post_conv_psf_ft2(psf, kernel, svar, tvar):
             # Pad psf or kernel symmetrically to make them the same size!
             # Note this assumes they are both square (width == height)
@@ -319,8 +493,8 @@ class DecorrelateALKernelTask(pipeBase.Task):
             elif psf.shape[0] > kernel.shape[0]:
                 diff = (psf.shape[0] - kernel.shape[0]) // 2
                 kernel = np.pad(kernel, (diff, diff), mode='constant')
-            psf_ft = np.fft.fft2(psf)
-            kft = np.fft.fft2(kernel)
+            psf_ft = np.fft.fft2(psf).astype(complexType, copy=False)
+            kft = np.fft.fft2(kernel).astype(complexType, copy=False)
             out = psf_ft * np.sqrt((svar + tvar) / (svar + tvar * kft**2))
             return out
 
@@ -329,10 +503,158 @@ class DecorrelateALKernelTask(pipeBase.Task):
             out = np.fft.ifft2(kft)
             return out
 
-        pcf = post_conv_psf(psf=psf, kernel=kappa, svar=svar, tvar=tvar)
-        pcf = pcf.real / pcf.real.sum()
+        pcf = post_conv_psf(psf=np.asarray(psf, dtype=dtype), kernel=np.asarray(kappa, dtype=dtype),
+                            svar=float(svar), tvar=float(tvar))
+        pcf = pcf.real.astype(dtype, copy=False)
+        pcf = pcf / pcf.sum()
         return pcf
 
+    @staticmethod
+    def _computeDecorrelationKernels(kappas, svars, tvars, preConvKernel=None, dtype=np.float64):
+        """Compute the decorrelation kernels of a stack of matching kernels in one pass
+
+        This is the vectorized equivalent of calling `_computeDecorrelationKernel`
+        for each matching kernel, for evaluating the decorrelation at many
+        positions (e.g. of a spatially-varying matching kernel).
+
+        Parameters
+        ----------
+        kappas : `numpy.ndarray`
+            A (N, ny, nx) stack of matching kernels derived from Alard & Lupton PSF matching
+        svars : `float` or `numpy.ndarray`
+            Average variance(s) of the science image around each kernel position
+        tvars : `float` or `numpy.ndarray`
+            Average variance(s) of the template image around each kernel position
+        preConvKernel : `numpy.ndarray`, optional
+            If not None, then pre-filtering was applied to the science
+            exposure, and this is the (single, 2-d) pre-convolution kernel.
+        dtype : `numpy.dtype`, optional
+            Floating point type of the computation and of the returned kernels:
+            `numpy.float32` computes in single precision.
+
+        Returns
+        -------
+        fkernels : `numpy.ndarray`
+            a (N, my, mx) stack of the correction kernels
+        """
+        MIN_KERNEL = 1.0e-4
+        complexType = np.result_type(dtype, np.complex64)
+        kappas = np.array(kappas, dtype=dtype, ndmin=3)
+        svars = np.asarray(svars, dtype=dtype).reshape(-1, 1, 1)
+        tvars = np.asarray(tvars, dtype=dtype).reshape(-1, 1, 1)
+
+        kappas = DecorrelateALKernelTask._fixOddKernels(kappas)
+        if preConvKernel is not None:
+            mk = DecorrelateALKernelTask._fixOddKernel(np.array(preConvKernel, dtype=dtype))
+            # Need to make them the same size
+            if kappas.shape[1] < mk.shape[0]:
+                diff = (mk.shape[0] - kappas.shape[1]) // 2
+                kappas = np.pad(kappas, ((0, 0), (diff, diff), (diff, diff)), mode='constant')
+            elif kappas.shape[1] > mk.shape[0]:
+                diff = (kappas.shape[1] - mk.shape[0]) // 2
+                mk = np.pad(mk, (diff, diff), mode='constant')
+
+        kft = np.fft.fft2(kappas).astype(complexType, copy=False)
+        kft2 = np.conj(kft) * kft
+        kft2[np.abs(kft2) < MIN_KERNEL] = MIN_KERNEL
+        if preConvKernel is not None:
+            mk = np.fft.fft2(mk).astype(complexType, copy=False)
+            mk2 = np.conj(mk) * mk
+            mk2[np.abs(mk2) < MIN_KERNEL] = MIN_KERNEL
+            denom = svars * mk2 + tvars * kft2
+        else:
+            denom = svars + tvars * kft2
+        denom[np.abs(denom) < MIN_KERNEL] = MIN_KERNEL
+        kft = np.sqrt((svars + tvars) / denom)
+        pck = np.fft.ifft2(kft)
+        pck = np.fft.ifftshift(pck.real.astype(dtype, copy=False), axes=(-2, -1))
+        fkernels = DecorrelateALKernelTask._fixEvenKernels(pck)
+        if preConvKernel is not None:
+            # As in _computeDecorrelationKernel, clip the kernels at minus their minima
+            clip = -np.min(fkernels, axis=(1, 2), keepdims=True)
+            fkernels = np.where(fkernels > clip, clip, fkernels)
+
+        return fkernels
+
+    @staticmethod
+    def computeCorrectedDiffimPsfs(kappas, psfs, svars, tvars, dtype=np.float64):
+        """Compute the (decorrelated) difference image's new PSFs at many positions in one pass
+
+        This is the vectorized equivalent of calling `computeCorrectedDiffimPsf`
+        for each kernel.
+
+        Parameters
+        ----------
+        kappas : `numpy.ndarray`
+            A (N, ny, nx) stack of kernels
+        psfs : `numpy.ndarray`
+            The uncorrected psf arrays of the science image (and also of the
+            diffim): a (N, my, mx) stack, or a single 2-d array for all kernels
+        svars : `float` or `numpy.ndarray`
+            Average variance(s) of the science image around each kernel position
+        tvars : `float` or `numpy.ndarray`
+            Average variance(s) of the template image around each kernel position
+        dtype : `numpy.dtype`, optional
+            Floating point type of the computation and of the returned PSFs:
+            `numpy.float32` computes in single precision.
+
+        Returns
+        -------
+        pcfs : `numpy.ndarray`
+            a (N, n, n) stack of the new PSFs
+        """
+        complexType = np.result_type(dtype, np.complex64)
+        kappas = np.array(kappas, dtype=dtype, ndmin=3)
+        psfs = np.array(psfs, dtype=dtype, ndmin=3)
+        svars = np.asarray(svars, dtype=dtype).reshape(-1, 1, 1)
+        tvars = np.asarray(tvars, dtype=dtype).reshape(-1, 1, 1)
+
+        # Pad psfs or kernels symmetrically to make them the same size!
+        # Note this assumes they are both square (width == height)
+        if psfs.shape[1] < kappas.shape[1]:
+            diff = (kappas.shape[1] - psfs.shape[1]) // 2
+            psfs = np.pad(psfs, ((0, 0), (diff, diff), (diff, diff)), mode='constant')
+        elif psfs.shape[1] > kappas.shape[1]:
+            diff = (psfs.shape[1] - kappas.shape[1]) // 2
+            kappas = np.pad(kappas, ((0, 0), (diff, diff), (diff, diff)), mode='constant')
+        psf_ft = np.fft.fft2(psfs).astype(complexType, copy=False)
+        kft = np.fft.fft2(kappas).astype(complexType, copy=False)
+        pcfs = np.fft.ifft2(psf_ft * np.sqrt((svars + tvars) / (svars + tvars * kft**2)))
+        pcfs = pcfs.real.astype(dtype, copy=False)
+        pcfs /= pcfs.sum(axis=(1, 2), keepdims=True)
+        return pcfs
+
+    @staticmethod
+    def _fixOddKernels(kernels):
+        """Make the dimensions of a (N, ny, nx) stack of kernels even for FFT,
+        as `_fixOddKernel` does for each kernel
+        """
+        out = kernels
+        padWidths = [(0, 0)] + [(n % 2, 0) for n in kernels.shape[1:]]
+        if any(before for before, _ in padWidths):
+            out = np.pad(out, padWidths, mode='constant')
+            # need to re-scale to same mean for FFT
+            out *= (np.mean(kernels, axis=(1, 2), keepdims=True) / np.mean(out, axis=(1, 2), keepdims=True))
+        return out
+
+    @staticmethod
+    def _fixEvenKernels(kernels):
+        """Center the peaks of a (N, ny, nx) stack of kernels and make their
+        dimensions odd, as `_fixEvenKernel` does for each kernel
+        """
+        nKernels, ny, nx = kernels.shape
+        maxloc = np.unravel_index(np.argmax(kernels.reshape(nKernels, -1), axis=1), (ny, nx))
+        # Roll each kernel so that its peak is at (ny//2, nx//2)
+        rows = (np.arange(ny)[np.newaxis, :] - (ny//2 - maxloc[0])[:, np.newaxis]) % ny
+        cols = (np.arange(nx)[np.newaxis, :] - (nx//2 - maxloc[1])[:, np.newaxis]) % nx
+        out = kernels[np.arange(nKernels)[:, np.newaxis, np.newaxis],
+                      rows[:, :, np.newaxis], cols[:, np.newaxis, :]]
+        # Make sure it is odd-dimensioned by trimming it (the peaks are now at the centers).
+        if (ny % 2) == 0:
+            out = out[:, :-1, :] if ny - ny//2 > ny//2 else out[:, 1:, :]
+            out = out[:, :, :-1] if nx - nx//2 > nx//2 else out[:, :, 1:]
+        return out
+
     @staticmethod
     def _fixOddKernel(kernel):
         """Take a kernel with odd dimensions and make them even for FFT
@@ -393,7 +715,7 @@ class DecorrelateALKernelTask(pipeBase.Task):
         return out
 
     @staticmethod
-    def _doConvolve(exposure, kernel):
+    def _doConvolve(exposure, kernel, method="direct", blockSize=0):
         """Convolve an Exposure with a decorrelation convolution kernel.
 
         Parameters
@@ -402,6 +724,11 @@ class DecorrelateALKernelTask(pipeBase.Task):
             Input exposure to be convolved.
         kernel : `numpy.array`
             Input 2-d numpy.array to convolve the image with
+        method : `str`, optional
+            "direct" to convolve with `lsst.afw.math.convolve`, or "fft" to
+            convolve with `_doConvolveFft` (see `DecorrelateALKernelConfig.convolutionMethod`)
+        blockSize : `int`, optional
+            Size of the overlap-add blocks if ``method`` is "fft"; 0 for a single block
 
         Returns
         -------
@@ -420,11 +747,95 @@ class DecorrelateALKernelTask(pipeBase.Task):
         kern.setCtrX(maxloc[0])
         kern.setCtrY(maxloc[1])
         outExp = exposure.clone()  # Do this to keep WCS, PSF, masks, etc.
+        if method == "fft":
+            DecorrelateALKernelTask._doConvolveFft(outExp.getMaskedImage(), exposure.getMaskedImage(),
+                                                   kernelImg.getArray(), (kern.getCtrY(), kern.getCtrX()),
+                                                   blockSize)
+            return outExp, kern
         convCntrl = afwMath.ConvolutionControl(False, True, 0)
         afwMath.convolve(outExp.getMaskedImage(), exposure.getMaskedImage(), kern, convCntrl)
 
         return outExp, kern
 
+    @staticmethod
+    def _doConvolveFft(outMaskedImage, maskedImage, kernel, center, blockSize=0):
+        """Convolve a MaskedImage with a kernel by FFTs, as `lsst.afw.math.convolve`
+        does directly (without normalizing the kernel, and copying the edge pixels)
+
+        The image is convolved with ``kernel`` and the variance with its
+        square, by overlap-add: each block of ``blockSize`` pixels of the
+        input is convolved by zero-padded FFTs, and the results summed into
+        the output. The mask is the bitwise OR of the input mask over the
+        footprint of ``kernel``, computed by separable dilation. As by
+        `lsst.afw.math.convolve`, the edge pixels, on which the kernel does
+        not fit, are copied from the input and flagged NO_DATA.
+
+        Parameters
+        ----------
+        outMaskedImage : `lsst.afw.image.MaskedImage`
+            MaskedImage receiving the convolved pixels, of the dimensions of ``maskedImage``
+        maskedImage : `lsst.afw.image.MaskedImage`
+            MaskedImage to convolve
+        kernel : `numpy.ndarray`
+            2-d kernel array (in afw orientation: indexed [y, x])
+        center : `tuple` of `int`
+            (y, x) indices of the center of ``kernel``
+        blockSize : `int`, optional
+            Size of the overlap-add blocks; 0 convolves the whole image at once
+        """
+        image = maskedImage.getImage().getArray()
+        variance = maskedImage.getVariance().getArray()
+        mask = maskedImage.getMask().getArray()
+        shape = image.shape
+        kShape = kernel.shape
+        # afwMath.convolve computes out(x, y) = sum_ij kernel(i, j) in(x + i - ctrX, y + j - ctrY),
+        # the full convolution of the input with the flipped kernel offset by:
+        offset = [k - 1 - c for k, c in zip(kShape, center)]
+
+        blockShape = [min(blockSize, n) if blockSize > 0 else n for n in shape]
+        fftShape = [diffimLib.nextFastFftSize(b + k - 1) for b, k in zip(blockShape, kShape)]
+        flipped = kernel[::-1, ::-1]
+        kernelHat = np.fft.rfft2(flipped, s=fftShape)
+        kernel2Hat = np.fft.rfft2(flipped**2, s=fftShape)
+
+        fullShape = [n + k - 1 for n, k in zip(shape, kShape)]
+        outImage = np.zeros(fullShape)
+        outVariance = np.zeros(fullShape)
+        for y0 in range(0, shape[0], blockShape[0]):
+            for x0 in range(0, shape[1], blockShape[1]):
+                block = (slice(y0, y0 + blockShape[0]), slice(x0, x0 + blockShape[1]))
+                ny, nx = image[block].shape
+                out = (slice(y0, y0 + ny + kShape[0] - 1), slice(x0, x0 + nx + kShape[1] - 1))
+                for arr, transform, result in ((image, kernelHat, outImage),
+                                               (variance, kernel2Hat, outVariance)):
+                    conv = np.fft.irfft2(np.fft.rfft2(arr[block], s=fftShape) * transform, s=fftShape)
+                    result[out] += conv[:ny + kShape[0] - 1, :nx + kShape[1] - 1]
+
+        # Pixels on which the kernel fits, which are not copied from the input
+        good = tuple(slice(c, n - (k - 1 - c)) for c, n, k in zip(center, shape, kShape))
+        crop = (slice(offset[0], offset[0] + shape[0]), slice(offset[1], offset[1] + shape[1]))
+        outMaskedImage.getImage().getArray()[good] = outImage[crop][good]
+        outMaskedImage.getVariance().getArray()[good] = outVariance[crop][good]
+
+        # OR the mask over the (non-zero) footprint of the kernel, one axis at a time
+        rows, cols = np.nonzero(kernel)
+        dilated = mask
+        for axis, lo, hi in ((0, rows.min() - center[0], rows.max() - center[0]),
+                             (1, cols.min() - center[1], cols.max() - center[1])):
+            result = np.zeros_like(mask)
+            for shift in range(lo, hi + 1):
+                src = [slice(None), slice(None)]
+                dst = [slice(None), slice(None)]
+                src[axis] = slice(max(shift, 0), shape[axis] + min(shift, 0))
+                dst[axis] = slice(max(-shift, 0), shape[axis] - max(shift, 0))
+                result[tuple(dst)] |= dilated[tuple(src)]
+            dilated = result
+        outMask = outMaskedImage.getMask()
+        outMask.getArray()[good] = dilated[good]
+        edge = np.ones(shape, dtype=bool)
+        edge[good] = False
+        outMask.getArray()[edge] |= outMask.getPlaneBitMask("NO_DATA")
+
 
 class DecorrelateALKernelMapper(DecorrelateALKernelTask, ImageMapper):
     """Task to be used as an ImageMapper for performing
@@ -545,6 +956,42 @@ class DecorrelateALKernelSpatialConfig(pexConfig.Config):
         default=("INTRP", "EDGE", "DETECTED", "SAT", "CR", "BAD", "NO_DATA", "DETECTED_NEGATIVE")
     )
 
+    spatialMethod = pexConfig.ChoiceField(
+        dtype=str,
+        doc="""Method of spatially-varying decorrelation""",
+        default="mapReduce",
+        allowed={
+            "mapReduce": "decorrelate each sub-image of a grid separately (see decorrelateMapReduceConfig)",
+            "interpolate": "compute the decorrelation kernel on a grid of positions, interpolate it "
+                           "spatially and convolve the whole diffim once with the interpolated kernel",
+        }
+    )
+
+    kernelGridStep = pexConfig.Field(
+        dtype=int,
+        doc="""Spacing (pixels) of the grid of positions at which the decorrelation kernel is computed,
+               and width of the regions whose variances it uses, if spatialMethod is 'interpolate'""",
+        default=256,
+        check=lambda x: x > 0
+    )
+
+    kernelSpatialOrder = pexConfig.Field(
+        dtype=int,
+        doc="""Order of the Chebyshev polynomials interpolating the coefficients of the decorrelation
+               kernel basis between grid positions, if spatialMethod is 'interpolate'. It is reduced
+               to one less than the number of grid positions along the shorter side if that is smaller.""",
+        default=2,
+        check=lambda x: x >= 0
+    )
+
+    nKernelBasis = pexConfig.Field(
+        dtype=int,
+        doc="""Number of principal components of the grid of decorrelation kernels used, with their
+               mean, as the basis of the interpolated kernel, if spatialMethod is 'interpolate'""",
+        default=4,
+        check=lambda x: x >= 0
+    )
+
     def setDefaults(self):
         self.decorrelateMapReduceConfig.gridStepX = self.decorrelateMapReduceConfig.gridStepY = 40
         self.decorrelateMapReduceConfig.cellSizeX = self.decorrelateMapReduceConfig.cellSizeY = 41
@@ -570,7 +1017,10 @@ class DecorrelateALKernelSpatialTask(pipeBase.Task):
     subExposures on a grid, and performs the `run` method of @ref
     DecorrelateALKernelTask on each subExposure. This enables it to
     account for spatially-varying PSFs and noise in the exposures when
-    performing the decorrelation.
+    performing the decorrelation. Alternatively, if `spatialMethod` is
+    'interpolate', the decorrelation kernel is computed on a coarse grid
+    and interpolated across the exposure, which is then convolved once
+    with the resulting spatially-varying kernel.
 
     This task has no standalone example, however it is applied as a
     subtask of pipe.tasks.imageDifference.ImageDifferenceTask.
@@ -658,7 +1108,16 @@ class DecorrelateALKernelSpatialTask(pipeBase.Task):
 
         var = self.computeVarianceMean(subtractedExposure)
 
-        if spatiallyVarying:
+        if spatiallyVarying and self.config.spatialMethod == "interpolate":
+            self.log.info("Variance (science, template): (%f, %f)", svar, tvar)
+            self.log.info("Variance (uncorrected diffim): %f", var)
+            results = self._runInterpolated(scienceExposure, templateExposure, subtractedExposure,
+                                            psfMatchingKernel, preConvKernel, svar, tvar)
+
+            var = self.computeVarianceMean(results.correctedExposure)
+            self.log.info("Variance (corrected diffim): %f", var)
+
+        elif spatiallyVarying:
             self.log.info("Variance (science, template): (%f, %f)", svar, tvar)
             self.log.info("Variance (uncorrected diffim): %f", var)
             config = self.config.decorrelateMapReduceConfig
@@ -683,3 +1142,216 @@ class DecorrelateALKernelSpatialTask(pipeBase.Task):
                                subtractedExposure, psfMatchingKernel, preConvKernel=preConvKernel)
 
         return results
+
+    def _getKernelGrid(self, bbox):
+        """Return the x and y positions of the grid at which the decorrelation
+        kernel is computed, which spans `bbox` at intervals of at most
+        ``config.kernelGridStep``
+        """
+        step = self.config.kernelGridStep
+
+        def positions(begin, end):
+            nPos = max(2, int(np.ceil((end - 1 - begin)/step)) + 1)
+            return np.linspace(begin, end - 1, nPos)
+
+        return (positions(bbox.getBeginX(), bbox.getEndX()),
+                positions(bbox.getBeginY(), bbox.getEndY()))
+
+    def makeSpatialDecorrelationKernel(self, scienceExposure, templateExposure, psfMatchingKernel,
+                                       preConvKernel=None, svar=None, tvar=None):
+        """Compute the decorrelation kernel on a grid of positions and
+        interpolate it across the exposure
+
+        At each position of the grid, the decorrelation kernel is computed
+        from the PSF matching kernel there and the variances of the science
+        and template exposures in the surrounding ``config.kernelGridStep``
+        square. The grid of kernels is decomposed into its mean and its first
+        ``config.nKernelBasis`` principal components, and the coefficients of
+        each component are interpolated across the exposure by a least-squares
+        fit of Chebyshev polynomials of order ``config.kernelSpatialOrder``.
+
+        Parameters
+        ----------
+        scienceExposure : `lsst.afw.image.Exposure`
+           the science Exposure used for PSF matching
+        templateExposure : `lsst.afw.image.Exposure`
+           the template Exposure used for PSF matching
+        psfMatchingKernel :
+           an (optionally spatially-varying) PSF matching kernel produced
+           by `ip_diffim.ImagePsfMatchTask.subtractExposures()`
+        preConvKernel : `lsst.meas.algorithms.Psf`
+           if not none, the scienceExposure has been pre-filtered with this kernel.
+        svar, tvar : `float`, optional
+           variances of the science and template exposures, used where the
+           variances around a grid position cannot be measured (e.g. are all masked)
+
+        Returns
+        -------
+        kernel : `lsst.afw.math.LinearCombinationKernel`
+            the spatially-varying decorrelation kernel
+        """
+        grid = self._computeGridDecorrelationKernels(scienceExposure, templateExposure, psfMatchingKernel,
+                                                     preConvKernel=preConvKernel, svar=svar, tvar=tvar)
+        return self._interpolateDecorrelationKernels(grid, scienceExposure.getBBox())
+
+    def _computeGridDecorrelationKernels(self, scienceExposure, templateExposure, psfMatchingKernel,
+                                         preConvKernel=None, svar=None, tvar=None):
+        """Compute the decorrelation kernel at each position of the grid of
+        `_getKernelGrid` (see `makeSpatialDecorrelationKernel`)
+
+        Returns
+        -------
+        grid : `lsst.pipe.base.Struct`
+            a structure containing:
+
+            - ``xPositions``, ``yPositions`` : the grid positions along each axis
+            - ``positions`` : the (x, y) grid positions, x varying fastest
+            - ``kernels`` : the (N, ny, nx) stack of the decorrelation kernels
+            - ``svars``, ``tvars`` : the local variances of the science and
+              template exposures at each position
+            - ``dtype`` : floating point type of the computation
+        """
+        bbox = scienceExposure.getBBox()
+        xPositions, yPositions = self._getKernelGrid(bbox)
+        decorrelateConfig = self.config.decorrelateConfig
+        dtype = np.float32 if decorrelateConfig.useSinglePrecision else np.float64
+
+        pck = None
+        if preConvKernel is not None:
+            kimg2 = afwImage.ImageD(preConvKernel.getDimensions())
+            preConvKernel.computeImage(kimg2, False)
+            pck = kimg2.getArray()
+
+        def localVariance(exposure, x, y, default):
+            halfStep = self.config.kernelGridStep//2
+            box = afwGeom.Box2I(afwGeom.Point2I(int(x) - halfStep, int(y) - halfStep),
+                                afwGeom.Extent2I(2*halfStep + 1, 2*halfStep + 1))
+            box.clip(bbox)
+            var = self.computeVarianceMean(exposure.Factory(exposure, box))
+            return default if np.isnan(var) else var
+
+        kimg = afwImage.ImageD(psfMatchingKernel.getDimensions())
+        kappas = []
+        svars = []
+        tvars = []
+        positions = []
+        for y in yPositions:
+            for x in xPositions:
+                psfMatchingKernel.computeImage(kimg, True, x, y)
+                kappas.append(kimg.getArray().copy())
+                svars.append(localVariance(scienceExposure, x, y, svar))
+                tvars.append(localVariance(templateExposure, x, y, tvar))
+                positions.append((x, y))
+        kernels = DecorrelateALKernelTask._computeDecorrelationKernels(np.array(kappas), svars, tvars,
+                                                                       pck, dtype=dtype)
+        return pipeBase.Struct(xPositions=xPositions, yPositions=yPositions, positions=positions,
+                               kernels=kernels, svars=np.array(svars), tvars=np.array(tvars), dtype=dtype)
+
+    def _interpolateDecorrelationKernels(self, grid, bbox):
+        """Interpolate the output of `_computeGridDecorrelationKernels` across
+        ``bbox`` (see `makeSpatialDecorrelationKernel`)
+        """
+        kernelShape = grid.kernels.shape[1:]
+        kernels = grid.kernels.reshape(len(grid.kernels), -1).astype(np.float64)
+
+        # Basis: the mean kernel and the principal components of the deviations from it
+        meanKernel = kernels.mean(axis=0)
+        u, sv, vt = np.linalg.svd(kernels - meanKernel, full_matrices=False)
+        nBasis = min(self.config.nKernelBasis, np.count_nonzero(sv > sv[0]*1e-8) if sv.size else 0)
+        basisArrays = [meanKernel] + [vt[i] for i in range(nBasis)]
+        coeffs = np.column_stack([np.ones(len(kernels))] + [u[:, i]*sv[i] for i in range(nBasis)])
+
+        order = min(self.config.kernelSpatialOrder, len(grid.xPositions) - 1, len(grid.yPositions) - 1)
+        spatialFunction = afwMath.Chebyshev1Function2D(order, afwGeom.Box2D(bbox))
+        nParams = spatialFunction.getNParameters()
+        design = np.empty((len(grid.positions), nParams))
+        for j in range(nParams):
+            params = np.zeros(nParams)
+            params[j] = 1.
+            spatialFunction.setParameters(list(params))
+            design[:, j] = [spatialFunction(x, y) for x, y in grid.positions]
+        spatialParams = np.linalg.lstsq(design, coeffs, rcond=None)[0]
+
+        basisList = []
+        for arr in basisArrays:
+            basisImg = afwImage.ImageD(kernelShape[1], kernelShape[0])
+            basisImg.getArray()[:, :] = arr.reshape(kernelShape)
+            basisList.append(afwMath.FixedKernel(basisImg))
+        spatialKernel = afwMath.LinearCombinationKernel(basisList, spatialFunction)
+        spatialKernel.setSpatialParameters([list(p) for p in spatialParams.T])
+        return spatialKernel
+
+    def _makeGridPsf(self, subtractedExposure, grid):
+        """Return the PSF of the decorrelated diffim: a `CoaddPsf` of the PSF
+        of ``subtractedExposure`` corrected with the decorrelation kernel at
+        each position of ``grid``, the output of
+        `_computeGridDecorrelationKernels`
+
+        The PSF at each grid position is valid over the cell of the pixels
+        closest to it, as the PSFs of the sub-exposures of the 'mapReduce'
+        spatial method are over their cells.
+        """
+        bbox = subtractedExposure.getBBox()
+        psf = subtractedExposure.getPsf()
+        psfs = [psf.computeKernelImage(afwGeom.Point2D(x, y)).getArray() for x, y in grid.positions]
+        size = max(max(arr.shape) for arr in psfs)
+        psfs = np.array([np.pad(arr, [((size - n)//2, size - n - (size - n)//2) for n in arr.shape],
+                                mode='constant') for arr in psfs])
+        psfcs = DecorrelateALKernelTask.computeCorrectedDiffimPsfs(grid.kernels, psfs, grid.svars,
+                                                                   grid.tvars, dtype=grid.dtype)
+
+        def cellEdges(positions, begin, end):
+            """Return the bounds of the pixels closest to each position"""
+            midpoints = np.floor((positions[1:] + positions[:-1])/2.).astype(int) + 1
+            return np.concatenate([[begin], midpoints, [end]])
+
+        xEdges = cellEdges(grid.xPositions, bbox.getBeginX(), bbox.getEndX())
+        yEdges = cellEdges(grid.yPositions, bbox.getBeginY(), bbox.getEndY())
+
+        schema = afwTable.ExposureTable.makeMinimalSchema()
+        schema.addField("weight", type="D", doc="Coadd weight")
+        catalog = afwTable.ExposureCatalog(schema)
+        wcs = subtractedExposure.getWcs()
+        for i, ((x, y), psfc) in enumerate(zip(grid.positions, psfcs)):
+            ix, iy = i % len(grid.xPositions), i // len(grid.xPositions)
+            psfcI = afwImage.ImageD(psfc.shape[1], psfc.shape[0])
+            psfcI.getArray()[:, :] = psfc
+            record = catalog.getTable().makeRecord()
+            record.setPsf(measAlg.KernelPsf(afwMath.FixedKernel(psfcI), afwGeom.Point2D(x, y)))
+            record.setWcs(wcs)
+            record.setBBox(afwGeom.Box2I(afwGeom.Point2I(int(xEdges[ix]), int(yEdges[iy])),
+                                         afwGeom.Point2I(int(xEdges[ix + 1]) - 1, int(yEdges[iy + 1]) - 1)))
+            record['weight'] = 1.0
+            record['id'] = i
+            catalog.append(record)
+        return measAlg.CoaddPsf(catalog, wcs, 'weight')
+
+    def _runInterpolated(self, scienceExposure, templateExposure, subtractedExposure, psfMatchingKernel,
+                         preConvKernel, svar, tvar):
+        """Decorrelate `subtractedExposure` with a single convolution by the
+        spatially-varying kernel of `makeSpatialDecorrelationKernel`
+
+        The parameters are those of `run`, plus the variances of the
+        science and template exposures, ``svar`` and ``tvar``.
+
+        Returns
+        -------
+        results : `lsst.pipe.base.Struct`
+            a structure containing:
+
+            - ``correctedExposure`` : the decorrelated diffim, whose PSF is
+              that of `_makeGridPsf`
+            - ``correctionKernel`` : the spatially-varying decorrelation kernel
+        """
+        grid = self._computeGridDecorrelationKernels(scienceExposure, templateExposure, psfMatchingKernel,
+                                                     preConvKernel=preConvKernel, svar=svar, tvar=tvar)
+        kernel = self._interpolateDecorrelationKernels(grid, scienceExposure.getBBox())
+        correctedExposure = subtractedExposure.clone()  # Do this to keep WCS, PSF, masks, etc.
+        convCntrl = afwMath.ConvolutionControl(False, True)
+        afwMath.convolve(correctedExposure.getMaskedImage(), subtractedExposure.getMaskedImage(),
+                         kernel, convCntrl)
+        # Make sure masks of input image are propagated to diffim
+        correctedExposure.getMaskedImage().getMask()[:, :] = subtractedExposure.getMaskedImage().getMask()
+        correctedExposure.setPsf(self._makeGridPsf(subtractedExposure, grid))
+
+        return pipeBase.Struct(correctedExposure=correctedExposure, correctionKernel=kernel)
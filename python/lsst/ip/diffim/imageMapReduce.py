@@ -22,6 +22,11 @@
 
 import numpy as np
 import abc
+import collections
+import itertools
+import multiprocessing
+import multiprocessing.pool
+import os
 
 import lsst.afw.image as afwImage
 import lsst.afw.geom as afwGeom
@@ -29,6 +34,7 @@ import lsst.afw.table as afwTable
 import lsst.meas.algorithms as measAlg
 import lsst.pex.config as pexConfig
 import lsst.pipe.base as pipeBase
+from . import diffimLib
 
 __all__ = ("ImageMapReduceTask", "ImageMapReduceConfig",
            "ImageMapper", "ImageMapperConfig",
@@ -42,8 +48,8 @@ exposure, or return summary results for each sub-exposure.
 
 This provides a framework for arbitrary mapper-reducer
 operations on an exposure by implementing simple operations in
-subTasks. It currently is not parallelized, although it could be in
-the future. It does enable operations such as spatially-mapped
+subTasks. The sub-exposures may be processed serially or concurrently
+by a pool of threads or processes. It does enable operations such as spatially-mapped
 processing on a grid across an image, processing regions surrounding
 centroids (such as for PSF processing), etc.
 
@@ -165,11 +171,23 @@ class ImageReducerConfig(pexConfig.Config):
                        into correct location in new exposure""",
             "average": """same as copy, but also average pixels from overlapped regions
                        (NaNs ignored)""",
+            "blend": """same as average, but weight the pixels of each subimage by a
+                       cosine taper falling off towards its edges (see `blendTaperFraction`),
+                       so that overlapping subimages blend smoothly rather than leaving
+                       seams at the edges of the overlaps (NaNs ignored)""",
             "coaddPsf": """Instead of constructing an Exposure, take a list of returned
                        PSFs and use CoaddPsf to construct a single PSF that covers the
                        entire input exposure""",
         }
     )
+    blendTaperFraction = pexConfig.Field(
+        dtype=float,
+        doc="""For reduceOperation='blend', width of the taper on each side of a subimage,
+               as a fraction of its size. Edges of subimages lying on the edge of the
+               exposure are not tapered.""",
+        default=0.5,
+        check=lambda x: 0. < x <= 0.5
+    )
     badMaskPlanes = pexConfig.ListField(
         dtype=str,
         doc="""Mask planes to set for invalid pixels""",
@@ -203,8 +221,11 @@ class ImageReducer(pipeBase.Task):
 
         Parameters
         ----------
-        mapperResults : `list`
-            list of `lsst.pipe.base.Struct` returned by `ImageMapper.run`.
+        mapperResults : `list` or iterator
+            `lsst.pipe.base.Struct`s returned by `ImageMapper.run`. They are
+            iterated over only once, and each is folded into the resulting
+            exposure and then dropped, so this may be an iterator yielding
+            the results as the mapper produces them.
         exposure : `lsst.afw.image.Exposure`
             the original exposure which is cloned to use as the
             basis for the resulting exposure (if
@@ -222,7 +243,8 @@ class ImageReducer(pipeBase.Task):
         Notes
         -----
         1. This currently correctly handles overlapping sub-exposures.
-           For overlapping sub-exposures, use `config.reduceOperation='average'`.
+           For overlapping sub-exposures, use `config.reduceOperation='average'`
+           or, to avoid seams at the edges of the overlaps, 'blend'.
         2. This correctly handles varying PSFs, constructing the resulting
            exposure's PSF via CoaddPsf (DM-9629).
 
@@ -230,12 +252,13 @@ class ImageReducer(pipeBase.Task):
 
         1. To be done: correct handling of masks (nearly there)
         2. This logic currently makes *two* copies of the original exposure
-           (one here and one in `mapper.run()`). Possibly of concern
-           for large images on memory-constrained systems.
+           (one here and one in `mapper.run()`), unless `mapperResults`
+           is an iterator (see `ImageMapReduceConfig.streamReduce`).
+           Possibly of concern for large images on memory-constrained systems.
         """
         # No-op; simply pass mapperResults directly to ImageMapReduceTask.run
         if self.config.reduceOperation == 'none':
-            return pipeBase.Struct(result=mapperResults)
+            return pipeBase.Struct(result=list(mapperResults))
 
         if self.config.reduceOperation == 'coaddPsf':
             # Each element of `mapperResults` should contain 'psf' and 'bbox'
@@ -255,13 +278,22 @@ class ImageReducer(pipeBase.Task):
             newMI.getVariance()[:, :] = 0.
             if reduceOp == 'average':  # make an array to keep track of weights
                 weights = afwImage.ImageI(newMI.getBBox())
+            elif reduceOp == 'blend':
+                weights = afwImage.ImageD(newMI.getBBox())
 
+        # Only the Psf and bounding box of each result is kept, for the CoaddPsf
+        psfResults = []
+        wcsref = exposure.getWcs()
         for item in mapperResults:
             item = item.subExposure  # Expected named value in the pipeBase.Struct
             if not (isinstance(item, afwImage.ExposureF) or isinstance(item, afwImage.ExposureI) or
                     isinstance(item, afwImage.ExposureU) or isinstance(item, afwImage.ExposureD)):
                 raise TypeError("""Expecting an Exposure type, got %s.
                                    Consider using `reduceOperation="none".""" % str(type(item)))
+            if reduceOp in ('sum', 'average', 'blend'):
+                if item.getWcs() != wcsref:
+                    raise ValueError('Wcs of subExposure is different from exposure')
+                psfResults.append(pipeBase.Struct(psf=item.getPsf(), bbox=item.getBBox()))
             subExp = newExp.Factory(newExp, item.getBBox())
             subMI = subExp.getMaskedImage()
             patchMI = item.getMaskedImage()
@@ -281,6 +313,14 @@ class ImageReducer(pipeBase.Task):
                     wtsView = afwImage.ImageI(weights, item.getBBox())
                     wtsView.getArray()[isValid] += 1
 
+            if reduceOp == 'blend':
+                wts = self._getBlendWeights(item.getBBox(), exposure.getBBox())[isValid]
+                subMI.getImage().getArray()[isValid] += wts * patchMI.getImage().getArray()[isValid]
+                subMI.getVariance().getArray()[isValid] += wts * patchMI.getVariance().getArray()[isValid]
+                subMI.getMask().getArray()[:, :] |= patchMI.getMask().getArray()
+                wtsView = afwImage.ImageD(weights, item.getBBox())
+                wtsView.getArray()[isValid] += wts
+
         # New mask plane - for debugging map-reduced images
         mask = newMI.getMask()
         for m in self.config.badMaskPlanes:
@@ -292,15 +332,16 @@ class ImageReducer(pipeBase.Task):
             # set mask to INVALID for pixels where produced exposure is NaN
             mask.getArray()[isNan[0], isNan[1]] |= bad
 
-        if reduceOp == 'average':
+        if reduceOp == 'average' or reduceOp == 'blend':
             wts = weights.getArray().astype(np.float)
-            self.log.info('AVERAGE: Maximum overlap: %f', np.nanmax(wts))
-            self.log.info('AVERAGE: Average overlap: %f', np.nanmean(wts))
-            self.log.info('AVERAGE: Minimum overlap: %f', np.nanmin(wts))
+            label = reduceOp.upper()
+            self.log.info('%s: Maximum overlap: %f', label, np.nanmax(wts))
+            self.log.info('%s: Average overlap: %f', label, np.nanmean(wts))
+            self.log.info('%s: Minimum overlap: %f', label, np.nanmin(wts))
             wtsZero = np.equal(wts, 0.)
             wtsZeroInds = np.where(wtsZero)
             wtsZeroSum = len(wtsZeroInds[0])
-            self.log.info('AVERAGE: Number of zero pixels: %f (%f%%)', wtsZeroSum,
+            self.log.info('%s: Number of zero pixels: %f (%f%%)', label, wtsZeroSum,
                           wtsZeroSum * 100. / wtsZero.size)
             notWtsZero = ~wtsZero
             tmp = newMI.getImage().getArray()
@@ -315,12 +356,50 @@ class ImageReducer(pipeBase.Task):
                 mask.getArray()[wtsZeroInds] |= bad
 
         # Not sure how to construct a PSF when reduceOp=='copy'...
-        if reduceOp == 'sum' or reduceOp == 'average':
-            psf = self._constructPsf(mapperResults, exposure)
+        if reduceOp in ('sum', 'average', 'blend'):
+            psf = self._constructPsf(psfResults, exposure)
             newExp.setPsf(psf)
 
         return pipeBase.Struct(exposure=newExp)
 
+    def _getBlendWeights(self, bbox, fullBBox):
+        """Compute the weights of the pixels of a sub-exposure for reduceOperation='blend'
+
+        The weight is the product of a taper in x and one in y. Each rises
+        as sin^2 from (nearly) zero at an edge of the sub-exposure to one at
+        `blendTaperFraction` of its size from that edge; edges on the edge
+        of `fullBBox` are not tapered. The weights are positive, so that
+        pixels covered by a single sub-exposure keep their values.
+
+        Parameters
+        ----------
+        bbox : `lsst.afw.geom.Box2I`
+            bounding box of the sub-exposure
+        fullBBox : `lsst.afw.geom.Box2I`
+            bounding box of the original exposure
+
+        Returns
+        -------
+        weights : `numpy.ndarray`
+            the weights, of the shape of the sub-exposure arrays
+        """
+        def taper(n, taperLow, taperHigh):
+            width = max(self.config.blendTaperFraction * n, 1.)
+            dist = np.arange(n, dtype=float) + 0.5
+            ramp = np.sin(0.5 * np.pi * np.minimum(dist / width, 1.))**2
+            wts = np.ones(n)
+            if taperLow:
+                wts *= ramp
+            if taperHigh:
+                wts *= ramp[::-1]
+            return wts
+
+        wtsX = taper(bbox.getWidth(), bbox.getMinX() > fullBBox.getMinX(),
+                     bbox.getMaxX() < fullBBox.getMaxX())
+        wtsY = taper(bbox.getHeight(), bbox.getMinY() > fullBBox.getMinY(),
+                     bbox.getMaxY() < fullBBox.getMaxY())
+        return np.outer(wtsY, wtsX)
+
     def _constructPsf(self, mapperResults, exposure):
         """Construct a CoaddPsf based on PSFs from individual subExposures
 
@@ -452,6 +531,15 @@ class ImageMapReduceConfig(pexConfig.Config):
         check=lambda x: x > 0.
     )
 
+    fastFftBorders = pexConfig.Field(
+        dtype=bool,
+        doc="""Grow borderSizeX/Y (after any scaling by the PSF FWHM) just enough that the
+               expanded sub-exposures have dimensions with no prime factors other than 2, 3
+               and 5, for which FFTs (e.g. in `ZogyMapper`) are fast. Sub-exposures clipped
+               by the edges of the exposure are not adjusted.""",
+        default=False
+    )
+
     adjustGridOption = pexConfig.ChoiceField(
         dtype=str,
         doc="""Whether and how to adjust grid to fit evenly within, and cover entire
@@ -483,6 +571,306 @@ class ImageMapReduceConfig(pexConfig.Config):
         default=("INTRP", "EDGE", "DETECTED", "SAT", "CR", "BAD", "NO_DATA", "DETECTED_NEGATIVE")
     )
 
+    executor = pexConfig.ChoiceField(
+        dtype=str,
+        doc="""How to dispatch the `mapper.run` calls on the sub-exposures. The results
+               are returned in grid order whichever executor is used.""",
+        default="serial",
+        allowed={
+            "serial": "run the mapper on one sub-exposure after the other",
+            "thread": "run the mapper concurrently in a pool of threads",
+            "process": """run the mapper concurrently in a pool of processes; the mapper
+                          task is re-created from its config in each process, so the
+                          sub-exposures, `run` keyword arguments and results must be picklable"""
+        }
+    )
+
+    nWorkers = pexConfig.Field(
+        dtype=int,
+        doc="""Number of threads or processes used by the "thread" and "process" executors;
+               0 uses one per CPU.""",
+        default=0,
+        check=lambda x: x >= 0
+    )
+
+    useSharedMemory = pexConfig.Field(
+        dtype=bool,
+        doc="""With the "process" executor, place the pixels of the exposure (and of any
+               exposure passed to `mapper.run`) in shared memory once, and have the workers
+               build their sub-exposures as views of it and write the returned `subExposure`
+               into a shared output buffer of two cells per worker, which are copied out as
+               they are collected. Only the bounding boxes and small metadata (Psf, Wcs, ...)
+               are pickled. Otherwise every sub-exposure and result is pickled.""",
+        default=True
+    )
+
+    streamReduce = pexConfig.Field(
+        dtype=bool,
+        doc="""Pass the reducer an iterator over the mapper results rather than a list, so
+               that each result is folded into the output exposure as soon as it is produced
+               and then dropped. Peak memory is then one output exposure plus the cells in
+               flight (two per worker with the "thread" and "process" executors), rather than
+               the results of all cells. The reducer must iterate over
+               `mapperResults` only once, as `ImageReducer.run` does. The results are then
+               yielded in the order the cells are dispatched (see `scheduleByCost`).""",
+        default=False
+    )
+
+    skipNoDataCells = pexConfig.Field(
+        dtype=bool,
+        doc="""Do not run the mapper on cells whose sub-exposure is entirely masked with
+               `noDataMaskPlanes`. With `reducer.reduceOperation='none'` the result
+               holds `None` in place of these cells, so that it stays aligned with the
+               grid cells (unless `streamReduce`); other reductions omit them, so the
+               `CoaddPsf` of the 'average' and 'coaddPsf' reductions has no PSF there.""",
+        default=False
+    )
+
+    noDataMaskPlanes = pexConfig.ListField(
+        dtype=str,
+        doc="""Mask planes of pixels without data, for `skipNoDataCells` and the cell cost estimate""",
+        default=("NO_DATA",)
+    )
+
+    scheduleByCost = pexConfig.Field(
+        dtype=bool,
+        doc="""With the "thread" and "process" executors, dispatch the cells in order of
+               decreasing estimated cost, so that the most expensive cells do not end up
+               running alone at the end. The cost is estimated from the FFT-friendly size of
+               the expanded sub-exposure and the fraction of its sub-exposure with data.""",
+        default=True
+    )
+
+
+def _fastBorderSize(cellSize, borderSize):
+    """Return the smallest border size >= ``borderSize`` for which a cell of
+    size ``cellSize`` with a border on each side has a fast FFT length
+    (see `lsst.ip.diffim.nextFastFftSize`)
+    """
+    cellSize = int(np.rint(cellSize))
+    size = diffimLib.nextFastFftSize(cellSize + 2*int(np.ceil(borderSize)))
+    while (size - cellSize) % 2 == 1:
+        size = diffimLib.nextFastFftSize(size + 1)
+    return (size - cellSize)//2
+
+
+def _makeSharedArray(array):
+    """Copy ``array`` into a new shared memory buffer
+
+    Returns
+    -------
+    a `tuple` of the buffer, shape and dtype, from which `_viewSharedArray`
+    makes a `numpy.ndarray` view of the buffer.
+    """
+    buf = multiprocessing.RawArray('b', max(array.nbytes, 1))
+    shared = (buf, array.shape, array.dtype)
+    _viewSharedArray(shared)[:] = array
+    return shared
+
+
+def _viewSharedArray(shared, begin=0, end=None, shape=None):
+    """View (a flat slice of) a buffer made by `_makeSharedArray`
+    """
+    buf, fullShape, dtype = shared
+    arr = np.frombuffer(buf, dtype=dtype)[:int(np.prod(fullShape))]
+    return arr[begin:end].reshape(fullShape if shape is None else shape)
+
+
+def _makeExposureView(info, planeTypes, arrays):
+    """Make an Exposure whose pixels are views of ``arrays``
+
+    Parameters
+    ----------
+    info : `lsst.afw.image.Exposure`
+        exposure whose metadata (Psf, Wcs, ...) and xy0 are used; only
+        its pixels are replaced
+    planeTypes : `list` of `type`
+        classes of the image, mask and variance planes
+    arrays : `list` of `numpy.ndarray`
+        pixels of the image, mask and variance planes
+    """
+    planes = [planeType(arr, deep=False, xy0=info.getXY0()) for planeType, arr in zip(planeTypes, arrays)]
+    info.setMaskedImage(afwImage.makeMaskedImage(*planes))
+    return info
+
+
+def _getPlanes(exposure):
+    mi = exposure.getMaskedImage()
+    return [mi.getImage(), mi.getMask(), mi.getVariance()]
+
+
+def _getInfoStub(exposure):
+    """Return a one pixel deep copy of ``exposure``, which carries its metadata
+    but is cheap to pickle
+    """
+    bbox = afwGeom.Box2I(exposure.getXY0(), afwGeom.Extent2I(1, 1))
+    return exposure.Factory(exposure, bbox, afwImage.PARENT, True)
+
+
+class _SharedExposure:
+    """The pixels of an Exposure in shared memory
+
+    May only be sent to the workers of a process pool on their creation
+    (e.g. in the ``initargs`` of `multiprocessing.Pool`), where
+    `makeExposure` rebuilds the exposure without copying its pixels.
+
+    Parameters
+    ----------
+    exposure : `lsst.afw.image.Exposure`
+        exposure to share
+    """
+    def __init__(self, exposure):
+        planes = _getPlanes(exposure)
+        self.planeTypes = [type(plane) for plane in planes]
+        self.arrays = [_makeSharedArray(plane.getArray()) for plane in planes]
+        self.info = _getInfoStub(exposure)
+
+    def makeExposure(self):
+        return _makeExposureView(self.info, self.planeTypes,
+                                 [_viewSharedArray(arr) for arr in self.arrays])
+
+
+class _SharedSubExposureHandle:
+    """Stands for a mapper `subExposure` result stored in `_SharedResults`
+    """
+    def __init__(self, slot, shape, info):
+        self.slot = slot
+        self.shape = shape
+        self.info = info
+
+
+class _SharedResults:
+    """Shared memory output buffer for the `subExposure` returned by the mapper
+    for the cells in flight
+
+    The buffer holds a fixed number of slots, each sized for the largest
+    sub-exposure. The parent process assigns a free slot to each cell it
+    dispatches; the worker processing the cell copies the pixels of the
+    returned `subExposure` into that slot, and the parent copies them back
+    out into an Exposure, after which the slot may be assigned to another
+    cell.
+
+    Parameters
+    ----------
+    boxes : `list` of `lsst.afw.geom.Box2I`
+        bounding boxes of the sub-exposures
+    exposure : `lsst.afw.image.Exposure`
+        exposure being processed; the slots have the pixel types of its planes
+    nSlots : `int`
+        number of slots
+    """
+    def __init__(self, boxes, exposure, nSlots):
+        planes = _getPlanes(exposure)
+        self.planeTypes = [type(plane) for plane in planes]
+        self.slotSize = max(box.getArea() for box in boxes)
+        self.nSlots = nSlots
+        self.arrays = [_makeSharedArray(np.zeros(self.slotSize*nSlots, dtype=plane.getArray().dtype))
+                       for plane in planes]
+
+    def _views(self, slot, shape):
+        begin = slot*self.slotSize
+        return [_viewSharedArray(arr, begin, begin + shape[0]*shape[1], shape) for arr in self.arrays]
+
+    def store(self, slot, result):
+        """Move ``result.subExposure`` into ``slot``, if it fits, and
+        replace it with a handle to the slot
+        """
+        subExp = getattr(result, 'subExposure', None)
+        if subExp is None or not hasattr(subExp, 'getMaskedImage'):
+            return result
+        planes = _getPlanes(subExp)
+        shape = planes[0].getArray().shape
+        if (shape[0]*shape[1] > self.slotSize or
+                any(plane.getArray().dtype != self.arrays[i][2] for i, plane in enumerate(planes))):
+            return result
+        for plane, view in zip(planes, self._views(slot, shape)):
+            view[:] = plane.getArray()
+        result.subExposure = _SharedSubExposureHandle(slot, shape, _getInfoStub(subExp))
+        return result
+
+    def restore(self, result):
+        """Replace a handle left by `store` with an Exposure holding a copy
+        of its slot, which is then free for reuse
+        """
+        handle = getattr(result, 'subExposure', None)
+        if isinstance(handle, _SharedSubExposureHandle):
+            arrays = [view.copy() for view in self._views(handle.slot, handle.shape)]
+            result.subExposure = _makeExposureView(handle.info, self.planeTypes, arrays)
+        return result
+
+
+_processMapper = None
+
+
+def _initMapperProcess(mapperClass, mapperConfig, fullBBox, kwargs, sharedExposure=None,
+                       sharedResults=None, doClone=False):
+    """Create the mapper task of a process of the "process" executor
+
+    Parameters
+    ----------
+    mapperClass : `type`
+        `ImageMapper` subclass to instantiate
+    mapperConfig : `ImageMapperConfig`
+        configuration of the mapper
+    fullBBox : `lsst.afw.geom.Box2I`
+        bounding box of the original exposure
+    kwargs : `dict`
+        keyword arguments to be passed to each `mapper.run`; `_SharedExposure`
+        values are replaced by the exposures they hold
+    sharedExposure : `_SharedExposure`, optional
+        the exposure to process, for `_runMapperSharedProcess`
+    sharedResults : `_SharedResults`, optional
+        output buffer for the results of `_runMapperSharedProcess`
+    doClone : `bool`, optional
+        clone the sub-exposures made by `_runMapperSharedProcess`
+    """
+    global _processMapper
+    kwargs = {key: value.makeExposure() if isinstance(value, _SharedExposure) else value
+              for key, value in kwargs.items()}
+    exposure = sharedExposure.makeExposure() if sharedExposure is not None else None
+    _processMapper = pipeBase.Struct(mapper=mapperClass(config=mapperConfig), fullBBox=fullBBox,
+                                     kwargs=kwargs, exposure=exposure, results=sharedResults,
+                                     doClone=doClone)
+
+
+def _runMapperProcess(subExposures):
+    """Run the mapper of this process on a (sub-exposure, expanded sub-exposure) pair
+    """
+    proc = _processMapper
+    return proc.mapper.run(subExposures[0], subExposures[1], proc.fullBBox, **proc.kwargs)
+
+
+def _imapBounded(pool, func, iterable, nInFlight):
+    """Yield ``func(item)`` for each item of ``iterable``, in order, computed
+    in ``pool``
+
+    Unlike `multiprocessing.pool.Pool.imap`, which dispatches all the items
+    at once and holds their results until they are consumed, at most
+    ``nInFlight`` items are dispatched ahead of the consumer: the next item
+    is dispatched when the consumer asks for the result after the one it has.
+    """
+    items = iter(iterable)
+    pending = collections.deque(pool.apply_async(func, (item,))
+                                for item in itertools.islice(items, nInFlight))
+    while pending:
+        yield pending.popleft().get()
+        for item in itertools.islice(items, 1):
+            pending.append(pool.apply_async(func, (item,)))
+
+
+def _runMapperSharedProcess(cell):
+    """Run the mapper of this process on the (slot, box0, box1) cell of the shared exposure
+    """
+    proc = _processMapper
+    slot, box0, box1 = cell
+    subExp = proc.exposure.Factory(proc.exposure, box0)
+    expandedSubExp = proc.exposure.Factory(proc.exposure, box1)
+    if proc.doClone:
+        subExp = subExp.clone()
+        expandedSubExp = expandedSubExp.clone()
+    result = proc.mapper.run(subExp, expandedSubExp, proc.fullBBox, **proc.kwargs)
+    return proc.results.store(slot, result)
+
 
 class ImageMapReduceTask(pipeBase.Task):
     """Split an Exposure into subExposures (optionally on a grid) and
@@ -492,9 +880,9 @@ class ImageMapReduceTask(pipeBase.Task):
     larger Exposure, and then (by default) have those subExposures
     stitched back together into a new, full-sized image.
 
-    Contrary to the expectation given by its name, this task does not
-    perform these operations in parallel, although it could be updatd
-    to provide such functionality.
+    By default the sub-exposures are processed serially; set
+    `config.executor` to process them concurrently in a pool of threads
+    or processes.
 
     The actual operations are performed by two subTasks passed to the
     config. The exposure passed to this task's `run` method will be
@@ -546,7 +934,12 @@ class ImageMapReduceTask(pipeBase.Task):
 
         """
         self.log.info("Mapper sub-task: %s", self.mapper._DefaultName)
-        mapperResults = self._runMapper(exposure, **kwargs)
+        if self.config.streamReduce:
+            # The mapper runs as the reducer consumes its results
+            cells = self._scheduleCells(exposure, **kwargs)
+            mapperResults = self._iterMapperResults(exposure, cells, **kwargs)
+        else:
+            mapperResults = self._runMapper(exposure, **kwargs)
         self.log.info("Reducer sub-task: %s", self.reducer._DefaultName)
         result = self._reduceImage(mapperResults, exposure, **kwargs)
         return result
@@ -572,29 +965,230 @@ class ImageMapReduceTask(pipeBase.Task):
 
         Returns
         -------
-        a list of `pipeBase.Struct`s as returned by `mapper.run`.
+        a list of `pipeBase.Struct`s as returned by `mapper.run`, in grid
+        order. Cells skipped by `config.skipNoDataCells` are `None` if
+        `config.reducer.reduceOperation` is 'none', so that the list is
+        aligned with `self.boxes0`, and are omitted otherwise.
+        """
+        cells = self._scheduleCells(exposure, **kwargs)
+        mapperResults = list(self._iterMapperResults(exposure, cells, doClone=doClone, **kwargs))
+        resultsByCell = dict(zip(cells, mapperResults))
+        if self.config.reducer.reduceOperation == 'none':
+            return [resultsByCell.get(i) for i in range(len(self.boxes0))]
+        return [resultsByCell[i] for i in sorted(resultsByCell)]
+
+    def _iterMapperResults(self, exposure, cells, doClone=False, **kwargs):
+        """Perform `mapper.run` on the given cells, yielding the results
+        as they are produced
+
+        Parameters are as for `_runMapper`, with ``cells`` the indices of
+        the grid cells to process in the order to dispatch them, as returned
+        by `_scheduleCells`. With the "serial" executor, each sub-exposure is
+        only made (and cloned, if ``doClone``) when the previous result has
+        been consumed.
+
+        Yields
+        ------
+        the `pipeBase.Struct`s returned by `mapper.run`, in the order of ``cells``.
+        """
+        nWorkers = self._getNWorkers(len(cells))
+        useSharedMemory = self.config.executor == "process" and self.config.useSharedMemory and nWorkers > 1
+
+        subExposures = self._makeSubExposures(exposure, cells, doClone and not useSharedMemory)
+        if self.config.returnSubImages:
+            subExposures = list(subExposures)
+
+        if useSharedMemory:
+            # The workers make their own sub-exposures, from shared memory
+            mapperResults = self._mapSharedSubExposures(exposure, cells, nWorkers, doClone=doClone,
+                                                        **kwargs)
+        else:
+            mapperResults = self._mapSubExposures(subExposures, exposure.getBBox(), nWorkers, **kwargs)
+
+        for i, result in enumerate(mapperResults):
+            if self.config.returnSubImages:
+                subExp, expandedSubExp = subExposures[i]
+                toAdd = pipeBase.Struct(inputSubExposure=subExp,
+                                        inputExpandedSubExposure=expandedSubExp)
+                result.mergeItems(toAdd, 'inputSubExposure', 'inputExpandedSubExposure')
+            yield result
+
+    def _scheduleCells(self, exposure, **kwargs):
+        """Choose the grid cells to process, and the order in which to dispatch them
+
+        Generate the grid if needed, drop the cells without data (if
+        `config.skipNoDataCells`) and, for the parallel executors, sort the
+        others by decreasing estimated cost (if `config.scheduleByCost`).
+
+        Parameters
+        ----------
+        exposure : `lsst.afw.image.Exposure`
+            the original exposure
+        kwargs :
+            additional keyword arguments to be passed to `self._generateGrid`
+
+        Returns
+        -------
+        cells : `list` of `int`
+            indices into `self.boxes0` and `self.boxes1`
         """
         if self.boxes0 is None:
             self._generateGrid(exposure, **kwargs)  # possibly pass `forceEvenSized`
         if len(self.boxes0) != len(self.boxes1):
             raise ValueError('Bounding boxes list and expanded bounding boxes list are of different lengths')
 
-        self.log.info("Processing %d sub-exposures", len(self.boxes0))
-        mapperResults = []
-        for box0, box1 in zip(self.boxes0, self.boxes1):
+        mask = exposure.getMaskedImage().getMask()
+        noData = mask.getPlaneBitMask(self.config.noDataMaskPlanes)
+        x0, y0 = exposure.getXY0()
+        dataFractions = []
+        for box0 in self.boxes0:
+            maskArr = mask.getArray()[box0.getMinY() - y0:box0.getMaxY() - y0 + 1,
+                                      box0.getMinX() - x0:box0.getMaxX() - x0 + 1]
+            dataFractions.append(np.count_nonzero((maskArr & noData) == 0) / max(maskArr.size, 1))
+
+        cells = list(range(len(self.boxes0)))
+        if self.config.skipNoDataCells:
+            cells = [i for i in cells if dataFractions[i] > 0.]
+            if len(cells) < len(self.boxes0):
+                self.log.info("Skipping %d sub-exposures without data", len(self.boxes0) - len(cells))
+
+        if self.config.scheduleByCost and self._getNWorkers(len(cells)) > 1:
+            costs = [self._estimateCellCost(self.boxes1[i], dataFractions[i]) for i in cells]
+            cells = [cells[i] for i in np.argsort(costs, kind='mergesort')[::-1]]
+
+        self.log.info("Processing %d sub-exposures", len(cells))
+        return cells
+
+    @staticmethod
+    def _estimateCellCost(box, dataFraction):
+        """Estimate the relative cost of running the mapper on a cell
+
+        The cost is taken to be that of an FFT of the expanded sub-exposure,
+        padded to FFT-friendly dimensions, n log n, half of which scales with
+        the fraction of the sub-exposure which has data.
+
+        Parameters
+        ----------
+        box : `lsst.afw.geom.Box2I`
+            bounding box of the expanded sub-exposure
+        dataFraction : `float`
+            fraction of the pixels of the sub-exposure which have data
+        """
+        nPix = diffimLib.nextFastFftSize(box.getWidth()) * diffimLib.nextFastFftSize(box.getHeight())
+        return nPix * np.log2(max(nPix, 2)) * (1. + dataFraction) / 2.
+
+    def _makeSubExposures(self, exposure, cells, doClone=False):
+        """Yield the (sub-exposure, expanded sub-exposure) pair of each of the given grid cells
+
+        Parameters
+        ----------
+        exposure : `lsst.afw.image.Exposure`
+            the original exposure
+        cells : `list` of `int`
+            indices of the grid cells
+        doClone : `bool`
+            if True, clone the sub-exposures rather than returning views of ``exposure``
+        """
+        for i in cells:
+            box0, box1 = self.boxes0[i], self.boxes1[i]
             subExp = exposure.Factory(exposure, box0)
             expandedSubExp = exposure.Factory(exposure, box1)
             if doClone:
                 subExp = subExp.clone()
                 expandedSubExp = expandedSubExp.clone()
-            result = self.mapper.run(subExp, expandedSubExp, exposure.getBBox(), **kwargs)
-            if self.config.returnSubImages:
-                toAdd = pipeBase.Struct(inputSubExposure=subExp,
-                                        inputExpandedSubExposure=expandedSubExp)
-                result.mergeItems(toAdd, 'inputSubExposure', 'inputExpandedSubExposure')
-            mapperResults.append(result)
+            yield subExp, expandedSubExp
 
-        return mapperResults
+    def _mapSubExposures(self, subExposures, fullBBox, nWorkers, **kwargs):
+        """Run `mapper.run` on each sub-exposure with the configured executor
+
+        Parameters
+        ----------
+        subExposures : iterable of `tuple`
+            (sub-exposure, expanded sub-exposure) pairs, in grid order
+        fullBBox : `lsst.afw.geom.Box2I`
+            bounding box of the original exposure
+        nWorkers : `int`
+            number of threads or processes
+        kwargs :
+            additional keyword arguments to be passed to `mapper.run`
+
+        Yields
+        ------
+        the `pipeBase.Struct`s returned by `mapper.run`, in the
+        order of `subExposures`.
+        """
+        if nWorkers <= 1:
+            for subExp, expandedSubExp in subExposures:
+                yield self.mapper.run(subExp, expandedSubExp, fullBBox, **kwargs)
+            return
+
+        self.log.info("Running mapper with %d %s workers", nWorkers, self.config.executor)
+        if self.config.executor == "thread":
+            def runMapper(subExps):
+                return self.mapper.run(subExps[0], subExps[1], fullBBox, **kwargs)
+            with multiprocessing.pool.ThreadPool(nWorkers) as pool:
+                yield from _imapBounded(pool, runMapper, subExposures, 2*nWorkers)
+            return
+
+        # The keyword arguments (e.g. a full template exposure) are the same for
+        # every sub-exposure, so they are sent to each process only once
+        with multiprocessing.Pool(nWorkers, initializer=_initMapperProcess,
+                                  initargs=(type(self.mapper), self.mapper.config, fullBBox, kwargs)) as pool:
+            yield from _imapBounded(pool, _runMapperProcess, subExposures, 2*nWorkers)
+
+    def _mapSharedSubExposures(self, exposure, cells, nWorkers, doClone=False, **kwargs):
+        """Run `mapper.run` on each sub-exposure in a pool of processes
+        sharing the pixels of ``exposure``
+
+        The image, mask and variance of ``exposure`` and of any exposure in
+        ``kwargs`` are copied once into shared memory, from which each worker
+        makes views for the bounding boxes of its cells. A returned
+        `subExposure` no larger than a cell is written into a slot of a
+        shared output buffer (see `_SharedResults`), from which it is copied
+        before the slot is assigned to another cell, so only the bounding
+        boxes and metadata are pickled. There are two slots per worker, and
+        a cell is only dispatched once a slot is free, so that the buffer
+        does not grow with the number of cells.
+
+        Parameters
+        ----------
+        exposure : `lsst.afw.image.Exposure`
+            the original exposure
+        cells : `list` of `int`
+            indices of the grid cells to process, in the order to dispatch them
+        nWorkers : `int`
+            number of processes
+        doClone : `bool`
+            if True, the workers clone the sub-exposures before passing them to `mapper.run`
+        kwargs :
+            additional keyword arguments to be passed to `mapper.run`
+
+        Yields
+        ------
+        the `pipeBase.Struct`s returned by `mapper.run`, in the order of ``cells``.
+        """
+        sharedKwargs = {key: _SharedExposure(value) if isinstance(value, afwImage.Exposure) else value
+                        for key, value in kwargs.items()}
+        sharedResults = _SharedResults([self.boxes0[i] for i in cells], exposure,
+                                       min(2*nWorkers, len(cells)))
+
+        self.log.info("Running mapper with %d process workers using shared memory", nWorkers)
+        initargs = (type(self.mapper), self.mapper.config, exposure.getBBox(), sharedKwargs,
+                    _SharedExposure(exposure), sharedResults, doClone)
+        with multiprocessing.Pool(nWorkers, initializer=_initMapperProcess, initargs=initargs) as pool:
+            # Cell k is only dispatched once the result of cell k - nSlots is restored
+            cellBoxes = ((k % sharedResults.nSlots, self.boxes0[i], self.boxes1[i])
+                         for k, i in enumerate(cells))
+            for result in _imapBounded(pool, _runMapperSharedProcess, cellBoxes, sharedResults.nSlots):
+                yield sharedResults.restore(result)
+
+    def _getNWorkers(self, nCells):
+        """Return the number of workers to use for the configured executor on ``nCells`` cells
+        """
+        if self.config.executor == "serial":
+            return 1
+        nWorkers = self.config.nWorkers if self.config.nWorkers > 0 else os.cpu_count()
+        return max(1, min(nWorkers, nCells))
 
     def _reduceImage(self, mapperResults, exposure, **kwargs):
         """Reduce/merge a set of sub-exposures into a final result
@@ -604,8 +1198,8 @@ class ImageMapReduceTask(pipeBase.Task):
 
         Parameters
         ----------
-        mapperResults : `list`
-            `list` of `lsst.pipe.base.Struct`, each of which was produced by
+        mapperResults : `list` or iterator
+            `lsst.pipe.base.Struct`s, each of which was produced by
             `config.mapper`
         exposure : `lsst.afw.image.Exposure`
             the original exposure
@@ -706,6 +1300,10 @@ class ImageMapReduceTask(pipeBase.Task):
             # in py3 zip returns an iterator, but want to test length below, so use this instead:
             cellCentroids = [(cellCentroidsX[i], cellCentroidsY[i]) for i in range(len(cellCentroidsX))]
 
+        if self.config.fastFftBorders:
+            borderSizeX = _fastBorderSize(cellSizeX, borderSizeX)
+            borderSizeY = _fastBorderSize(cellSizeY, borderSizeY)
+
         # first "main" box at 0,0
         bbox0 = afwGeom.Box2I(afwGeom.Point2I(bbox.getBegin()), afwGeom.Extent2I(cellSizeX, cellSizeY))
         # first expanded box
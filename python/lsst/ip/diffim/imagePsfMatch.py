@@ -553,8 +553,13 @@ class ImagePsfMatchTask(PsfMatchTask):
         spatialSolution, psfMatchingKernel, backgroundModel = self._solve(kernelCellSet, basisList)
 
         psfMatchedMaskedImage = afwImage.MaskedImageF(templateMaskedImage.getBBox())
-        doNormalize = False
-        afwMath.convolve(psfMatchedMaskedImage, templateMaskedImage, psfMatchingKernel, doNormalize)
+        if self.kConfig.spatialKernelConvolution == "direct":
+            doNormalize = False
+            afwMath.convolve(psfMatchedMaskedImage, templateMaskedImage, psfMatchingKernel, doNormalize)
+        else:
+            useFft = self.kConfig.spatialKernelConvolution == "basisFft"
+            diffimLib.convolveLinearCombination(psfMatchedMaskedImage, templateMaskedImage,
+                                                psfMatchingKernel, useFft)
         return pipeBase.Struct(
             matchedImage=psfMatchedMaskedImage,
             psfMatchingKernel=psfMatchingKernel,
@@ -634,16 +639,14 @@ class ImagePsfMatchTask(PsfMatchTask):
         subtractedExposure = afwImage.ExposureF(scienceExposure, True)
         if convolveTemplate:
             subtractedMaskedImage = subtractedExposure.getMaskedImage()
-            subtractedMaskedImage -= results.matchedExposure.getMaskedImage()
-            subtractedMaskedImage -= results.backgroundModel
+            diffimLib.subtractMatchedImage(subtractedMaskedImage, results.matchedExposure.getMaskedImage(),
+                                           subtractedMaskedImage, results.backgroundModel)
         else:
             subtractedExposure.setMaskedImage(results.warpedExposure.getMaskedImage())
             subtractedMaskedImage = subtractedExposure.getMaskedImage()
-            subtractedMaskedImage -= results.matchedExposure.getMaskedImage()
-            subtractedMaskedImage -= results.backgroundModel
-
-            # Preserve polarity of differences
-            subtractedMaskedImage *= -1
+            # Preserve polarity of differences: matched science - warped template
+            diffimLib.subtractMatchedImage(subtractedMaskedImage, results.matchedExposure.getMaskedImage(),
+                                           subtractedMaskedImage, results.backgroundModel, invert=False)
 
             # Place back on native photometric scale
             subtractedMaskedImage /= results.psfMatchingKernel.computeImage(
@@ -725,9 +728,9 @@ class ImagePsfMatchTask(PsfMatchTask):
             scienceFwhmPix=scienceFwhmPix,
         )
 
-        subtractedMaskedImage = afwImage.MaskedImageF(scienceMaskedImage, True)
-        subtractedMaskedImage -= results.matchedImage
-        subtractedMaskedImage -= results.backgroundModel
+        subtractedMaskedImage = afwImage.MaskedImageF(scienceMaskedImage.getBBox())
+        diffimLib.subtractMatchedImage(subtractedMaskedImage, results.matchedImage,
+                                       scienceMaskedImage, results.backgroundModel)
         results.subtractedMaskedImage = subtractedMaskedImage
 
         import lsstDebug
@@ -21,6 +21,7 @@
  */
 #include "pybind11/pybind11.h"
 #include "pybind11/eigen.h"
+#include "pybind11/stl.h"
 
 #include "ndarray/pybind11.h"
 
@@ -56,7 +57,7 @@ void declareConvolveAndSubtract(py::module &mod) {
                                                 afw::math::Kernel const &, BackgroundT, bool)) &
                     convolveAndSubtract,
             "templateImage"_a, "scienceMaskedImage"_a, "convolutionKernel"_a, "background"_a,
-            "invert"_a = true);
+            "invert"_a = true, py::call_guard<py::gil_scoped_release>());
 
     mod.def("convolveAndSubtract",
             (afw::image::MaskedImage<PixelT>(*)(afw::image::Image<PixelT> const &,
@@ -64,7 +65,51 @@ void declareConvolveAndSubtract(py::module &mod) {
                                                 afw::math::Kernel const &, BackgroundT, bool)) &
                     convolveAndSubtract,
             "templateImage"_a, "scienceMaskedImage"_a, "convolutionKernel"_a, "background"_a,
-            "invert"_a = true);
+            "invert"_a = true, py::call_guard<py::gil_scoped_release>());
+
+    mod.def("convolveAndSubtract",
+            (void (*)(afw::image::MaskedImage<PixelT> &, afw::image::MaskedImage<PixelT> const &,
+                      afw::image::MaskedImage<PixelT> const &, afw::math::Kernel const &, BackgroundT,
+                      bool)) &
+                    convolveAndSubtract,
+            "differenceImage"_a, "templateImage"_a, "scienceMaskedImage"_a, "convolutionKernel"_a,
+            "background"_a, "invert"_a = true, py::call_guard<py::gil_scoped_release>());
+
+    mod.def("convolveAndSubtract",
+            (void (*)(afw::image::MaskedImage<PixelT> &, afw::image::Image<PixelT> const &,
+                      afw::image::MaskedImage<PixelT> const &, afw::math::Kernel const &, BackgroundT,
+                      bool)) &
+                    convolveAndSubtract,
+            "differenceImage"_a, "templateImage"_a, "scienceMaskedImage"_a, "convolutionKernel"_a,
+            "background"_a, "invert"_a = true, py::call_guard<py::gil_scoped_release>());
+
+    mod.def("subtractMatchedImage", &subtractMatchedImage<PixelT, BackgroundT>, "differenceImage"_a,
+            "matchedImage"_a, "scienceMaskedImage"_a, "background"_a, "invert"_a = true,
+            py::call_guard<py::gil_scoped_release>());
+}
+
+/**
+ * Wrap convolveBasisFft for one pixel type
+ *
+ * @tparam PixelT  pixel type of the Image to convolve
+ * @param mod  pybind11 module
+ */
+template <typename PixelT>
+void declareConvolveBasisFft(py::module &mod) {
+    mod.def("convolveBasisFft", &convolveBasisFft<PixelT>, "image"_a, "basisList"_a,
+            py::call_guard<py::gil_scoped_release>());
+}
+
+/**
+ * Wrap convolveLinearCombination for one pixel type
+ *
+ * @tparam PixelT  pixel type of the MaskedImages
+ * @param mod  pybind11 module
+ */
+template <typename PixelT>
+void declareConvolveLinearCombination(py::module &mod) {
+    mod.def("convolveLinearCombination", &convolveLinearCombination<PixelT>, "convolvedImage"_a,
+            "inImage"_a, "kernel"_a, "useFft"_a = false, py::call_guard<py::gil_scoped_release>());
 }
 
 }  // namespace lsst::ip::diffim::<anonymous>
@@ -75,6 +120,12 @@ PYBIND11_MODULE(imageSubtract, mod) {
 
     declareConvolveAndSubtract<float, double>(mod);
     declareConvolveAndSubtract<float, afw::math::Function2<double> const &>(mod);
+    declareConvolveBasisFft<float>(mod);
+    declareConvolveBasisFft<double>(mod);
+    declareConvolveLinearCombination<float>(mod);
+    declareConvolveLinearCombination<double>(mod);
+
+    mod.def("nextFastFftSize", &nextFastFftSize, "n"_a);
 }
 
 }  // diffim
@@ -83,19 +83,19 @@ void declareKernelCandidate(py::module &mod, std::string const &suffix) {
     cls.def("getDifferenceImage",
             (afw::image::MaskedImage<PixelT> (KernelCandidate<PixelT>::*)(CandidateSwitch)) &
                     KernelCandidate<PixelT>::getDifferenceImage,
-            "cand"_a);
+            "cand"_a, py::call_guard<py::gil_scoped_release>());
     cls.def("getDifferenceImage", (afw::image::MaskedImage<PixelT> (KernelCandidate<PixelT>::*)(
                                           std::shared_ptr<afw::math::Kernel>, double)) &
                                           KernelCandidate<PixelT>::getDifferenceImage,
-            "kernel"_a, "background"_a);
+            "kernel"_a, "background"_a, py::call_guard<py::gil_scoped_release>());
     cls.def("isInitialized", &KernelCandidate<PixelT>::isInitialized);
     cls.def("build", (void (KernelCandidate<PixelT>::*)(afw::math::KernelList const &)) &
                              KernelCandidate<PixelT>::build,
-            "basisList"_a);
+            "basisList"_a, py::call_guard<py::gil_scoped_release>());
     cls.def("build",
             (void (KernelCandidate<PixelT>::*)(afw::math::KernelList const &, Eigen::MatrixXd const &)) &
                     KernelCandidate<PixelT>::build,
-            "basisList"_a, "hMat"_a);
+            "basisList"_a, "hMat"_a, py::call_guard<py::gil_scoped_release>());
     mod.def("makeKernelCandidate",
             (std::shared_ptr<KernelCandidate<PixelT>>(*)(
                     float const, float const, std::shared_ptr<afw::image::MaskedImage<PixelT>> const &,
@@ -62,18 +62,26 @@ void declareKernelSolution(py::module &mod) {
             .value("SVD", KernelSolution::ConditionNumberType::SVD)
             .export_values();
 
-    cls.def("solve", (void (KernelSolution::*)()) & KernelSolution::solve);
+    py::enum_<KernelSolution::BasisConvolutionType>(cls, "BasisConvolutionType")
+            .value("DIRECT", KernelSolution::BasisConvolutionType::DIRECT)
+            .value("FFT", KernelSolution::BasisConvolutionType::FFT)
+            .export_values();
+
+    cls.def("solve", (void (KernelSolution::*)()) & KernelSolution::solve,
+            py::call_guard<py::gil_scoped_release>());
     cls.def("solve", (void (KernelSolution::*)(Eigen::MatrixXd const &, Eigen::VectorXd const &)) &
                              KernelSolution::solve,
-            "mMat"_a, "bVec"_a);
+            "mMat"_a, "bVec"_a, py::call_guard<py::gil_scoped_release>());
     cls.def("getSolvedBy", &KernelSolution::getSolvedBy);
+    cls.def("setPreferredSolver", &KernelSolution::setPreferredSolver, "solver"_a);
+    cls.def("getPreferredSolver", &KernelSolution::getPreferredSolver);
     cls.def("getConditionNumber", (double (KernelSolution::*)(KernelSolution::ConditionNumberType)) &
                                           KernelSolution::getConditionNumber,
-            "conditionType"_a);
+            "conditionType"_a, py::call_guard<py::gil_scoped_release>());
     cls.def("getConditionNumber",
             (double (KernelSolution::*)(Eigen::MatrixXd const &, KernelSolution::ConditionNumberType)) &
                     KernelSolution::getConditionNumber,
-            "mMat"_a, "conditionType"_a);
+            "mMat"_a, "conditionType"_a, py::call_guard<py::gil_scoped_release>());
     cls.def("getM", &KernelSolution::getM, py::return_value_policy::copy);
     cls.def("getB", &KernelSolution::getB, py::return_value_policy::copy);
     cls.def("printM", &KernelSolution::printM);
@@ -96,14 +104,22 @@ void declareStaticKernelSolution(py::module &mod, std::string const &suffix) {
 
     cls.def(py::init<lsst::afw::math::KernelList const &, bool>(), "basisList"_a, "fitForBackground"_a);
 
-    cls.def("solve", (void (StaticKernelSolution<InputT>::*)()) & StaticKernelSolution<InputT>::solve);
+    cls.def("solve", (void (StaticKernelSolution<InputT>::*)()) & StaticKernelSolution<InputT>::solve,
+            py::call_guard<py::gil_scoped_release>());
     cls.def("build", &StaticKernelSolution<InputT>::build, "templateImage"_a, "scienceImage"_a,
-            "varianceEstimate"_a);
+            "varianceEstimate"_a, py::call_guard<py::gil_scoped_release>());
     cls.def("getKernel", &StaticKernelSolution<InputT>::getKernel);
     cls.def("makeKernelImage", &StaticKernelSolution<InputT>::makeKernelImage);
     cls.def("getBackground", &StaticKernelSolution<InputT>::getBackground);
     cls.def("getKsum", &StaticKernelSolution<InputT>::getKsum);
     cls.def("getSolutionPair", &StaticKernelSolution<InputT>::getSolutionPair);
+    cls.def("setBasisConvolution", &StaticKernelSolution<InputT>::setBasisConvolution, "type"_a);
+    cls.def("getBasisConvolution", &StaticKernelSolution<InputT>::getBasisConvolution);
+    cls.def("setFastDeltaFunctionBuild", &StaticKernelSolution<InputT>::setFastDeltaFunctionBuild,
+            "useFastBuild"_a);
+    cls.def("getFastDeltaFunctionBuild", &StaticKernelSolution<InputT>::getFastDeltaFunctionBuild);
+    cls.def("getDesignMatrix", &StaticKernelSolution<InputT>::getDesignMatrix);
+    cls.def("setDesignMatrix", &StaticKernelSolution<InputT>::setDesignMatrix, "cMat"_a);
 }
 
 /**
@@ -122,11 +138,11 @@ void declareMaskedKernelSolution(py::module &mod, std::string const &suffix) {
     cls.def(py::init<lsst::afw::math::KernelList const &, bool>(), "basisList"_a, "fitForBackground"_a);
 
     cls.def("buildOrig", &MaskedKernelSolution<InputT>::buildOrig, "templateImage"_a, "scienceImage"_a,
-            "varianceEstimate"_a, "pixelMask"_a);
+            "varianceEstimate"_a, "pixelMask"_a, py::call_guard<py::gil_scoped_release>());
     cls.def("buildWithMask", &MaskedKernelSolution<InputT>::buildWithMask, "templateImage"_a,
-            "scienceImage"_a, "varianceEstimate"_a, "pixelMask"_a);
+            "scienceImage"_a, "varianceEstimate"_a, "pixelMask"_a, py::call_guard<py::gil_scoped_release>());
     cls.def("buildSingleMaskOrig", &MaskedKernelSolution<InputT>::buildSingleMaskOrig, "templateImage"_a,
-            "scienceImage"_a, "varianceEstimate"_a, "maskBox"_a);
+            "scienceImage"_a, "varianceEstimate"_a, "maskBox"_a, py::call_guard<py::gil_scoped_release>());
 }
 
 /**
@@ -147,9 +163,11 @@ void declareRegularizedKernelSolution(py::module &mod, std::string const &suffix
             "basisList"_a, "fitForBackground"_a, "hMat"_a, "policy"_a);
 
     cls.def("solve",
-            (void (RegularizedKernelSolution<InputT>::*)()) & RegularizedKernelSolution<InputT>::solve);
+            (void (RegularizedKernelSolution<InputT>::*)()) & RegularizedKernelSolution<InputT>::solve,
+            py::call_guard<py::gil_scoped_release>());
     cls.def("getLambda", &RegularizedKernelSolution<InputT>::getLambda);
-    cls.def("estimateRisk", &RegularizedKernelSolution<InputT>::estimateRisk, "maxCond"_a);
+    cls.def("estimateRisk", &RegularizedKernelSolution<InputT>::estimateRisk, "maxCond"_a,
+            py::call_guard<py::gil_scoped_release>());
     cls.def("getM", &RegularizedKernelSolution<InputT>::getM);
 }
 
@@ -164,9 +182,15 @@ void declareSpatialKernelSolution(py::module &mod) {
                      lsst::afw::math::Kernel::SpatialFunctionPtr, pex::policy::Policy>(),
             "basisList"_a, "spatialKernelFunction"_a, "background"_a, "policy"_a);
 
-    cls.def("solve", (void (SpatialKernelSolution::*)()) & SpatialKernelSolution::solve);
+    cls.def("solve", (void (SpatialKernelSolution::*)()) & SpatialKernelSolution::solve,
+            py::call_guard<py::gil_scoped_release>());
     cls.def("addConstraint", &SpatialKernelSolution::addConstraint, "xCenter"_a, "yCenter"_a, "qMat"_a,
-            "wVec"_a);
+            "wVec"_a, py::call_guard<py::gil_scoped_release>());
+    cls.def("removeConstraint", &SpatialKernelSolution::removeConstraint, "xCenter"_a, "yCenter"_a,
+            "qMat"_a, "wVec"_a, py::call_guard<py::gil_scoped_release>());
+    cls.def("setIncrementalFactorization", &SpatialKernelSolution::setIncrementalFactorization,
+            "incremental"_a);
+    cls.def("getIncrementalFactorization", &SpatialKernelSolution::getIncrementalFactorization);
     cls.def("makeKernelImage", &SpatialKernelSolution::makeKernelImage, "pos"_a);
     cls.def("getSolutionPair", &SpatialKernelSolution::getSolutionPair);
 }
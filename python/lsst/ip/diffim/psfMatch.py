@@ -216,6 +216,15 @@ class PsfMatchConfig(pexConfig.Config):
         default=128,
         check=lambda x: x >= 32
     )
+    nCandidateThreads = pexConfig.Field(
+        dtype=int,
+        doc="""Number of threads used to build, sum-clip and assess the KernelCandidates.
+                 The candidates are split into contiguous blocks, one per thread, and the
+                 reject counts are merged in block order, so the results do not depend on
+                 the number of threads.  1 visits the candidates serially.""",
+        default=1,
+        check=lambda x: x >= 1
+    )
     nStarPerCell = pexConfig.Field(
         dtype=int,
         doc="Number of KernelCandidates in each SpatialCell to use in the spatial fitting",
@@ -228,6 +237,15 @@ class PsfMatchConfig(pexConfig.Config):
         default=3,
         check=lambda x: x >= 1 and x <= 5
     )
+    useIncrementalSpatialSolution = pexConfig.Field(
+        dtype=bool,
+        doc="""Carry the spatial normal equations over between the spatial rejection iterations:
+                 the constraints of rejected KernelCandidates are subtracted and those of new
+                 ones added, and the Cholesky factor of the spatial matrix is updated with the
+                 matching rank-one updates instead of being recomputed.  Not used with
+                 usePcaForSpatialKernel, since the spatial basis changes every iteration.""",
+        default=False,
+    )
     usePcaForSpatialKernel = pexConfig.Field(
         dtype=bool,
         doc="""Use Pca to reduce the dimensionality of the kernel basis sets.
@@ -239,6 +257,15 @@ class PsfMatchConfig(pexConfig.Config):
                  kernel sum will be conserved.""",
         default=False,
     )
+    reuseConvolvedBasis = pexConfig.Field(
+        dtype=bool,
+        doc="""When refitting the candidates with the Pca basis, express each Pca kernel as a
+                 linear combination of the original basis kernels and form the new design matrix
+                 from the stored convolutions of the original basis, instead of convolving each
+                 stamp again.  Requires the original solution to keep its design matrix, i.e.
+                 useFastDeltaFunctionBuild is not used for it.""",
+        default=False,
+    )
     subtractMeanForPca = pexConfig.Field(
         dtype=bool,
         doc="Subtract off the mean feature before doing the Pca",
@@ -325,6 +352,18 @@ class PsfMatchConfig(pexConfig.Config):
         default=5.0e7,
         check=lambda x: x >= 0.0
     )
+    kernelSolver = pexConfig.ChoiceField(
+        dtype=str,
+        doc="""Factorization tried first when solving the (symmetric, positive semi-definite)
+                 normal equations.  If it fails, or the matrix is numerically singular, the
+                 solution falls back to LU and then to an eigenvector decomposition.""",
+        default="LU",
+        allowed={
+            "LU": "Full pivot LU decomposition",
+            "CHOLESKY_LLT": "Cholesky LLT decomposition (fastest)",
+            "CHOLESKY_LDLT": "Robust Cholesky LDLT decomposition",
+        }
+    )
     conditionNumberType = pexConfig.ChoiceField(
         dtype=str,
         doc="Use singular values (SVD) or eigen values (EIGENVALUE) to determine condition number",
@@ -352,6 +391,39 @@ class PsfMatchConfig(pexConfig.Config):
                  In some cases this is better for bright star residuals.""",
         default=True,
     )
+    basisConvolution = pexConfig.ChoiceField(
+        dtype=str,
+        doc="""How to convolve each KernelCandidate template stamp with the basis kernels.
+                 Fourier-space convolution transforms the stamp only once and is much faster
+                 for large, dense basis kernels such as the Alard-Lupton Gaussians.""",
+        default="direct",
+        allowed={
+            "direct": "Direct convolution with afw.math.convolve, one basis kernel at a time",
+            "fft": "Convolve with all basis kernels in Fourier space",
+        }
+    )
+    spatialKernelConvolution = pexConfig.ChoiceField(
+        dtype=str,
+        doc="""How to convolve the image with the spatially varying PSF-matching kernel.
+                 The basis options convolve the image once with each basis kernel and sum the
+                 results with the spatial weights of each pixel; they are much faster for the
+                 few kernels of a Pca basis, but the variance takes one convolution per pair of
+                 basis kernels, so they are slower for a large basis.""",
+        default="direct",
+        allowed={
+            "direct": "afw.math.convolve with the LinearCombinationKernel",
+            "basis": "Direct convolution with each basis kernel, summed with the spatial weights",
+            "basisFft": "Fourier-space convolution with each basis kernel, summed with the spatial weights",
+        }
+    )
+    useFastDeltaFunctionBuild = pexConfig.Field(
+        dtype=bool,
+        doc="""Build the normal equations of a delta-function basis directly from shifted
+                 windows of the template stamp, without convolving the stamp or storing the
+                 design matrix.  Not used with the risk-minimizing regularization lambdaTypes,
+                 which need the design matrix.""",
+        default=False,
+    )
     calculateKernelUncertainty = pexConfig.Field(
         dtype=bool,
         doc="""Calculate kernel and background uncertainties for each kernel candidate?
@@ -690,6 +762,13 @@ class PsfMatchTask(pipeBase.Task):
         self.metadata.set("spatialConditionNum", conditionNum)
         self.metadata.set("spatialKernelSum", kSum)
 
+        # Record how the matrices were solved, to monitor fallbacks from the preferred solver
+        solverNames = {value: name for name, value in
+                       diffimLib.KernelSolution.KernelSolvedBy.__members__.items()}
+        self.metadata.set("spatialSolvedBy", solverNames[spatialSolution.getSolvedBy()])
+        self.log.info("Spatial model solved by %s (preferred %s)" % (
+            solverNames[spatialSolution.getSolvedBy()], self.kConfig.kernelSolver))
+
         # Look at how well the solution is constrained
         nBasisKernels = spatialKernel.getNBasisKernels()
         nKernelTerms = spatialKernel.getNSpatialParameters()
@@ -705,11 +784,14 @@ class PsfMatchTask(pipeBase.Task):
         nGood = 0
         nBad = 0
         nTot = 0
+        nSolvedBy = {name: 0 for name in solverNames.values()}
         for cell in kernelCellSet.getCellList():
             for cand in cell.begin(False):  # False = include bad candidates
                 nTot += 1
                 if cand.getStatus() == afwMath.SpatialCellCandidate.GOOD:
                     nGood += 1
+                    solvedBy = cand.getKernelSolution(diffimLib.KernelCandidateF.RECENT).getSolvedBy()
+                    nSolvedBy[solverNames[solvedBy]] += 1
                 if cand.getStatus() == afwMath.SpatialCellCandidate.BAD:
                     nBad += 1
 
@@ -722,6 +804,13 @@ class PsfMatchTask(pipeBase.Task):
         else:
             self.log.info("%d candidates total, %d rejected, %d used" % (nTot, nBad, nGood))
 
+        for name, nSolved in nSolvedBy.items():
+            if name != "NONE":
+                self.metadata.set("candidatesSolvedBy%s" % (name), nSolved)
+        if nSolvedBy[self.kConfig.kernelSolver] < nGood:
+            self.log.info("%d of %d candidate kernels fell back from the %s solver" % (
+                nGood - nSolvedBy[self.kConfig.kernelSolver], nGood, self.kConfig.kernelSolver))
+
         # Some judgements on the quality of the spatial models
         if nGood < nKernelTerms:
             self.log.warn("Spatial kernel model underconstrained; %d candidates, %d terms, %d bases" % (
@@ -857,12 +946,30 @@ class PsfMatchTask(pipeBase.Task):
         # New Kernel visitor for this new basis list (no regularization explicitly)
         singlekvPca = diffimLib.BuildSingleKernelVisitorF(spatialBasisList, policy)
         singlekvPca.setSkipBuilt(False)
-        kernelCellSet.visitCandidates(singlekvPca, nStarPerCell)
+        self._visitCandidates(kernelCellSet, singlekvPca, nStarPerCell)
         singlekvPca.setSkipBuilt(True)
         nRejectedPca = singlekvPca.getNRejected()
 
         return nRejectedPca, spatialBasisList
 
+    def _visitCandidates(self, kernelCellSet, visitor, nStarPerCell):
+        """Visit the KernelCandidates, in parallel if ``nCandidateThreads`` > 1
+
+        Unlike ``kernelCellSet.visitCandidates``, this releases the GIL while
+        the candidates are processed, even when running serially.
+
+        Parameters
+        ----------
+        kernelCellSet : `lsst.afw.math.SpatialCellSet`
+            a SpatialCellSet containing KernelCandidates
+        visitor : `lsst.afw.math.CandidateVisitor`
+            a BuildSingleKernelVisitor, KernelSumVisitor or AssessSpatialKernelVisitor
+        nStarPerCell : `int`
+            the number of stars per cell to visit
+        """
+        diffimLib.visitCandidatesParallel(visitor, kernelCellSet, nStarPerCell,
+                                          self.kConfig.nCandidateThreads)
+
     def _buildCellSet(self, *args):
         """Fill a SpatialCellSet with KernelCandidates for the Psf-matching process;
         override in derived classes"""
@@ -913,6 +1020,10 @@ class PsfMatchTask(pipeBase.Task):
         # Visitor for the kernel sum rejection
         ksv = diffimLib.KernelSumVisitorF(policy)
 
+        # Visitor for the spatial fit; reused across iterations if the spatial basis does not change
+        spatialkv = None
+        reuseSpatialkv = self.kConfig.useIncrementalSpatialSolution and not usePcaForSpatialKernel
+
         # Main loop
         t0 = time.time()
         try:
@@ -925,7 +1036,7 @@ class PsfMatchTask(pipeBase.Task):
                 while (nRejectedSkf != 0):
                     log.log("TRACE1." + self.log.getName() + "._solve", log.DEBUG,
                             "Building single kernels...")
-                    kernelCellSet.visitCandidates(singlekv, nStarPerCell)
+                    self._visitCandidates(kernelCellSet, singlekv, nStarPerCell)
                     nRejectedSkf = singlekv.getNRejected()
                     log.log("TRACE1." + self.log.getName() + "._solve", log.DEBUG,
                             "Iteration %d, rejected %d candidates due to initial kernel fit",
@@ -934,10 +1045,10 @@ class PsfMatchTask(pipeBase.Task):
                 # Reject outliers in kernel sum
                 ksv.resetKernelSum()
                 ksv.setMode(diffimLib.KernelSumVisitorF.AGGREGATE)
-                kernelCellSet.visitCandidates(ksv, nStarPerCell)
+                self._visitCandidates(kernelCellSet, ksv, nStarPerCell)
                 ksv.processKsumDistribution()
                 ksv.setMode(diffimLib.KernelSumVisitorF.REJECT)
-                kernelCellSet.visitCandidates(ksv, nStarPerCell)
+                self._visitCandidates(kernelCellSet, ksv, nStarPerCell)
 
                 nRejectedKsum = ksv.getNRejected()
                 log.log("TRACE1." + self.log.getName() + "._solve", log.DEBUG,
@@ -980,7 +1091,8 @@ class PsfMatchTask(pipeBase.Task):
 
                 # We have gotten on to the spatial modeling part
                 regionBBox = kernelCellSet.getBBox()
-                spatialkv = diffimLib.BuildSpatialKernelVisitorF(spatialBasisList, regionBBox, policy)
+                if spatialkv is None or not reuseSpatialkv:
+                    spatialkv = diffimLib.BuildSpatialKernelVisitorF(spatialBasisList, regionBBox, policy)
                 kernelCellSet.visitCandidates(spatialkv, nStarPerCell)
                 spatialkv.solveLinearEquation()
                 log.log("TRACE2." + self.log.getName() + "._solve", log.DEBUG,
@@ -989,7 +1101,7 @@ class PsfMatchTask(pipeBase.Task):
 
                 # Check the quality of the spatial fit (look at residuals)
                 assesskv = diffimLib.AssessSpatialKernelVisitorF(spatialKernel, spatialBackground, policy)
-                kernelCellSet.visitCandidates(assesskv, nStarPerCell)
+                self._visitCandidates(kernelCellSet, assesskv, nStarPerCell)
                 nRejectedSpatial = assesskv.getNRejected()
                 nGoodSpatial = assesskv.getNGood()
                 log.log("TRACE1." + self.log.getName() + "._solve", log.DEBUG,
@@ -1015,7 +1127,8 @@ class PsfMatchTask(pipeBase.Task):
                 if (usePcaForSpatialKernel):
                     nRejectedPca, spatialBasisList = self._createPcaBasis(kernelCellSet, nStarPerCell, policy)
                 regionBBox = kernelCellSet.getBBox()
-                spatialkv = diffimLib.BuildSpatialKernelVisitorF(spatialBasisList, regionBBox, policy)
+                if not reuseSpatialkv:
+                    spatialkv = diffimLib.BuildSpatialKernelVisitorF(spatialBasisList, regionBBox, policy)
                 kernelCellSet.visitCandidates(spatialkv, nStarPerCell)
                 spatialkv.solveLinearEquation()
                 log.log("TRACE2." + self.log.getName() + "._solve", log.DEBUG,
@@ -21,6 +21,7 @@
 #
 
 import numpy as np
+import os
 
 import lsst.afw.image as afwImage
 import lsst.afw.geom as afwGeom
@@ -29,6 +30,8 @@ import lsst.afw.math as afwMath
 import lsst.pex.config as pexConfig
 import lsst.pipe.base as pipeBase
 
+from . import diffimLib
+from .diffimTools import ArrayCache
 from .imageMapReduce import (ImageMapReduceConfig, ImageMapper,
                              ImageMapReduceTask)
 from .imagePsfMatch import (ImagePsfMatchTask, ImagePsfMatchConfig,
@@ -117,10 +120,122 @@ class ZogyConfig(pexConfig.Config):
         doc="Mask planes to ignore for statistics"
     )
 
+    padToFastFftSize = pexConfig.Field(
+        dtype=bool,
+        default=False,
+        doc="Pad the images (mirroring their edges) and PSFs of the Fourier-space methods to "
+        "dimensions with no prime factors other than 2, 3 and 5, for which FFTs are fast, "
+        "and crop the results back to the image dimensions. Scorr is unchanged away from the "
+        "edges, but the diffim is not reproduced pixel for pixel, as its kernels reach the "
+        "mirrored edges."
+    )
+
+    fftBackend = pexConfig.ChoiceField(
+        dtype=str,
+        default="auto",
+        doc="Library computing the FFTs of the Fourier-space methods",
+        allowed={
+            "auto": "scipy.fft if it is available, otherwise numpy.fft",
+            "numpy": "numpy.fft (single-threaded)",
+            "scipy": "scipy.fft, using `fftWorkers` threads",
+        }
+    )
+
+    fftWorkers = pexConfig.Field(
+        dtype=int,
+        default=1,
+        doc="Number of threads computing each FFT with the scipy backend; 0 uses one per CPU",
+        check=lambda x: x >= 0
+    )
+
+    useSinglePrecision = pexConfig.Field(
+        dtype=bool,
+        default=False,
+        doc="Compute the FFTs and Fourier-space arithmetic in float32/complex64 rather than "
+        "float64/complex128, halving their memory and bandwidth. The rounding errors grow as "
+        "the float32 epsilon (6e-8) times the log2 of the transform length, so the results "
+        "differ from the double-precision ones by a few 1e-6 of the image dynamic range, "
+        "well below the noise of the diffim and likelihood images. numpy.fft computes in "
+        "double precision whatever the input, so only the arithmetic is then single precision.",
+    )
+
+    templateFftCacheSize = pexConfig.Field(
+        dtype=float,
+        default=0.,
+        doc="Memory budget (MB) of the cache of template image, variance and PSF FFTs shared by "
+        "the ZogyTasks of a process, for repeated subtractions against the same template. "
+        "The least recently used transforms are evicted first; 0 disables the cache.",
+        check=lambda x: x >= 0.
+    )
+
+    overlapSaveTileSize = pexConfig.Field(
+        dtype=int,
+        default=0,
+        doc="Transform length (pixels) of the tiles of the overlap-save mode of the Fourier-space "
+        "likelihood image (Scorr), which processes images that do not fit in one tile block by "
+        "block, overlapping by the support of the likelihood-image kernels, so that its memory use "
+        "is bounded by the tile size rather than the image size. The diffim kernels have power-law "
+        "wings that no bounded overlap reproduces, so the diffim raises in this mode. 0 transforms "
+        "the whole image at once.",
+        check=lambda x: x >= 0
+    )
+
+    overlapSaveTolerance = pexConfig.Field(
+        dtype=float,
+        default=1e-4,
+        doc="Fraction of their peak beyond which the likelihood-image kernels are truncated by the "
+        "overlap-save tiles (see overlapSaveTileSize), which sets the overlap of the tiles.",
+        check=lambda x: 0. < x < 1.
+    )
+
 
 MIN_KERNEL = 1.0e-4
 
 
+class _FftBackend:
+    """Real-to-complex 2-d FFTs, computed by numpy.fft or scipy.fft
+
+    The images and PSFs of ZOGY are real, so only half of the spectrum of
+    each (the last axis has ``shape[1]//2 + 1`` elements) is computed and
+    stored; products and ratios of such spectra are transformed back with
+    `irfft2` given the shape of the image.
+
+    Parameters
+    ----------
+    backend : `str`
+        "numpy", "scipy" or "auto" (see `ZogyConfig.fftBackend`)
+    workers : `int`
+        number of threads for the scipy backend; 0 uses one per CPU
+    singlePrecision : `bool`
+        return float32/complex64 arrays rather than float64/complex128
+    """
+    def __init__(self, backend="auto", workers=1, singlePrecision=False):
+        self.realType = np.float32 if singlePrecision else np.float64
+        self.complexType = np.complex64 if singlePrecision else np.complex128
+        self.module = np.fft
+        self.kwargs = {}
+        if backend in ("auto", "scipy"):
+            try:
+                import scipy.fft
+            except ImportError:
+                if backend == "scipy":
+                    raise
+            else:
+                self.module = scipy.fft
+                self.kwargs = dict(workers=workers if workers > 0 else os.cpu_count())
+
+    def rfft2(self, a):
+        out = self.module.rfft2(np.asarray(a, dtype=self.realType), **self.kwargs)
+        return out.astype(self.complexType, copy=False)
+
+    def irfft2(self, a, shape):
+        out = self.module.irfft2(np.asarray(a, dtype=self.complexType), s=shape, **self.kwargs)
+        return out.astype(self.realType, copy=False)
+
+
+_templateFftCache = ArrayCache(maxBytes=0)
+
+
 class ZogyTask(pipeBase.Task):
     """Task to perform ZOGY proper image subtraction. See module-level documentation for
     additional details.
@@ -161,6 +276,12 @@ class ZogyTask(pipeBase.Task):
             `lsst.pipe.base.Task`
         """
         pipeBase.Task.__init__(self, *args, **kwargs)
+        self._fft = _FftBackend(self.config.fftBackend, self.config.fftWorkers,
+                                self.config.useSinglePrecision)
+        self._templateCache = None
+        if self.config.templateFftCacheSize > 0:
+            self._templateCache = _templateFftCache
+            self._templateCache.maxBytes = int(self.config.templateFftCacheSize * 2**20)
         self.template = self.science = None
         self.setup(templateExposure=templateExposure, scienceExposure=scienceExposure,
                    sig1=sig1, sig2=sig2, psf1=psf1, psf2=psf2, *args, **kwargs)
@@ -324,6 +445,51 @@ class ZogyTask(pipeBase.Task):
         tmp[:, :] = psf
         return newArr
 
+    def _getFftShape(self, shape):
+        """Return the dimensions to which images of dimensions ``shape`` are padded for FFTs
+        """
+        if not self.config.padToFastFftSize:
+            return tuple(shape)
+        return tuple(diffimLib.nextFastFftSize(n) for n in shape)
+
+    @staticmethod
+    def _padImageToSize(im, shape):
+        """Pad ``im`` at its upper x and y edges to the dimensions ``shape``
+
+        The padding mirrors the image about its edges, which avoids adding
+        discontinuities that would ring into the image in a circular convolution.
+        """
+        padWidths = [(0, n - m) for m, n in zip(im.shape, shape)]
+        if not any(after for _, after in padWidths):
+            return im
+        return np.pad(im, padWidths, mode='symmetric')
+
+    @staticmethod
+    def clearTemplateFftCache():
+        """Empty the template FFT cache shared by the ZogyTasks of this process
+        (see `ZogyConfig.templateFftCacheSize`)
+        """
+        _templateFftCache.clear()
+
+    def _getTemplateTransforms(self, kind, compute, *arrays):
+        """Return ``compute()``, the transforms of the template ``arrays``,
+        from the template FFT cache if it is enabled
+
+        Parameters
+        ----------
+        kind : `str`
+            what is transformed, to tell apart the entries for different uses
+        compute : callable
+            function returning the `tuple` of transforms
+        *arrays : `numpy.ndarray`
+            the arrays which are transformed, whose contents identify the entry
+        """
+        if self._templateCache is None:
+            return compute()
+        key = (kind, self._fft.module.__name__, self._fft.complexType.__name__,
+               ArrayCache.makeKey(*arrays))
+        return self._templateCache.get(key, compute)
+
     def computePrereqs(self, psf1=None, psf2=None, padSize=0):
         """Compute standard ZOGY quantities used by (nearly) all methods.
 
@@ -346,8 +512,9 @@ class ZogyTask(pipeBase.Task):
         A `lsst.pipe.base.Struct` containing:
         - Pr : 2D `numpy.array`, the (possibly zero-padded) template PSF
         - Pn : 2D `numpy.array`, the (possibly zero-padded) science PSF
-        - Pr_hat : 2D `numpy.array`, the FFT of `Pr`
-        - Pn_hat : 2D `numpy.array`, the FFT of `Pn`
+        - Pr_hat : 2D `numpy.array`, the real-to-complex FFT of `Pr` (the
+          half of the spectrum computed by `numpy.fft.rfft2`)
+        - Pn_hat : 2D `numpy.array`, the real-to-complex FFT of `Pn`
         - denom : 2D `numpy.array`, the denominator of equation (13) in ZOGY (2016) manuscript
         - Fd : `float`, the relative flux scaling factor between science and template
         """
@@ -362,13 +529,17 @@ class ZogyTask(pipeBase.Task):
         psf1[np.abs(psf1) <= MIN_KERNEL] = MIN_KERNEL
         psf2[np.abs(psf2) <= MIN_KERNEL] = MIN_KERNEL
 
-        sigR, sigN = self.sig1, self.sig2
-        Pr_hat = np.fft.fft2(Pr)
-        Pr_hat2 = np.conj(Pr_hat) * Pr_hat
-        Pn_hat = np.fft.fft2(Pn)
+        # Python floats, which do not promote single-precision arrays
+        sigR, sigN = float(self.sig1), float(self.sig2)
+
+        def transformPr():
+            Pr_hat = self._fft.rfft2(Pr)
+            return Pr_hat, np.conj(Pr_hat) * Pr_hat
+        Pr_hat, Pr_hat2 = self._getTemplateTransforms('psf', transformPr, Pr)
+        Pn_hat = self._fft.rfft2(Pn)
         Pn_hat2 = np.conj(Pn_hat) * Pn_hat
         denom = np.sqrt((sigN**2 * self.Fr**2 * Pr_hat2) + (sigR**2 * self.Fn**2 * Pn_hat2))
-        Fd = self.Fr * self.Fn / np.sqrt(sigN**2 * self.Fr**2 + sigR**2 * self.Fn**2)
+        Fd = self.Fr * self.Fn / float(np.sqrt(sigN**2 * self.Fr**2 + sigR**2 * self.Fn**2))
 
         res = pipeBase.Struct(
             Pr=Pr, Pn=Pn, Pr_hat=Pr_hat, Pn_hat=Pn_hat, denom=denom, Fd=Fd
@@ -411,12 +582,277 @@ class ZogyTask(pipeBase.Task):
             - ``D`` : 2D `numpy.array`, the proper image difference
             - ``D_var`` : 2D `numpy.array`, the variance image for `D`
         """
+        return self._computeFromTransforms(
+            lambda transforms: self._computeDiffimFromTransforms(
+                transforms, debug=debug, returnMatchedTemplate=returnMatchedTemplate))
+
+    def _fixNonFiniteImages(self):
+        """Replace (in place) the non-finite pixels of the images and
+        variances by the mean of their other pixels, as FFTs do not handle them
+        """
+        def fix_nans(im):
+            """Replace any NaNs or Infs with the mean of the image."""
+            isbad = ~np.isfinite(im)
+            if np.any(isbad):
+                im[isbad] = np.nan
+                im[isbad] = np.nanmean(im)
+            return im
+
+        self.im1 = fix_nans(self.im1)
+        self.im2 = fix_nans(self.im2)
+        self.im1_var = fix_nans(self.im1_var)
+        self.im2_var = fix_nans(self.im2_var)
+
+    def _computeFromTransforms(self, compute, returnDiffimPsf=False, allowOverlapSave=False):
+        """Return ``compute(transforms)`` for the output of `_computeImageTransforms`,
+        with the diffim PSF computed from the same PSF transforms as ``Pd`` if
+        ``returnDiffimPsf`` is set
+
+        If ``allowOverlapSave`` is set and the images do not fit in one tile
+        of ``config.overlapSaveTileSize``, this is computed block-wise with
+        `_computeOverlapSave`.
+
+        Raises
+        ------
+        ValueError
+            Raised if the images do not fit in one tile, but ``compute`` does
+            not allow the overlap-save mode.
+        """
+        tileSize = self.config.overlapSaveTileSize
+        if tileSize > 0 and any(n > tileSize for n in self.im1.shape):
+            if not allowOverlapSave:
+                raise ValueError("The overlap-save mode (overlapSaveTileSize=%d) only computes the "
+                                 "likelihood image: the diffim kernels are not compact" % (tileSize,))
+            return self._computeOverlapSave(compute, tileSize, self._getOverlapSaveMargin(tileSize))
+        transforms = self._computeImageTransforms()
+        res = compute(transforms)
+        if returnDiffimPsf:
+            res.Pd = self._computeDiffimPsfFromPrereqs(transforms.preqs, transforms.shape)
+        return res
+
+    def _getOverlapSaveMargin(self, tileSize):
+        """Return the overlap-save margin for tiles of ``tileSize``: the
+        support of the kernels of the likelihood image `S`
+
+        The kernels are computed on a tile, without their constant
+        component (see `_computeScorrTileConstants`), and their support is the
+        largest distance (in either dimension) from their peak at which they
+        exceed ``config.overlapSaveTolerance`` of it. The kernels of the
+        variance of `S` are their squares, which are more compact.
+        """
+        shape = self._getFftShape([tileSize, tileSize])
+        preqs = self.computePrereqs(ZogyTask._padPsfToSize(self.im1_psf, shape),
+                                    ZogyTask._padPsfToSize(self.im2_psf, shape), padSize=0)
+        support = 0
+        for K_hat in self._computeScorrKernels(preqs.Pr_hat, preqs.Pn_hat, preqs.denom**2.):
+            K = self._fft.irfft2(K_hat, shape)
+            peak = np.unravel_index(np.argmax(np.abs(K)), shape)
+            # Distances from the peak, wrapping around the tile
+            dist = [np.minimum(np.abs(np.arange(n) - p), n - np.abs(np.arange(n) - p))
+                    for n, p in zip(shape, peak)]
+            dist = np.maximum(dist[0][:, np.newaxis], dist[1][np.newaxis, :])
+            K = np.abs(K - np.median(K[dist == dist.max()]))
+            support = max(support, dist[K > self.config.overlapSaveTolerance*K.max()].max())
+        return int(support) + 1
+
+    def _computeDiffimPsfFromPrereqs(self, preqs, shape):
+        """Compute the diffim PSF (see `computeDiffimPsf`) from the
+        `computePrereqs` ``preqs`` of the PSFs padded to ``shape``, cropped
+        back to the dimensions and centring of the PSFs
+
+        Its wings are not wrapped around the PSF dimensions, so it differs from
+        the output of `computeDiffimPsf` by up to ~1% of its peak at the edges.
+        """
+        Pd_hat = self.Fr * self.Fn * preqs.Pr_hat * preqs.Pn_hat / (preqs.Fd * preqs.denom)
+        Pd = np.fft.ifftshift(self._fft.irfft2(Pd_hat, shape))
+        # The PSFs are padded with an offset of n//2 - m//2 - 1, which the
+        # product doubles, and the shift is by n//2 rather than m//2.
+        index = [(np.arange(m) + n//2 - m//2 - 2) % n for m, n in zip(self.im1_psf.shape, shape)]
+        return Pd[np.ix_(*index)]
+
+    def _computeImageTransforms(self):
+        """Compute the FFTs of the images, variances and PSFs shared by the
+        Fourier-space methods
+
+        Non-finite pixels of the images and variances are replaced (in place)
+        by the mean of the other pixels, as FFTs do not handle them.
+
+        Returns
+        -------
+        result : `lsst.pipe.base.Struct`
+            Result struct with components:
+
+            - ``imShape`` : dimensions of the images
+            - ``shape`` : dimensions of the (padded) transformed images
+            - ``conjugateShift`` : shift of the products with conjugate PSF
+              transforms (see `_inverseTransform`)
+            - ``globalSums`` : for overlap-save tiles, the sums of the images
+              and variances padded to the global transform dimensions and its area (see
+              `_computeScorrTileConstants`), otherwise `None`
+            - ``preqs`` : the `computePrereqs` of the PSFs padded to ``shape``
+            - ``R_hat``, ``N_hat`` : FFTs of the template and science images
+            - ``R_var_hat``, ``N_var_hat`` : FFTs of their variances
+        """
+        self._fixNonFiniteImages()
+
         # Do all in fourier space (needs image-sized PSFs)
-        psf1 = ZogyTask._padPsfToSize(self.im1_psf, self.im1.shape)
-        psf2 = ZogyTask._padPsfToSize(self.im2_psf, self.im2.shape)
+        imShape = self.im1.shape
+        shape = self._getFftShape(imShape)
+        psf1 = ZogyTask._padPsfToSize(self.im1_psf, shape)
+        psf2 = ZogyTask._padPsfToSize(self.im2_psf, shape)
+        preqs = self.computePrereqs(psf1, psf2, padSize=0)  # already padded the PSFs
+
+        def transform(im):
+            return self._fft.rfft2(self._padImageToSize(im, shape))
+
+        R_hat, R_var_hat = self._getTemplateTransforms(
+            'image%s' % (shape,), lambda: (transform(self.im1), transform(self.im1_var)),
+            self.im1, self.im1_var)
+        return pipeBase.Struct(imShape=imShape, shape=shape,
+                               conjugateShift=self._getConjugateShift(shape), globalSums=None,
+                               preqs=preqs,
+                               R_hat=R_hat, N_hat=transform(self.im2),
+                               R_var_hat=R_var_hat, N_var_hat=transform(self.im2_var))
+
+    @staticmethod
+    def _sumPaddedImage(im, shape):
+        """Return the sum of ``im`` padded to ``shape`` by `_padImageToSize`,
+        without making the padded copy
+        """
+        weights = [np.bincount(np.pad(np.arange(m), (0, n - m), mode='symmetric'), minlength=m)
+                   for m, n in zip(im.shape, shape)]
+        return float(weights[0].dot(im).dot(weights[1]))
+
+    @staticmethod
+    def _extractBlock(im, corner, shape, margin):
+        """Return the block of ``im`` of dimensions ``shape`` starting ``margin``
+        pixels before ``corner`` in y and x, mirroring ``im`` about its edges
+        where the block extends beyond them
+        """
+        begin = [c - margin for c in corner]
+        end = [b + n for b, n in zip(begin, shape)]
+        block = im[tuple(slice(max(b, 0), min(e, n)) for b, e, n in zip(begin, end, im.shape))]
+        padWidths = [(max(-b, 0), max(e - n, 0)) for b, e, n in zip(begin, end, im.shape)]
+        if not any(before or after for before, after in padWidths):
+            return block
+        return np.pad(block, padWidths, mode='symmetric')
+
+    def _computeOverlapSave(self, compute, tileSize, margin):
+        """Compute ``compute(transforms)`` (see `_computeFromTransforms`) by
+        overlap-save, one tile at a time
+
+        Each tile of the images of dimensions ``tileSize`` (or the next fast
+        FFT length), extended by ``margin`` pixels on all sides, is transformed
+        and passed to ``compute`` in place of the whole image; the central,
+        unextended part of each of its outputs is kept. Only one tile's
+        transforms are held at a time.
+
+        This is only valid for the likelihood image `S` and its variance,
+        whose kernels are compact (see `_getOverlapSaveMargin`) but for a
+        constant component, due to the `MIN_KERNEL` floor of the padded PSFs,
+        which is corrected for (see `_computeScorrTileConstants`). The products
+        with conjugate PSF transforms are shifted as for the global transform
+        (see `_inverseTransform`). The images are mirrored about all their
+        edges rather than wrapping around, so the results differ from the
+        global transform within ``margin`` of the edges only.
+
+        Parameters
+        ----------
+        compute : callable
+            function of the output of `_computeImageTransforms`, returning a
+            `lsst.pipe.base.Struct` of arrays of the image dimensions (or `None`)
+        tileSize : `int`
+            dimensions of the tiles transformed, including their margins
+        margin : `int`
+            overlap of the tiles on each side
+
+        Returns
+        -------
+        result : `lsst.pipe.base.Struct`
+            The output of ``compute``, assembled from the tiles.
 
+        Raises
+        ------
+        ValueError
+            Raised if ``tileSize`` does not exceed twice ``margin``.
+        """
+        if tileSize <= 2*margin:
+            raise ValueError("overlapSaveTileSize (%d) must exceed twice the kernel support (%d)" %
+                             (tileSize, margin))
+        self._fixNonFiniteImages()
+
+        imShape = self.im1.shape
+        shape = self._getFftShape([min(tileSize, n + 2*margin) for n in imShape])
+        coreShape = [n - 2*margin for n in shape]
+        psf1 = ZogyTask._padPsfToSize(self.im1_psf, shape)
+        psf2 = ZogyTask._padPsfToSize(self.im2_psf, shape)
         preqs = self.computePrereqs(psf1, psf2, padSize=0)  # already padded the PSFs
 
+        conjugateShift = self._getConjugateShift(shape)
+        globalShape = self._getFftShape(imShape)
+        globalSums = pipeBase.Struct(area=float(np.prod(globalShape)),
+                                     R=self._sumPaddedImage(self.im1, globalShape),
+                                     N=self._sumPaddedImage(self.im2, globalShape),
+                                     R_var=self._sumPaddedImage(self.im1_var, globalShape),
+                                     N_var=self._sumPaddedImage(self.im2_var, globalShape))
+
+        def transform(im, corner):
+            return self._fft.rfft2(self._extractBlock(im, corner, shape, margin))
+
+        outputs = {}
+        for y0 in range(0, imShape[0], coreShape[0]):
+            for x0 in range(0, imShape[1], coreShape[1]):
+                corner = (y0, x0)
+                transforms = pipeBase.Struct(imShape=shape, shape=shape,
+                                             conjugateShift=conjugateShift, globalSums=globalSums,
+                                             preqs=preqs,
+                                             R_hat=transform(self.im1, corner),
+                                             N_hat=transform(self.im2, corner),
+                                             R_var_hat=transform(self.im1_var, corner),
+                                             N_var_hat=transform(self.im2_var, corner))
+                res = compute(transforms)
+                for name, arr in res.getDict().items():
+                    if arr is None:
+                        outputs[name] = None
+                        continue
+                    if name not in outputs:
+                        outputs[name] = np.empty(imShape, dtype=arr.dtype)
+                    out = outputs[name][y0:y0 + coreShape[0], x0:x0 + coreShape[1]]
+                    out[:, :] = arr[margin:margin + out.shape[0], margin:margin + out.shape[1]]
+        return pipeBase.Struct(**outputs)
+
+    def _getConjugateShift(self, shape):
+        """Return the shift that puts the inverse transforms of dimensions
+        ``shape`` of products with conjugate PSF transforms where the transform
+        of the image dimensions puts them (see `_inverseTransform`)
+        """
+        return [m % 2 - n % 2 for m, n in zip(self.im1.shape, shape)]
+
+    def _inverseTransform(self, im_hat, transforms, conjugate=False):
+        """Inverse-FFT ``im_hat``, shift it back into place and crop it to the image dimensions
+
+        The PSFs are centred at ``n//2 - 1`` along each transformed dimension
+        ``n``, which `numpy.fft.ifftshift` undoes independently of ``n``. Products
+        with the conjugate transform of a PSF, flagged by ``conjugate`` (those of
+        the likelihood image `S` and its variance), are instead centred at
+        ``-(n//2 - 1)``, so after the shift they land one pixel further for odd
+        ``n`` than for even ``n``. They are rolled by ``transforms.conjugateShift``
+        to where the transform of the unpadded image dimensions puts them, so
+        padded and tiled transforms agree with it.
+        """
+        imShape = transforms.imShape
+        im = np.fft.ifftshift(self._fft.irfft2(im_hat, transforms.shape))
+        if conjugate and any(transforms.conjugateShift):
+            im = np.roll(im, transforms.conjugateShift, axis=(0, 1))
+        return im[:imShape[0], :imShape[1]]
+
+    def _computeDiffimFromTransforms(self, transforms, debug=False, returnMatchedTemplate=False):
+        """Compute the ZOGY diffim `D` (see `computeDiffimFourierSpace`) from
+        the output of `_computeImageTransforms`
+        """
+        shape = transforms.shape
+        preqs = transforms.preqs
+
         def _filterKernel(K, trim_amount):
             # Filter the wings of Kn, Kr, set to zero
             ps = trim_amount
@@ -429,43 +865,23 @@ class ZogyTask(pipeBase.Task):
         if debug and self.config.doTrimKernels:  # default False
             # Suggestion from Barak to trim Kr and Kn to remove artifacts
             # Here we just filter them (in image space) to keep them the same size
-            ps = (Kn_hat.shape[1] - 80)//2
-            Kn = _filterKernel(np.fft.ifft2(Kn_hat), ps)
-            Kn_hat = np.fft.fft2(Kn)
-            Kr = _filterKernel(np.fft.ifft2(Kr_hat), ps)
-            Kr_hat = np.fft.fft2(Kr)
-
-        def processImages(im1, im2, doAdd=False):
-            # Some masked regions are NaN or infinite!, and FFTs no likey.
-            im1[np.isinf(im1)] = np.nan
-            im1[np.isnan(im1)] = np.nanmean(im1)
-            im2[np.isinf(im2)] = np.nan
-            im2[np.isnan(im2)] = np.nanmean(im2)
-
-            R_hat = np.fft.fft2(im1)
-            N_hat = np.fft.fft2(im2)
-
-            D_hat = Kr_hat * N_hat
-            D_hat_R = Kn_hat * R_hat
-            if not doAdd:
-                D_hat -= D_hat_R
-            else:
-                D_hat += D_hat_R
-
-            D = np.fft.ifft2(D_hat)
-            D = np.fft.ifftshift(D.real) / preqs.Fd
-
-            R = None
-            if returnMatchedTemplate:
-                R = np.fft.ifft2(D_hat_R)
-                R = np.fft.ifftshift(R.real) / preqs.Fd
-
-            return D, R
+            ps = (shape[1] - 80)//2
+            Kn = _filterKernel(self._fft.irfft2(Kn_hat, shape), ps)
+            Kn_hat = self._fft.rfft2(Kn)
+            Kr = _filterKernel(self._fft.irfft2(Kr_hat, shape), ps)
+            Kr_hat = self._fft.rfft2(Kr)
 
         # First do the image
-        D, R = processImages(self.im1, self.im2, doAdd=False)
+        R_hat = Kn_hat * transforms.R_hat
+        D = self._inverseTransform(Kr_hat * transforms.N_hat - R_hat, transforms) / preqs.Fd
         # Do the exact same thing to the var images, except add them
-        D_var, R_var = processImages(self.im1_var, self.im2_var, doAdd=True)
+        R_var_hat = Kn_hat * transforms.R_var_hat
+        D_var = self._inverseTransform(Kr_hat * transforms.N_var_hat + R_var_hat, transforms) / preqs.Fd
+
+        R = R_var = None
+        if returnMatchedTemplate:
+            R = self._inverseTransform(R_hat, transforms) / preqs.Fd
+            R_var = self._inverseTransform(R_var_hat, transforms) / preqs.Fd
 
         return pipeBase.Struct(D=D, D_var=D_var, R=R, R_var=R_var)
 
@@ -538,9 +954,9 @@ class ZogyTask(pipeBase.Task):
             delta = 1.  # Regularize the ratio, a possible option to remove artifacts
         Kr_hat = (preqs.Pr_hat + delta) / (preqs.denom + delta)
         Kn_hat = (preqs.Pn_hat + delta) / (preqs.denom + delta)
-        Kr = np.fft.ifft2(Kr_hat).real
+        Kr = self._fft.irfft2(Kr_hat, preqs.Pr.shape)
         Kr = np.roll(np.roll(Kr, -1, 0), -1, 1)
-        Kn = np.fft.ifft2(Kn_hat).real
+        Kn = self._fft.irfft2(Kn_hat, preqs.Pn.shape)
         Kn = np.roll(np.roll(Kn, -1, 0), -1, 1)
 
         def _trimKernel(self, K, trim_amount):
@@ -618,7 +1034,7 @@ class ZogyTask(pipeBase.Task):
             if returnMatchedTemplate:
                 R = res.R
         else:
-            res = self.computeDiffimFourierSpace(**kwargs)
+            res = self.computeDiffimFourierSpace(returnMatchedTemplate=returnMatchedTemplate, **kwargs)
             D = self.science.clone()
             D.getMaskedImage().getImage().getArray()[:, :] = res.D
             D.getMaskedImage().getVariance().getArray()[:, :] = res.D_var
@@ -648,7 +1064,7 @@ class ZogyTask(pipeBase.Task):
         Returns
         -------
         Pd : 2D `numpy.array`
-            The diffim PSF (or FFT of PSF if `keepFourier=True`)
+            The diffim PSF (or its real-to-complex FFT if `keepFourier=True`)
         """
         preqs = self.computePrereqs(psf1=psf1, psf2=psf2, padSize=padSize)
 
@@ -658,14 +1074,14 @@ class ZogyTask(pipeBase.Task):
         if keepFourier:
             return Pd_hat
 
-        Pd = np.fft.ifft2(Pd_hat)
-        Pd = np.fft.ifftshift(Pd).real
+        Pd = self._fft.irfft2(Pd_hat, preqs.Pr.shape)
+        Pd = np.fft.ifftshift(Pd)
 
         return Pd
 
     def _computeVarAstGradients(self, xVarAst=0., yVarAst=0., inImageSpace=False,
                                 R_hat=None, Kr_hat=None, Kr=None,
-                                N_hat=None, Kn_hat=None, Kn=None):
+                                N_hat=None, Kn_hat=None, Kn=None, transforms=None):
         """Compute the astrometric noise correction terms
 
         Compute the correction for estimated astrometric noise as
@@ -679,7 +1095,7 @@ class ZogyTask(pipeBase.Task):
         inImageSpace : `bool`
            Perform all convolutions in real (image) space rather than Fourier space
         R_hat : 2-D `numpy.array`
-           (Optional) FFT of template image, only required if `inImageSpace=False`
+           (Optional) real-to-complex FFT of template image, only required if `inImageSpace=False`
         Kr_hat : 2-D `numpy.array`
            FFT of Kr kernel (eq. 28 of ZOGY (2016)), only required if `inImageSpace=False`
         Kr : 2-D `numpy.array`
@@ -692,6 +1108,10 @@ class ZogyTask(pipeBase.Task):
         Kn : 2-D `numpy.array`
            Kn kernel (eq. 29 of ZOGY (2016)), only required if `inImageSpace=True`.
            Kn is associated with the science (new) image.
+        transforms : `lsst.pipe.base.Struct`
+           The output of `_computeImageTransforms` of which `R_hat` and `N_hat`
+           are part, only required if `inImageSpace=False`. The convolved images
+           are then shifted into place and cropped like the likelihood image.
 
         Returns
         -------
@@ -704,7 +1124,7 @@ class ZogyTask(pipeBase.Task):
                 S_R, _ = self._doConvolve(self.template, Kr)
                 S_R = S_R.getMaskedImage().getImage().getArray()
             else:
-                S_R = np.fft.ifft2(R_hat * Kr_hat)
+                S_R = self._inverseTransform(R_hat * Kr_hat, transforms, conjugate=True)
             gradRx, gradRy = np.gradient(S_R)
             VastSR = xVarAst * gradRx**2. + yVarAst * gradRy**2.
 
@@ -712,7 +1132,7 @@ class ZogyTask(pipeBase.Task):
                 S_N, _ = self._doConvolve(self.science, Kn)
                 S_N = S_N.getMaskedImage().getImage().getArray()
             else:
-                S_N = np.fft.ifft2(N_hat * Kn_hat)
+                S_N = self._inverseTransform(N_hat * Kn_hat, transforms, conjugate=True)
             gradNx, gradNy = np.gradient(S_N)
             VastSN = xVarAst * gradNx**2. + yVarAst * gradNy**2.
 
@@ -742,61 +1162,206 @@ class ZogyTask(pipeBase.Task):
             - ``S_var`` : the corrected variance image (denominator of eq. 25 of ZOGY (2016))
             - ``Dpsf`` : the PSF of the diffim D, likely never to be used.
         """
-        # Some masked regions are NaN or infinite!, and FFTs no likey.
-        def fix_nans(im):
-            """Replace any NaNs or Infs with the mean of the image."""
-            isbad = ~np.isfinite(im)
-            if np.any(isbad):
-                im[isbad] = np.nan
-                im[isbad] = np.nanmean(im)
-            return im
-
-        self.im1 = fix_nans(self.im1)
-        self.im2 = fix_nans(self.im2)
-        self.im1_var = fix_nans(self.im1_var)
-        self.im2_var = fix_nans(self.im2_var)
-
-        # Do all in fourier space (needs image-sized PSFs)
-        psf1 = ZogyTask._padPsfToSize(self.im1_psf, self.im1.shape)
-        psf2 = ZogyTask._padPsfToSize(self.im2_psf, self.im2.shape)
-
-        preqs = self.computePrereqs(psf1, psf2, padSize=0)  # already padded the PSFs
-
-        # Compute D_hat here (don't need D then, for speed)
-        R_hat = np.fft.fft2(self.im1)
-        N_hat = np.fft.fft2(self.im2)
-        D_hat = self.Fr * preqs.Pr_hat * N_hat - self.Fn * preqs.Pn_hat * R_hat
-        D_hat /= preqs.denom
+        res = self._computeFromTransforms(
+            lambda transforms: self._computeScorrFromTransforms(transforms, xVarAst=xVarAst,
+                                                                yVarAst=yVarAst),
+            allowOverlapSave=True)
+        res.Dpsf = self.computeDiffimPsf(padSize=0)
+        return res
 
-        Pd_hat = self.computeDiffimPsf(padSize=0, keepFourier=True, psf1=psf1, psf2=psf2)
-        Pd_bar = np.conj(Pd_hat)
-        S = np.fft.ifft2(D_hat * Pd_bar)
+    def _computeScorrFromTransforms(self, transforms, xVarAst=0., yVarAst=0.):
+        """Compute the ZOGY likelihood image `S` and its corrected variance
+        (see `computeScorrFourierSpace`) from the output of `_computeImageTransforms`
+        """
+        shape = transforms.shape
+        preqs = transforms.preqs
+        R_hat, N_hat = transforms.R_hat, transforms.N_hat
 
         # Adjust the variance planes of the two images to contribute to the final detection
         # (eq's 26-29).
-        Pn_hat2 = np.conj(preqs.Pn_hat) * preqs.Pn_hat
-        Kr_hat = self.Fr * self.Fn**2. * np.conj(preqs.Pr_hat) * Pn_hat2 / preqs.denom**2.
-        Pr_hat2 = np.conj(preqs.Pr_hat) * preqs.Pr_hat
-        Kn_hat = self.Fn * self.Fr**2. * np.conj(preqs.Pn_hat) * Pr_hat2 / preqs.denom**2.
+        Kr_hat, Kn_hat = self._computeScorrKernels(preqs.Pr_hat, preqs.Pn_hat, preqs.denom**2.)
 
-        Kr_hat2 = np.fft.fft2(np.fft.ifft2(Kr_hat)**2.)
-        Kn_hat2 = np.fft.fft2(np.fft.ifft2(Kn_hat)**2.)
-        var1c_hat = Kr_hat2 * np.fft.fft2(self.im1_var)
-        var2c_hat = Kn_hat2 * np.fft.fft2(self.im2_var)
+        if transforms.globalSums is not None:
+            offset, varOffset, Kr, Kn = self._computeScorrTileOffsets(transforms, Kr_hat, Kn_hat)
+        else:
+            offset, varOffset = 0., 0.
+            Kr, Kn = self._fft.irfft2(Kr_hat, shape), self._fft.irfft2(Kn_hat, shape)
+        Kr_hat2 = self._fft.rfft2(Kr**2.)
+        Kn_hat2 = self._fft.rfft2(Kn**2.)
+        var1c_hat = Kr_hat2 * transforms.R_var_hat
+        var2c_hat = Kn_hat2 * transforms.N_var_hat
 
         # Do the astrometric variance correction
         fGradR, fGradN = self._computeVarAstGradients(xVarAst, yVarAst, inImageSpace=False,
                                                       R_hat=R_hat, Kr_hat=Kr_hat,
-                                                      N_hat=N_hat, Kn_hat=Kn_hat)
+                                                      N_hat=N_hat, Kn_hat=Kn_hat, transforms=transforms)
 
-        S_var = np.sqrt(np.fft.ifftshift(np.fft.ifft2(var1c_hat + var2c_hat)) + fGradR + fGradN)
+        # Negative values (from ringing) have zero variance, as the real part of their complex sqrt
+        S_var = self._inverseTransform(var1c_hat + var2c_hat, transforms, conjugate=True) + fGradR + fGradN
+        S_var += varOffset
+        S_var = np.sqrt(np.maximum(S_var, 0.))
         S_var *= preqs.Fd
 
-        S = np.fft.ifftshift(np.fft.ifft2(Kn_hat * N_hat - Kr_hat * R_hat))
+        S = self._inverseTransform(Kn_hat * N_hat - Kr_hat * R_hat, transforms, conjugate=True)
+        S += offset
         S *= preqs.Fd
 
-        Pd = self.computeDiffimPsf(padSize=0)
-        return pipeBase.Struct(S=S.real, S_var=S_var.real, Dpsf=Pd)
+        return pipeBase.Struct(S=S, S_var=S_var)
+
+    def _computeScorrKernels(self, Pr_hat, Pn_hat, denom2):
+        """Return the FFTs of the kernels ``Kr_hat``, ``Kn_hat`` of the
+        likelihood image `S` (eqs. 26-29 of ZOGY (2016)), given the PSF FFTs
+        and the square ``denom2`` of the denominator of eq. 13
+        """
+        Pn_hat2 = np.conj(Pn_hat) * Pn_hat
+        Kr_hat = self.Fr * self.Fn**2. * np.conj(Pr_hat) * Pn_hat2 / denom2
+        Pr_hat2 = np.conj(Pr_hat) * Pr_hat
+        Kn_hat = self.Fn * self.Fr**2. * np.conj(Pn_hat) * Pr_hat2 / denom2
+        return Kr_hat, Kn_hat
+
+    def _computeScorrTileConstants(self, transforms, Kr_hat, Kn_hat):
+        """Return the constant components of the kernels of `S` of an
+        overlap-save tile, and those of the global transform
+
+        The PSFs padded to the transformed dimensions are floored at
+        `MIN_KERNEL` over the whole domain, which adds `MIN_KERNEL` times its
+        area to the DC term of their FFTs. The kernels of `S` then have a
+        constant component, so `S` includes a multiple of the sums of the images
+        over the domain: those of the tile rather than those of the whole
+        (padded) image. This is the only part of the kernels of `S` that is not
+        local, so it is replaced with its value for the global transform.
+
+        Returns
+        -------
+        result : `lsst.pipe.base.Struct`
+            Result struct with components ``Kr``, ``Kn`` (those of the tile)
+            and ``KrGlobal``, ``KnGlobal`` (those of the global transform).
+        """
+        preqs = transforms.preqs
+        sigR, sigN = float(self.sig1), float(self.sig2)
+        tileArea = float(np.prod(transforms.shape))
+        globalArea = transforms.globalSums.area
+
+        def dcKernels(pedestal):
+            """Return the DC terms of the kernels of `S`, for PSFs floored over
+            a domain of area ``pedestal/MIN_KERNEL`` rather than over the tile
+            """
+            Pr0 = preqs.Pr_hat[0, 0].real - MIN_KERNEL*tileArea + pedestal
+            Pn0 = preqs.Pn_hat[0, 0].real - MIN_KERNEL*tileArea + pedestal
+            denom2 = sigN**2 * self.Fr**2 * Pr0**2 + sigR**2 * self.Fn**2 * Pn0**2
+            return self._computeScorrKernels(Pr0, Pn0, denom2)
+
+        # The DC terms of the kernels without their constant components, and for the whole image
+        Kr0, Kn0 = dcKernels(0.)
+        KrGlobal, KnGlobal = dcKernels(MIN_KERNEL*globalArea)
+        return pipeBase.Struct(Kr=(Kr_hat[0, 0].real - Kr0)/tileArea, Kn=(Kn_hat[0, 0].real - Kn0)/tileArea,
+                               KrGlobal=(KrGlobal - Kr0)/globalArea, KnGlobal=(KnGlobal - Kn0)/globalArea)
+
+    def _computeScorrTileOffsets(self, transforms, Kr_hat, Kn_hat):
+        """Return the offsets that make the (unscaled) `S` of an overlap-save
+        tile, and the variance of `S`, match those of the global transform,
+        and the kernels of `S` in real space with the constant components
+        of the global transform (see `_computeScorrTileConstants`)
+
+        The variance of `S` is the convolution of the variances with the
+        squares of the kernels, which are made of their local part, its
+        product with the constant and the square of the constant; the last
+        is the only part that is not local.
+        """
+        shape = transforms.shape
+        globalSums = transforms.globalSums
+        const = self._computeScorrTileConstants(transforms, Kr_hat, Kn_hat)
+        Kr = self._fft.irfft2(Kr_hat, shape) + (const.KrGlobal - const.Kr)
+        Kn = self._fft.irfft2(Kn_hat, shape) + (const.KnGlobal - const.Kn)
+        offset = (const.KnGlobal*globalSums.N - const.Kn*transforms.N_hat[0, 0].real -
+                  const.KrGlobal*globalSums.R + const.Kr*transforms.R_hat[0, 0].real)
+        varOffset = (const.KrGlobal**2*(globalSums.R_var - transforms.R_var_hat[0, 0].real) +
+                     const.KnGlobal**2*(globalSums.N_var - transforms.N_var_hat[0, 0].real))
+        return offset, varOffset, Kr, Kn
+
+    def computeDiffimAndScorrFourierSpace(self, xVarAst=0., yVarAst=0., returnMatchedTemplate=True,
+                                          debug=False, **kwargs):
+        """Compute the ZOGY diffim `D`, the likelihood image `S` and the
+        diffim PSF in a single pass
+
+        The FFTs of the images, variances and PSFs, and the denominator of
+        eq. 13 of ZOGY (2016), are computed once and shared by all the
+        outputs, which are as computed by `computeDiffimFourierSpace`,
+        `computeScorrFourierSpace` and `computeDiffimPsf`, except that the
+        diffim PSF is cropped from the PSFs padded to the transformed
+        dimensions (see `_computeDiffimPsfFromPrereqs`).
+
+        Parameters
+        ----------
+        xVarAst, yVarAst : `float`
+           estimated astrometric noise (variance of astrometric registration errors)
+        returnMatchedTemplate : `bool`, optional
+            Calculate the PSF-matched template image.
+            If not set, the returned template will be None.
+        debug : `bool`, optional
+            If set to True, filter the diffim kernels by setting the edges to zero.
+
+        Returns
+        -------
+        result : `lsst.pipe.base.Struct`
+            Result struct with components:
+
+            - ``D``, ``D_var`` : 2D `numpy.array`, the proper image difference and its variance
+            - ``R``, ``R_var`` : 2D `numpy.array`, the PSF-matched template and its variance
+            - ``S``, ``S_var`` : 2D `numpy.array`, the likelihood image and its corrected variance
+            - ``Pd`` : 2D `numpy.array`, the PSF of the diffim
+        """
+        def compute(transforms):
+            res = self._computeDiffimFromTransforms(transforms, debug=debug,
+                                                    returnMatchedTemplate=returnMatchedTemplate)
+            scorr = self._computeScorrFromTransforms(transforms, xVarAst=xVarAst, yVarAst=yVarAst)
+            res.mergeItems(scorr, 'S', 'S_var')
+            return res
+
+        return self._computeFromTransforms(compute, returnDiffimPsf=True)
+
+    def computeDiffimAndScorr(self, xVarAst=0., yVarAst=0., returnMatchedTemplate=True, **kwargs):
+        """Wrapper method to compute the ZOGY proper diffim, its PSF-matched
+        template and corrected likelihood image together, in Fourier space
+
+        Parameters
+        ----------
+        xVarAst, yVarAst : `float`
+           estimated astrometric noise (variance of astrometric registration errors)
+        returnMatchedTemplate : `bool`
+           Include the PSF-matched template in the results Struct
+        **kwargs
+            additional keyword arguments to be passed to
+            `computeDiffimAndScorrFourierSpace`.
+
+        Returns
+        -------
+        An lsst.pipe.base.Struct containing:
+           - D : `lsst.afw.Exposure`
+               the proper image difference, including correct variance,
+               masks, and PSF
+           - S : `lsst.afw.Exposure`
+               the likelihood exposure S (eq. 12 of ZOGY (2016)),
+               including corrected variance, masks, and PSF
+           - R : `lsst.afw.Exposure`
+               If `returnMatchedTemplate` is True, the PSF-matched template
+               exposure
+           - Pd : 2D `numpy.array`
+               the PSF of `D` and `S`
+        """
+        res = self.computeDiffimAndScorrFourierSpace(xVarAst=xVarAst, yVarAst=yVarAst,
+                                                     returnMatchedTemplate=returnMatchedTemplate, **kwargs)
+
+        def makeExposure(im, var):
+            exp = self.science.clone()
+            exp.getMaskedImage().getImage().getArray()[:, :] = im
+            exp.getMaskedImage().getVariance().getArray()[:, :] = var
+            return exp
+
+        D = self._setNewPsf(makeExposure(res.D, res.D_var), res.Pd)
+        S = self._setNewPsf(makeExposure(res.S, res.S_var), res.Pd)
+        R = makeExposure(res.R, res.R_var) if returnMatchedTemplate else None
+        return pipeBase.Struct(D=D, S=S, R=R, Pd=res.Pd)
 
     def computeScorrImageSpace(self, xVarAst=0., yVarAst=0., padSize=None, **kwargs):
         """Compute corrected likelihood image, optimal for source detection
@@ -835,14 +1400,11 @@ class ZogyTask(pipeBase.Task):
 
         # Adjust the variance planes of the two images to contribute to the final detection
         # (eq's 26-29).
-        Pn_hat2 = np.conj(preqs.Pn_hat) * preqs.Pn_hat
-        Kr_hat = self.Fr * self.Fn**2. * np.conj(preqs.Pr_hat) * Pn_hat2 / preqs.denom**2.
-        Pr_hat2 = np.conj(preqs.Pr_hat) * preqs.Pr_hat
-        Kn_hat = self.Fn * self.Fr**2. * np.conj(preqs.Pn_hat) * Pr_hat2 / preqs.denom**2.
+        Kr_hat, Kn_hat = self._computeScorrKernels(preqs.Pr_hat, preqs.Pn_hat, preqs.denom**2.)
 
-        Kr = np.fft.ifft2(Kr_hat).real
+        Kr = self._fft.irfft2(Kr_hat, preqs.Pr.shape)
         Kr = np.roll(np.roll(Kr, -1, 0), -1, 1)
-        Kn = np.fft.ifft2(Kn_hat).real
+        Kn = self._fft.irfft2(Kn_hat, preqs.Pn.shape)
         Kn = np.roll(np.roll(Kn, -1, 0), -1, 1)
         var1c, _ = self._doConvolve(self.template.getMaskedImage().getVariance(), Kr**2.)
         var2c, _ = self._doConvolve(self.science.getMaskedImage().getVariance(), Kn**2.)
@@ -1018,6 +1580,11 @@ class ZogyMapper(ZogyTask, ImageMapper):
             psf2b = _filterPsf(psf2)
 
         config = ZogyConfig()
+        config.padToFastFftSize = self.config.padToFastFftSize
+        config.fftBackend = self.config.fftBackend
+        config.fftWorkers = self.config.fftWorkers
+        config.useSinglePrecision = self.config.useSinglePrecision
+        config.templateFftCacheSize = self.config.templateFftCacheSize
         if imageSpace is True:
             config.inImageSpace = imageSpace
             config.padSize = padSize  # Don't need padding if doing all in fourier space
@@ -1060,10 +1627,19 @@ class ZogyImagePsfMatchConfig(ImagePsfMatchConfig):
         doc='ZogyMapReduce config to use when running Zogy on each sub-image (spatially-varying)',
     )
 
+    doDiffimAndScorr = pexConfig.Field(
+        dtype=bool,
+        default=False,
+        doc='When not spatially-varying and not in image space, compute the diffim, the '
+            'likelihood image and the matched template together from the same transforms, '
+            'returned as diffimExposure, scoreExposure and matchedExposure',
+    )
+
     def setDefaults(self):
         self.zogyMapReduceConfig.gridStepX = self.zogyMapReduceConfig.gridStepY = 40
         self.zogyMapReduceConfig.cellSizeX = self.zogyMapReduceConfig.cellSizeY = 41
         self.zogyMapReduceConfig.borderSizeX = self.zogyMapReduceConfig.borderSizeY = 8
+        self.zogyMapReduceConfig.fastFftBorders = True
         self.zogyMapReduceConfig.reducer.reduceOperation = 'average'
         self.zogyConfig.inImageSpace = False
 
@@ -1129,6 +1705,10 @@ class ZogyImagePsfMatchTask(ImagePsfMatchTask):
         A `lsst.pipe.base.Struct` containing these fields:
         - subtractedExposure: subtracted Exposure
         - warpedExposure: templateExposure after warping to match scienceExposure (if doWarping true)
+        If not `spatiallyVarying` and not `inImageSpace`, these are also computed together:
+        - diffimExposure: the proper image difference D
+        - scoreExposure: the corrected likelihood exposure S
+        - matchedExposure: the PSF-matched template
         """
 
         mn1 = self._computeImageMean(templateExposure)
@@ -1183,7 +1763,15 @@ class ZogyImagePsfMatchTask(ImagePsfMatchTask):
             config = self.config.zogyConfig
             task = ZogyTask(scienceExposure=scienceExposure, templateExposure=templateExposure,
                             config=config)
-            if not doPreConvolve:
+            if self.config.doDiffimAndScorr and not inImageSpace:
+                # D, S and the matched template all come from the same transforms
+                results = task.computeDiffimAndScorr(returnMatchedTemplate=True)
+                results.matchedExposure = results.R
+                results.diffimExposure = results.D
+                results.scoreExposure = results.S
+                if doPreConvolve:
+                    results.D = results.S
+            elif not doPreConvolve:
                 results = task.computeDiffim(inImageSpace=inImageSpace)
                 results.matchedExposure = results.R
             else:
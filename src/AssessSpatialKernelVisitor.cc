@@ -68,6 +68,26 @@ namespace detail {
         _coreRadius(_policy.getInt("candidateCoreRadius"))
     {};
 
+    template<typename PixelT>
+    typename AssessSpatialKernelVisitor<PixelT>::Ptr AssessSpatialKernelVisitor<PixelT>::makeWorker() const {
+        /*
+           Evaluating the spatial models changes their internal state (kernel
+           parameters, cached polynomial terms), so each worker gets its own copy
+        */
+        Ptr worker(new AssessSpatialKernelVisitor<PixelT>(
+                       std::dynamic_pointer_cast<afwMath::LinearCombinationKernel>(_spatialKernel->clone()),
+                       _spatialBackground->clone(),
+                       _policy));
+        return worker;
+    }
+
+    template<typename PixelT>
+    void AssessSpatialKernelVisitor<PixelT>::mergeWorker(AssessSpatialKernelVisitor<PixelT> const& worker) {
+        _nGood += worker._nGood;
+        _nRejected += worker._nRejected;
+        _nProcessed += worker._nProcessed;
+    }
+
     template<typename PixelT>
     void AssessSpatialKernelVisitor<PixelT>::processCandidate(
         lsst::afw::math::SpatialCellCandidate *candidate
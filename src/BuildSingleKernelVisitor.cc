@@ -123,6 +123,20 @@ namespace detail {
         _coreRadius(_policy.getInt("candidateCoreRadius"))
     {};
 
+
+    template<typename PixelT>
+    typename BuildSingleKernelVisitor<PixelT>::Ptr BuildSingleKernelVisitor<PixelT>::makeWorker() const {
+        /* Candidates are built independently; each worker only needs its own statistics and tallies */
+        Ptr worker(new BuildSingleKernelVisitor<PixelT>(*this));
+        worker->reset();
+        return worker;
+    }
+
+    template<typename PixelT>
+    void BuildSingleKernelVisitor<PixelT>::mergeWorker(BuildSingleKernelVisitor<PixelT> const& worker) {
+        _nRejected += worker._nRejected;
+        _nProcessed += worker._nProcessed;
+    }
     
     template<typename PixelT>
     void BuildSingleKernelVisitor<PixelT>::processCandidate(
@@ -9,7 +9,9 @@
  * @ingroup ip_diffim
  */
 
+#include <map>
 #include <memory>
+#include <set>
 #include "boost/timer.hpp" 
 
 #include "Eigen/Core"
@@ -142,19 +144,60 @@ namespace detail {
            you want to build a spatial model on the Pca basis, not original
            basis 
         */
-        _kernelSolution->addConstraint(kCandidate->getXCenter(),
-                                       kCandidate->getYCenter(),
-                                       kCandidate->getKernelSolution(
-                                           KernelCandidate<PixelT>::RECENT
-                                           )->getM(),
-                                       kCandidate->getKernelSolution(
-                                           KernelCandidate<PixelT>::RECENT
-                                           )->getB());
-        
+        std::shared_ptr<StaticKernelSolution<PixelT> > solution =
+            kCandidate->getKernelSolution(KernelCandidate<PixelT>::RECENT);
+        _visited.insert(kCandidate->getId());
+
+        /* A candidate kept from a previous pass only contributes again if it was refit */
+        typename std::map<int, Constraint>::iterator previous = _constraints.find(kCandidate->getId());
+        if (previous != _constraints.end()) {
+            if (previous->second.solution == solution) {
+                LOGL_DEBUG("TRACE5.ip.diffim.BuildSpatialKernelVisitor.processCandidate",
+                           "Candidate %d already constrains the solution", kCandidate->getId());
+                return;
+            }
+            Constraint const& constraint = previous->second;
+            _kernelSolution->removeConstraint(constraint.xCenter, constraint.yCenter,
+                                              constraint.mMat, constraint.bVec);
+            _constraints.erase(previous);
+        }
+
+        Constraint constraint = {kCandidate->getXCenter(), kCandidate->getYCenter(), solution,
+                                 solution->getM(), solution->getB()};
+        _kernelSolution->addConstraint(constraint.xCenter, constraint.yCenter,
+                                       constraint.mMat, constraint.bVec);
+        _constraints[kCandidate->getId()] = constraint;
+    }
+
+    /**
+     * @brief Start a new pass over the candidates
+     *
+     * @note The constraints of the previous pass are kept.  Those of the
+     * candidates that are not visited again in this pass (e.g. because they
+     * were flagged BAD) are removed from the spatial solution in
+     * solveLinearEquation(), so the same visitor can be reused across the
+     * spatial rejection iterations without accumulating every candidate again.
+     */
+    template<typename PixelT>
+    void BuildSpatialKernelVisitor<PixelT>::reset() {
+        _nCandidates = 0;
+        _visited.clear();
     }
 
     template<typename PixelT>
     void BuildSpatialKernelVisitor<PixelT>::solveLinearEquation() {
+        for (typename std::map<int, Constraint>::iterator constraint = _constraints.begin();
+             constraint != _constraints.end(); ) {
+            if (_visited.count(constraint->first) == 0) {
+                LOGL_DEBUG("TRACE5.ip.diffim.BuildSpatialKernelVisitor.solveLinearEquation",
+                           "Removing candidate %d", constraint->first);
+                _kernelSolution->removeConstraint(constraint->second.xCenter, constraint->second.yCenter,
+                                                  constraint->second.mMat, constraint->second.bVec);
+                constraint = _constraints.erase(constraint);
+            } else {
+                ++constraint;
+            }
+        }
         _kernelSolution->solve();
     }
 
@@ -31,13 +31,20 @@
  *
  * @ingroup ip_diffim
  */
+#include <algorithm>
+#include <complex>
 #include <iostream>
+#include <list>
+#include <memory>
+#include <mutex>
 #include <numeric>
 #include <limits>
+#include <vector>
 
 #include "boost/timer.hpp" 
 
 #include "Eigen/Core"
+#include "unsupported/Eigen/FFT"
 
 #include "lsst/afw/image.h"
 #include "lsst/afw/math.h"
@@ -99,108 +106,657 @@ Eigen::MatrixXi maskToEigenMatrix(
 }
     
 
-/** 
+namespace {
+
+/* 1-d transforms of the (contiguous) columns of in into out */
+void fftColumns(Eigen::FFT<double> &fft, Eigen::MatrixXcd const &in, Eigen::MatrixXcd &out, bool inverse) {
+    out.resize(in.rows(), in.cols());
+    for (int col = 0; col < in.cols(); ++col) {
+        if (inverse) {
+            fft.inv(out.col(col).data(), in.col(col).data(), in.rows());
+        } else {
+            fft.fwd(out.col(col).data(), in.col(col).data(), in.rows());
+        }
+    }
+}
+
+/* 2-d transform of in into out, done as 1-d transforms of the columns, then of the columns of
+   the transpose.  The output is therefore transposed; transforming a transposed spectrum back
+   with fft2d restores the layout of the original array.  work is a scratch array. */
+void fft2d(Eigen::FFT<double> &fft, Eigen::MatrixXcd const &in, Eigen::MatrixXcd &out,
+           Eigen::MatrixXcd &work, bool inverse) {
+    fftColumns(fft, in, out, inverse);
+    work = out.transpose();
+    fftColumns(fft, work, out, inverse);
+}
+
+/* Transform of kernel, reflected about its center and wrapped into an ny x nx array, into
+   kernelHat, in the (transposed) layout of the output of fft2d.  wrapped and work are scratch
+   arrays. */
+void transformKernel(Eigen::FFT<double> &fft, afwMath::Kernel const &kernel, int nx, int ny,
+                     Eigen::MatrixXcd &kernelHat, Eigen::MatrixXcd &wrapped, Eigen::MatrixXcd &work) {
+    typedef afwImage::Image<afwMath::Kernel::Pixel> KernelImageT;
+
+    KernelImageT kImage(kernel.getDimensions());
+    (void)kernel.computeImage(kImage, false);
+    int const ctrX = kernel.getCtrX();
+    int const ctrY = kernel.getCtrY();
+
+    wrapped.setZero(ny, nx);
+    for (int v = 0; v != kImage.getHeight(); ++v) {
+        int u = 0;
+        int const row = ((ctrY - v) % ny + ny) % ny;
+        for (KernelImageT::x_iterator ptr = kImage.row_begin(v); ptr != kImage.row_end(v); ++ptr, ++u) {
+            wrapped(row, ((ctrX - u) % nx + nx) % nx) = *ptr;
+        }
+    }
+    fft2d(fft, wrapped, kernelHat, work, false);
+}
+
+/* Transforms of the kernels of a basis list (see transformKernel) */
+struct BasisTransforms {
+    int nx;
+    int ny;
+    afwMath::KernelList basisList;   // holds the kernels, so that their addresses identify them
+    std::vector<Eigen::MatrixXcd> kernelHats;
+};
+
+std::shared_ptr<BasisTransforms const> computeBasisTransforms(afwMath::KernelList const &basisList,
+                                                              int nx, int ny) {
+    std::shared_ptr<BasisTransforms> result(new BasisTransforms());
+    result->nx = nx;
+    result->ny = ny;
+    result->basisList = basisList;
+    result->kernelHats.reserve(basisList.size());
+
+    Eigen::FFT<double> fft;
+    Eigen::MatrixXcd wrapped;
+    Eigen::MatrixXcd work;
+    for (auto const &kernel : basisList) {
+        result->kernelHats.emplace_back();
+        transformKernel(fft, *kernel, nx, ny, result->kernelHats.back(), wrapped, work);
+    }
+    return result;
+}
+
+/* Return the basis transforms of basisList for ny x nx arrays, computing them only if they are
+   not among those of the last few basis lists and shapes requested.  The basis kernels are
+   identified by their addresses, so they must not be modified while in use. */
+std::shared_ptr<BasisTransforms const> getBasisTransforms(afwMath::KernelList const &basisList,
+                                                          int nx, int ny) {
+    static std::mutex mutex;
+    static std::list<std::shared_ptr<BasisTransforms const> > cache;   // most recently used first
+    std::size_t const maxEntries = 4;
+
+    auto const matches = [&](std::shared_ptr<BasisTransforms const> const &entry) {
+        return (entry->nx == nx) && (entry->ny == ny) && (entry->basisList == basisList);
+    };
+    {
+        std::lock_guard<std::mutex> lock(mutex);
+        auto const found = std::find_if(cache.begin(), cache.end(), matches);
+        if (found != cache.end()) {
+            cache.splice(cache.begin(), cache, found);
+            return cache.front();
+        }
+    }
+
+    /* Computed without holding the lock; another thread may insert the same entry meanwhile */
+    std::shared_ptr<BasisTransforms const> entry = computeBasisTransforms(basisList, nx, ny);
+    std::lock_guard<std::mutex> lock(mutex);
+    if (std::find_if(cache.begin(), cache.end(), matches) == cache.end()) {
+        cache.push_front(entry);
+        if (cache.size() > maxEntries) {
+            cache.pop_back();
+        }
+    }
+    return entry;
+}
+
+/* Throw unless kernel can be convolved with a width x height image in Fourier space */
+void checkFftKernel(afwMath::Kernel const &kernel, int width, int height) {
+    if (kernel.isSpatiallyVarying()) {
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError,
+                          "Basis kernels must be spatially invariant for FFT convolution");
+    }
+    if ((kernel.getWidth() > width) || (kernel.getHeight() > height)) {
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError,
+                          "Basis kernel is larger than the image to convolve");
+    }
+}
+
+/* Convolutions of an image with kernels in Fourier space (see convolveBasisFft), one kernel at
+   a time: the image is transformed once, and the transform of each kernel is either given or
+   computed into a scratch array, so that only one is held at a time */
+template <typename PixelT>
+class FftConvolver {
+public:
+    typedef afwImage::Image<afwMath::Kernel::Pixel> KernelImageT;
+
+    explicit FftConvolver(afwImage::Image<PixelT> const &image) :
+        _dimensions(image.getDimensions()),
+        _nx(nextFastFftSize(image.getWidth())),
+        _ny(nextFastFftSize(image.getHeight())) {
+        _padded = Eigen::MatrixXcd::Zero(_ny, _nx);
+        for (int y = 0; y != image.getHeight(); ++y) {
+            int x = 0;
+            for (typename afwImage::Image<PixelT>::x_iterator ptr = image.row_begin(y);
+                 ptr != image.row_end(y); ++ptr, ++x) {
+                _padded(y, x) = *ptr;
+            }
+        }
+        fft2d(_fft, _padded, _imageHat, _work, false);
+    }
+
+    int getNx() const { return _nx; }
+    int getNy() const { return _ny; }
+
+    /* Convolution of the image with kernel, whose transform (see transformKernel) is kernelHat;
+       the pixels outside shrinkBBox are 0 */
+    std::shared_ptr<KernelImageT> convolve(afwMath::Kernel const &kernel, Eigen::MatrixXcd const &kernelHat) {
+        _productHat = kernelHat.cwiseProduct(_imageHat);
+        fft2d(_fft, _productHat, _padded, _work, true);
+
+        std::shared_ptr<KernelImageT> convolved(new KernelImageT(_dimensions));
+        *convolved = 0.0;
+        afwGeom::Box2I goodBBox = kernel.shrinkBBox(convolved->getBBox(afwImage::LOCAL));
+        for (int y = goodBBox.getMinY(); y <= goodBBox.getMaxY(); ++y) {
+            int x = goodBBox.getMinX();
+            for (KernelImageT::x_iterator ptr = convolved->x_at(x, y); x <= goodBBox.getMaxX(); ++ptr, ++x) {
+                *ptr = _padded(y, x).real();
+            }
+        }
+        return convolved;
+    }
+
+    /* Convolution of the image with kernel, transformed into a scratch array */
+    std::shared_ptr<KernelImageT> convolve(afwMath::Kernel const &kernel) {
+        transformKernel(_fft, kernel, _nx, _ny, _kernelHat, _padded, _work);
+        return convolve(kernel, _kernelHat);
+    }
+
+private:
+    afwGeom::Extent2I _dimensions;
+    int _nx;
+    int _ny;
+    Eigen::FFT<double> _fft;
+    Eigen::MatrixXcd _imageHat;
+    Eigen::MatrixXcd _kernelHat;
+    Eigen::MatrixXcd _productHat;
+    Eigen::MatrixXcd _padded;
+    Eigen::MatrixXcd _work;
+};
+
+} // anonymous namespace
+
+/**
+ * @brief Smallest transform length >= n that factors into 2, 3 and 5 only
+ */
+int nextFastFftSize(int n) {
+    if (n < 1) {
+        return 1;
+    }
+    for (int m = n; ; ++m) {
+        int r = m;
+        while (r % 2 == 0) r /= 2;
+        while (r % 3 == 0) r /= 3;
+        while (r % 5 == 0) r /= 5;
+        if (r == 1) {
+            return m;
+        }
+    }
+}
+
+/**
+ * @brief Convolve an image with each kernel of a basis list using FFTs
+ *
+ * @note afwMath::convolve applies the kernel image without reflecting it,
+ *
+ *   out(x, y) = sum_{u,v} K(u, v) in(x + u - ctrX, y + v - ctrY),
+ *
+ * which is a circular convolution with the kernel reflected about its center
+ * pixel.  The image is zero-padded to a fast transform length; since only the
+ * pixels inside shrinkBBox are kept, the wrap-around of the circular
+ * convolution never reaches them.  The basis transforms for the padded shape
+ * come from getBasisTransforms, so each stamp costs one forward transform
+ * plus one inverse transform per basis kernel.
+ *
+ * @ingroup diffim
+ */
+template <typename PixelT>
+std::vector<std::shared_ptr<afwImage::Image<afwMath::Kernel::Pixel> > > convolveBasisFft(
+    lsst::afw::image::Image<PixelT> const &image,        ///< Image to convolve
+    lsst::afw::math::KernelList const &basisList         ///< Spatially invariant basis kernels
+    ) {
+    typedef afwImage::Image<afwMath::Kernel::Pixel> KernelImageT;
+
+    boost::timer t;
+    t.restart();
+
+    for (auto const &kernel : basisList) {
+        checkFftKernel(*kernel, image.getWidth(), image.getHeight());
+    }
+
+    /* Transform the image once; it is shared by all basis kernels */
+    FftConvolver<PixelT> convolver(image);
+    int const nx = convolver.getNx();
+    int const ny = convolver.getNy();
+
+    /* The basis transforms are shared by all the stamps of this shape */
+    std::shared_ptr<BasisTransforms const> basisHats = getBasisTransforms(basisList, nx, ny);
+
+    std::vector<std::shared_ptr<KernelImageT> > convolvedList;
+    convolvedList.reserve(basisList.size());
+    for (std::size_t i = 0; i != basisList.size(); ++i) {
+        convolvedList.push_back(convolver.convolve(*basisList[i], basisHats->kernelHats[i]));
+    }
+
+    double time = t.elapsed();
+    LOGL_DEBUG("TRACE4.ip.diffim.convolveBasisFft",
+               "Total compute time to convolve %d basis kernels (%d x %d transforms) : %.2f s",
+               static_cast<int>(basisList.size()), nx, ny, time);
+
+    return convolvedList;
+}
+
+namespace {
+
+/* Convolve image with kernel, in Fourier space with convolver (of image) if given and directly
+   otherwise; only the pixels inside shrinkBBox of the output are meaningful */
+template <typename PixelT>
+std::shared_ptr<afwImage::Image<afwMath::Kernel::Pixel> > convolveKernel(
+    afwImage::Image<PixelT> const &image,
+    afwMath::Kernel const &kernel,
+    FftConvolver<PixelT> *convolver
+    ) {
+    if (convolver) {
+        return convolver->convolve(kernel);
+    }
+
+    afwMath::ConvolutionControl convolutionControl;
+    convolutionControl.setDoNormalize(false);
+    std::shared_ptr<afwImage::Image<afwMath::Kernel::Pixel> > convolved(
+        new afwImage::Image<afwMath::Kernel::Pixel>(image.getDimensions()));
+    afwMath::convolve(*convolved, image, kernel, convolutionControl);
+    return convolved;
+}
+
+} // anonymous namespace
+
+/**
+ * @brief Convolve a MaskedImage with a LinearCombinationKernel via its basis decomposition
+ *
+ * @note With K(x, y) = sum_i f_i(x, y) K_i, the image is
+ *
+ *   out(x, y) = sum_i f_i(x, y) (K_i * in)(x, y),
+ *
+ * so the input is convolved once with each basis kernel and the results are
+ * combined with the spatial weights of each pixel, instead of computing the
+ * kernel image at every pixel.  The variance is sum_ij f_i f_j (K_i K_j * var),
+ * which takes a convolution per pair of basis kernels; this is cheap for the
+ * few kernels of a Pca basis but not for a large basis.  Each convolution is
+ * accumulated into the output as soon as it is made, so only one is held at a
+ * time.  With useFft, the image and variance are transformed once and the
+ * kernels one at a time, bypassing the basis transforms cache of
+ * convolveBasisFft, which is meant for the stamps of one basis: the product
+ * kernels are made anew for each call.  The output mask is
+ * the OR of the input mask over the union of the footprints of the basis
+ * kernels, which contains the footprint of the kernel at any position.  Edge
+ * pixels are set as by afw::math::convolve without doCopyEdge.
+ *
+ * @ingroup diffim
+ */
+template <typename PixelT>
+void convolveLinearCombination(
+    lsst::afw::image::MaskedImage<PixelT> &convolvedImage,    ///< Output image; same dimensions as inImage
+    lsst::afw::image::MaskedImage<PixelT> const &inImage,     ///< Image to convolve
+    lsst::afw::math::LinearCombinationKernel const &kernel,   ///< Kernel to convolve with
+    bool useFft                                               ///< Do the basis convolutions with FFTs
+    ) {
+    typedef afwImage::Image<afwMath::Kernel::Pixel> KernelImageT;
+
+    boost::timer t;
+    t.restart();
+
+    if (convolvedImage.getDimensions() != inImage.getDimensions()) {
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError,
+                          "convolvedImage and inImage must have the same dimensions");
+    }
+    if ((kernel.getWidth() > inImage.getWidth()) || (kernel.getHeight() > inImage.getHeight())) {
+        throw LSST_EXCEPT(pexExcept::InvalidParameterError, "Kernel is larger than the image to convolve");
+    }
+
+    afwMath::KernelList const &basisList = kernel.getKernelList();
+    int const nBases = basisList.size();
+
+    /* Basis kernel images and their joint footprint */
+    std::vector<std::shared_ptr<KernelImageT> > basisImages;
+    for (auto const &basis : basisList) {
+        std::shared_ptr<KernelImageT> kImage(new KernelImageT(basis->getDimensions()));
+        (void)basis->computeImage(*kImage, false);
+        basisImages.push_back(kImage);
+    }
+    std::vector<std::pair<int, int> > footprint;
+    for (int v = 0; v < kernel.getHeight(); ++v) {
+        for (int u = 0; u < kernel.getWidth(); ++u) {
+            for (auto const &kImage : basisImages) {
+                if ((*kImage)(u, v) != 0.0) {
+                    footprint.push_back(std::make_pair(u - kernel.getCtrX(), v - kernel.getCtrY()));
+                    break;
+                }
+            }
+        }
+    }
+
+    std::unique_ptr<FftConvolver<PixelT> > imageConvolver;
+    std::unique_ptr<FftConvolver<afwImage::VariancePixel> > varianceConvolver;
+    if (useFft) {
+        for (auto const &basis : basisList) {
+            checkFftKernel(*basis, inImage.getWidth(), inImage.getHeight());
+        }
+        imageConvolver.reset(new FftConvolver<PixelT>(*inImage.getImage()));
+        varianceConvolver.reset(new FftConvolver<afwImage::VariancePixel>(*inImage.getVariance()));
+    }
+
+    afwGeom::Box2I goodBBox = kernel.shrinkBBox(inImage.getBBox(afwImage::LOCAL));
+    int const minX = goodBBox.getMinX();
+    int const maxX = goodBBox.getMaxX();
+    int const x0 = inImage.getX0();
+    int const y0 = inImage.getY0();
+
+    bool const isSpatiallyVarying = kernel.isSpatiallyVarying();
+    std::vector<afwMath::Kernel::SpatialFunctionPtr> spatialFunctions;
+    std::vector<double> weights(nBases);
+    if (isSpatiallyVarying) {
+        for (int i = 0; i < nBases; ++i) {
+            spatialFunctions.push_back(kernel.getSpatialFunction(i));
+        }
+    } else {
+        weights = kernel.getKernelParameters();
+    }
+    auto const getWeight = [&](int i, double xPos, double yPos) {
+        return isSpatiallyVarying ? (*spatialFunctions[i])(xPos, yPos) : weights[i];
+    };
+
+    /* Accumulate the convolutions of the image with each basis kernel, and of the variance with
+       each pair of them, weighted by f_i and f_i f_j; f_i is kept in weightImage meanwhile */
+    KernelImageT value(inImage.getDimensions());
+    KernelImageT variance(inImage.getDimensions());
+    KernelImageT weightImage(inImage.getDimensions());
+    value = 0.0;
+    variance = 0.0;
+    for (int i = 0; i < nBases; ++i) {
+        std::shared_ptr<KernelImageT> convolved =
+            convolveKernel(*inImage.getImage(), *basisList[i], imageConvolver.get());
+        for (int y = goodBBox.getMinY(); y <= goodBBox.getMaxY(); ++y) {
+            double const yPos = afwImage::indexToPosition(y + y0);
+            KernelImageT::x_iterator convolvedPtr = convolved->x_at(minX, y);
+            KernelImageT::x_iterator weightPtr = weightImage.x_at(minX, y);
+            KernelImageT::x_iterator valuePtr = value.x_at(minX, y);
+            for (int x = minX; x <= maxX; ++x, ++convolvedPtr, ++weightPtr, ++valuePtr) {
+                *weightPtr = getWeight(i, afwImage::indexToPosition(x + x0), yPos);
+                *valuePtr += *weightPtr * *convolvedPtr;
+            }
+        }
+
+        for (int j = i; j < nBases; ++j) {
+            KernelImageT product(*basisImages[i], true);
+            product *= *basisImages[j];
+            afwMath::FixedKernel productKernel(product);
+            productKernel.setCtr(kernel.getCtr());
+            convolved = convolveKernel(*inImage.getVariance(), productKernel, varianceConvolver.get());
+
+            double const factor = (i == j) ? 1.0 : 2.0;
+            for (int y = goodBBox.getMinY(); y <= goodBBox.getMaxY(); ++y) {
+                double const yPos = afwImage::indexToPosition(y + y0);
+                KernelImageT::x_iterator convolvedPtr = convolved->x_at(minX, y);
+                KernelImageT::x_iterator weightPtr = weightImage.x_at(minX, y);
+                KernelImageT::x_iterator variancePtr = variance.x_at(minX, y);
+                for (int x = minX; x <= maxX; ++x, ++convolvedPtr, ++weightPtr, ++variancePtr) {
+                    double const weight = getWeight(j, afwImage::indexToPosition(x + x0), yPos);
+                    *variancePtr += factor * *weightPtr * weight * *convolvedPtr;
+                }
+            }
+        }
+    }
+
+    /* Edge pixels, as set by afw::math::convolve */
+    *convolvedImage.getImage() = std::numeric_limits<PixelT>::quiet_NaN();
+    *convolvedImage.getMask() = afwImage::Mask<afwImage::MaskPixel>::getPlaneBitMask("NO_DATA");
+    *convolvedImage.getVariance() = std::numeric_limits<afwImage::VariancePixel>::infinity();
+
+    for (int y = goodBBox.getMinY(); y <= goodBBox.getMaxY(); ++y) {
+        KernelImageT::x_iterator valuePtr = value.x_at(minX, y);
+        KernelImageT::x_iterator variancePtr = variance.x_at(minX, y);
+        typename afwImage::MaskedImage<PixelT>::x_iterator ptr = convolvedImage.x_at(minX, y);
+        for (int x = minX; x <= maxX; ++x, ++ptr, ++valuePtr, ++variancePtr) {
+            ptr.image() = *valuePtr;
+            ptr.mask() = 0;
+            ptr.variance() = *variancePtr;
+        }
+    }
+
+    afwImage::Mask<afwImage::MaskPixel> const &inMask = *inImage.getMask();
+    afwImage::Mask<afwImage::MaskPixel> &outMask = *convolvedImage.getMask();
+    for (auto const &offset : footprint) {
+        for (int y = goodBBox.getMinY(); y <= goodBBox.getMaxY(); ++y) {
+            afwImage::Mask<afwImage::MaskPixel>::x_iterator outPtr = outMask.x_at(minX, y);
+            afwImage::Mask<afwImage::MaskPixel>::x_iterator inPtr =
+                inMask.x_at(minX + offset.first, y + offset.second);
+            for (int x = minX; x <= maxX; ++x, ++outPtr, ++inPtr) {
+                *outPtr |= *inPtr;
+            }
+        }
+    }
+
+    double time = t.elapsed();
+    LOGL_DEBUG("TRACE4.ip.diffim.convolveLinearCombination",
+               "Total compute time to convolve with %d basis kernels : %.2f s", nBases, time);
+}
+
+namespace {
+
+inline double evaluateBackground(double background, double, double) {
+    return background;
+}
+
+inline double evaluateBackground(afwMath::Function2<double> const &background, double x, double y) {
+    return background(x, y);
+}
+
+/* D = I - (C + bg) (or its negation if !invert) in a single sweep; differenceImage may be
+   the same image as convolvedImage or scienceMaskedImage.  The background is evaluated at
+   the parent position of each pixel, as Image::operator+=(Function2) does */
+template <typename PixelT, typename BackgroundT>
+void subtractInPlace(
+    afwImage::MaskedImage<PixelT> &differenceImage,
+    afwImage::MaskedImage<PixelT> const &convolvedImage,
+    afwImage::MaskedImage<PixelT> const &scienceMaskedImage,
+    BackgroundT background,
+    bool invert
+    ) {
+    if ((convolvedImage.getDimensions() != differenceImage.getDimensions()) ||
+        (scienceMaskedImage.getDimensions() != differenceImage.getDimensions())) {
+        throw LSST_EXCEPT(pexExcept::LengthError, "Images to subtract have different dimensions");
+    }
+    double const sign = invert ? -1.0 : 1.0;
+    int const x0 = differenceImage.getX0();
+    int const y0 = differenceImage.getY0();
+    for (int y = 0; y != differenceImage.getHeight(); ++y) {
+        double const yPos = afwImage::indexToPosition(y + y0);
+        typename afwImage::MaskedImage<PixelT>::x_iterator dPtr = differenceImage.row_begin(y);
+        typename afwImage::MaskedImage<PixelT>::x_iterator cPtr = convolvedImage.row_begin(y);
+        typename afwImage::MaskedImage<PixelT>::x_iterator sPtr = scienceMaskedImage.row_begin(y);
+        for (int x = 0; x != differenceImage.getWidth(); ++x, ++dPtr, ++cPtr, ++sPtr) {
+            double const bg = evaluateBackground(background, afwImage::indexToPosition(x + x0), yPos);
+            dPtr.image() = sign * (cPtr.image() + bg - sPtr.image());
+            dPtr.mask() = cPtr.mask() | sPtr.mask();
+            dPtr.variance() = cPtr.variance() + sPtr.variance();
+        }
+    }
+}
+
+} // anonymous namespace
+
+/**
  * @brief Implement fundamental difference imaging step of convolution and
- * subtraction : D = I - (K*T + bg) where * denotes convolution
- * 
- * @note If you convolve the science image, D = (K*I + bg) - T, set invert=False
+ * subtraction : D = I - (K*T + bg) where * denotes convolution, into a
+ * caller-supplied image
  *
- * @note The template is taken to be an MaskedImage; this takes c 1.6 times as long
- * as using an Image.
+ * @note The template is convolved straight into differenceImage, and the
+ * background and science image are then subtracted (and the sign flipped)
+ * in a single pass, so no temporary images are allocated.  differenceImage
+ * may be reused between calls.
  *
- * @note Instantiated such that background can be a double or Function2D
+ * @note If you convolve the science image, D = (K*I + bg) - T, set invert=False
  *
- * @return Difference image
+ * @note Instantiated such that background can be a double or Function2D
  *
  * @ingroup diffim
  */
 template <typename PixelT, typename BackgroundT>
-afwImage::MaskedImage<PixelT> convolveAndSubtract(
+void convolveAndSubtract(
+    lsst::afw::image::MaskedImage<PixelT> &differenceImage,          ///< Output difference image
     lsst::afw::image::MaskedImage<PixelT> const &templateImage,      ///< Image T to convolve with Kernel
     lsst::afw::image::MaskedImage<PixelT> const &scienceMaskedImage, ///< Image I to subtract T from
     lsst::afw::math::Kernel const &convolutionKernel,                ///< PSF-matching Kernel used
-    BackgroundT background,                                  ///< Differential background 
+    BackgroundT background,                                  ///< Differential background
     bool invert                                              ///< Invert the output difference image
     ) {
 
     boost::timer t;
     t.restart();
 
-    afwImage::MaskedImage<PixelT> convolvedMaskedImage(templateImage.getDimensions());
     afwMath::ConvolutionControl convolutionControl = afwMath::ConvolutionControl();
     convolutionControl.setDoNormalize(false);
-    afwMath::convolve(convolvedMaskedImage, templateImage, 
+    afwMath::convolve(differenceImage, templateImage,
                       convolutionKernel, convolutionControl);
-    
-    /* Add in background */
-    *(convolvedMaskedImage.getImage()) += background;
-    
-    /* Do actual subtraction */
-    convolvedMaskedImage -= scienceMaskedImage;
 
-    /* Invert */
-    if (invert) {
-        convolvedMaskedImage *= -1.0;
-    }
+    subtractInPlace(differenceImage, differenceImage, scienceMaskedImage, background, invert);
 
     double time = t.elapsed();
     LOGL_DEBUG("TRACE4.ip.diffim.convolveAndSubtract",
                "Total compute time to convolve and subtract : %.2f s", time);
-
-    return convolvedMaskedImage;
 }
 
-/** 
+/**
  * @brief Implement fundamental difference imaging step of convolution and
- * subtraction : D = I - (K.x.T + bg)
+ * subtraction : D = I - (K.x.T + bg), into a caller-supplied image
  *
  * @note The template is taken to be an Image, not a MaskedImage; it therefore
- * has neither variance nor bad pixels
+ * has neither variance nor bad pixels, and the mask and variance of D are
+ * those of the science image
  *
  * @note If you convolve the science image, D = (K*I + bg) - T, set invert=False
- * 
- * @note Instantiated such that background can be a double or Function2D
  *
- * @return Difference image
+ * @note Instantiated such that background can be a double or Function2D
  *
  * @ingroup diffim
  */
 template <typename PixelT, typename BackgroundT>
-afwImage::MaskedImage<PixelT> convolveAndSubtract(
+void convolveAndSubtract(
+    lsst::afw::image::MaskedImage<PixelT> &differenceImage,          ///< Output difference image
     lsst::afw::image::Image<PixelT> const &templateImage,            ///< Image T to convolve with Kernel
     lsst::afw::image::MaskedImage<PixelT> const &scienceMaskedImage, ///< Image I to subtract T from
     lsst::afw::math::Kernel const &convolutionKernel,                ///< PSF-matching Kernel used
-    BackgroundT background,                                  ///< Differential background 
+    BackgroundT background,                                  ///< Differential background
     bool invert                                              ///< Invert the output difference image
     ) {
-    
+
     boost::timer t;
     t.restart();
 
-    afwImage::MaskedImage<PixelT> convolvedMaskedImage(templateImage.getDimensions());
     afwMath::ConvolutionControl convolutionControl = afwMath::ConvolutionControl();
     convolutionControl.setDoNormalize(false);
-    afwMath::convolve(*convolvedMaskedImage.getImage(), templateImage, 
+    afwMath::convolve(*differenceImage.getImage(), templateImage,
                       convolutionKernel, convolutionControl);
-    
-    /* Add in background */
-    *(convolvedMaskedImage.getImage()) += background;
-    
-    /* Do actual subtraction */
-    *convolvedMaskedImage.getImage() -= *scienceMaskedImage.getImage();
 
-    /* Invert */
-    if (invert) {
-        *convolvedMaskedImage.getImage() *= -1.0;
-    }
-    convolvedMaskedImage.getMask()->assign(*scienceMaskedImage.getMask());
-    convolvedMaskedImage.getVariance()->assign(*scienceMaskedImage.getVariance());
-    
+    /* The convolved template contributes no mask bits or variance */
+    *differenceImage.getMask() = 0;
+    *differenceImage.getVariance() = 0;
+    subtractInPlace(differenceImage, differenceImage, scienceMaskedImage, background, invert);
+
     double time = t.elapsed();
     LOGL_DEBUG("TRACE4.ip.diffim.convolveAndSubtract",
                "Total compute time to convolve and subtract : %.2f s", time);
+}
 
-    return convolvedMaskedImage;
+/**
+ * @brief Implement fundamental difference imaging step of convolution and
+ * subtraction : D = I - (K*T + bg) where * denotes convolution
+ *
+ * @note If you convolve the science image, D = (K*I + bg) - T, set invert=False
+ *
+ * @note The template is taken to be an MaskedImage; this takes c 1.6 times as long
+ * as using an Image.
+ *
+ * @note Instantiated such that background can be a double or Function2D
+ *
+ * @return Difference image
+ *
+ * @ingroup diffim
+ */
+template <typename PixelT, typename BackgroundT>
+afwImage::MaskedImage<PixelT> convolveAndSubtract(
+    lsst::afw::image::MaskedImage<PixelT> const &templateImage,      ///< Image T to convolve with Kernel
+    lsst::afw::image::MaskedImage<PixelT> const &scienceMaskedImage, ///< Image I to subtract T from
+    lsst::afw::math::Kernel const &convolutionKernel,                ///< PSF-matching Kernel used
+    BackgroundT background,                                  ///< Differential background 
+    bool invert                                              ///< Invert the output difference image
+    ) {
+    afwImage::MaskedImage<PixelT> differenceImage(templateImage.getDimensions());
+    convolveAndSubtract(differenceImage, templateImage, scienceMaskedImage, convolutionKernel,
+                        background, invert);
+    return differenceImage;
+}
+
+/** 
+ * @brief Implement fundamental difference imaging step of convolution and
+ * subtraction : D = I - (K.x.T + bg)
+ *
+ * @note The template is taken to be an Image, not a MaskedImage; it therefore
+ * has neither variance nor bad pixels
+ *
+ * @note If you convolve the science image, D = (K*I + bg) - T, set invert=False
+ * 
+ * @note Instantiated such that background can be a double or Function2D
+ *
+ * @return Difference image
+ *
+ * @ingroup diffim
+ */
+template <typename PixelT, typename BackgroundT>
+afwImage::MaskedImage<PixelT> convolveAndSubtract(
+    lsst::afw::image::Image<PixelT> const &templateImage,            ///< Image T to convolve with Kernel
+    lsst::afw::image::MaskedImage<PixelT> const &scienceMaskedImage, ///< Image I to subtract T from
+    lsst::afw::math::Kernel const &convolutionKernel,                ///< PSF-matching Kernel used
+    BackgroundT background,                                  ///< Differential background 
+    bool invert                                              ///< Invert the output difference image
+    ) {
+    afwImage::MaskedImage<PixelT> differenceImage(templateImage.getDimensions());
+    convolveAndSubtract(differenceImage, templateImage, scienceMaskedImage, convolutionKernel,
+                        background, invert);
+    return differenceImage;
+}
+
+/**
+ * @brief Subtract an already PSF-matched image and the background from the
+ * science image, D = I - (M + bg), in a single pass into differenceImage
+ *
+ * @note differenceImage may be matchedImage or scienceMaskedImage itself.
+ *
+ * @note Instantiated such that background can be a double or Function2D
+ *
+ * @ingroup diffim
+ */
+template <typename PixelT, typename BackgroundT>
+void subtractMatchedImage(
+    lsst::afw::image::MaskedImage<PixelT> &differenceImage,          ///< Output difference image
+    lsst::afw::image::MaskedImage<PixelT> const &matchedImage,       ///< PSF-matched image M
+    lsst::afw::image::MaskedImage<PixelT> const &scienceMaskedImage, ///< Image I to subtract M from
+    BackgroundT background,                                  ///< Differential background
+    bool invert                                              ///< Invert the output difference image
+    ) {
+    subtractInPlace(differenceImage, matchedImage, scienceMaskedImage, background, invert);
 }
 
 /***********************************************************************************************************/
@@ -214,6 +770,23 @@ Eigen::MatrixXd imageToEigenMatrix(lsst::afw::image::Image<float> const &);
 template 
 Eigen::MatrixXd imageToEigenMatrix(lsst::afw::image::Image<double> const &);
 
+template
+std::vector<std::shared_ptr<afwImage::Image<afwMath::Kernel::Pixel> > > convolveBasisFft(
+    lsst::afw::image::Image<float> const &, lsst::afw::math::KernelList const &);
+
+template
+std::vector<std::shared_ptr<afwImage::Image<afwMath::Kernel::Pixel> > > convolveBasisFft(
+    lsst::afw::image::Image<double> const &, lsst::afw::math::KernelList const &);
+
+template
+void convolveLinearCombination(
+    lsst::afw::image::MaskedImage<float> &, lsst::afw::image::MaskedImage<float> const &,
+    lsst::afw::math::LinearCombinationKernel const &, bool);
+template
+void convolveLinearCombination(
+    lsst::afw::image::MaskedImage<double> &, lsst::afw::image::MaskedImage<double> const &,
+    lsst::afw::math::LinearCombinationKernel const &, bool);
+
 template class FindSetBits<lsst::afw::image::Mask<> >;
 template class ImageStatistics<float>;
 template class ImageStatistics<double>;
@@ -237,9 +810,34 @@ template class ImageStatistics<double>;
         lsst::afw::math::Function2<double> const& backgroundFunction, \
         bool invert); \
 
+#define p_INSTANTIATE_convolveAndSubtractInto(TEMPLATE_IMAGE_T, TYPE, BACKGROUND_T) \
+    template \
+    void convolveAndSubtract( \
+        lsst::afw::image::MaskedImage<TYPE> & differenceImage, \
+        lsst::afw::image::TEMPLATE_IMAGE_T<TYPE> const& templateImage, \
+        lsst::afw::image::MaskedImage<TYPE> const& scienceMaskedImage, \
+        lsst::afw::math::Kernel const& convolutionKernel, \
+        BACKGROUND_T background, \
+        bool invert);
+
+#define p_INSTANTIATE_subtractMatchedImage(TYPE, BACKGROUND_T) \
+    template \
+    void subtractMatchedImage( \
+        lsst::afw::image::MaskedImage<TYPE> & differenceImage, \
+        lsst::afw::image::MaskedImage<TYPE> const& matchedImage, \
+        lsst::afw::image::MaskedImage<TYPE> const& scienceMaskedImage, \
+        BACKGROUND_T background, \
+        bool invert);
+
 #define INSTANTIATE_convolveAndSubtract(TYPE) \
 p_INSTANTIATE_convolveAndSubtract(Image, TYPE) \
-p_INSTANTIATE_convolveAndSubtract(MaskedImage, TYPE)
+p_INSTANTIATE_convolveAndSubtract(MaskedImage, TYPE) \
+p_INSTANTIATE_convolveAndSubtractInto(Image, TYPE, double) \
+p_INSTANTIATE_convolveAndSubtractInto(Image, TYPE, lsst::afw::math::Function2<double> const&) \
+p_INSTANTIATE_convolveAndSubtractInto(MaskedImage, TYPE, double) \
+p_INSTANTIATE_convolveAndSubtractInto(MaskedImage, TYPE, lsst::afw::math::Function2<double> const&) \
+p_INSTANTIATE_subtractMatchedImage(TYPE, double) \
+p_INSTANTIATE_subtractMatchedImage(TYPE, lsst::afw::math::Function2<double> const&)
 /*
  * Here are the instantiations.
  *
@@ -11,6 +11,8 @@
 
 #include "boost/timer.hpp"
 
+#include "Eigen/QR"
+
 #include "lsst/afw/math.h"
 #include "lsst/afw/image.h"
 #include "lsst/log/Log.h"
@@ -29,6 +31,23 @@ namespace lsst {
 namespace ip {
 namespace diffim {
 
+namespace {
+
+/* One column per kernel image, in the pixel order of imageToEigenMatrix */
+Eigen::MatrixXd kernelListToEigenMatrix(afwMath::KernelList const& kernelList) {
+    afwImage::Image<afwMath::Kernel::Pixel> image(kernelList[0]->getDimensions());
+    Eigen::MatrixXd kMat(image.getWidth() * image.getHeight(), kernelList.size());
+    for (unsigned int i = 0; i < kernelList.size(); ++i) {
+        (void)kernelList[i]->computeImage(image, false);
+        Eigen::MatrixXd kCol = imageToEigenMatrix(image);
+        kCol.resize(kCol.size(), 1);
+        kMat.col(i) = kCol.col(0);
+    }
+    return kMat;
+}
+
+}  // anonymous namespace
+
 template <typename PixelT>
 KernelCandidate<PixelT>::KernelCandidate(float const xCenter, float const yCenter,
                                          MaskedImagePtr const& templateMaskedImage,
@@ -112,8 +131,14 @@ void KernelCandidate<PixelT>::build(lsst::afw::math::KernelList const& basisList
 
     _varianceEstimate = VariancePtr(new afwImage::Image<afwImage::VariancePixel>(var));
 
+    /* Rebuilding with a new basis (e.g. Pca); try to reuse the original basis convolutions */
+    Eigen::MatrixXd cMat;
+    if (_isInitialized && _policy.getBool("reuseConvolvedBasis")) {
+        cMat = _projectDesignMatrix(basisList);
+    }
+
     try {
-        _buildKernelSolution(basisList, hMat);
+        _buildKernelSolution(basisList, hMat, cMat);
     } catch (pexExcept::Exception& e) {
         throw e;
     }
@@ -123,7 +148,7 @@ void KernelCandidate<PixelT>::build(lsst::afw::math::KernelList const& basisList
         _varianceEstimate = diffim.getVariance();
 
         try {
-            _buildKernelSolution(basisList, hMat);
+            _buildKernelSolution(basisList, hMat, cMat);
         } catch (pexExcept::Exception& e) {
             throw e;
         }
@@ -132,9 +157,56 @@ void KernelCandidate<PixelT>::build(lsst::afw::math::KernelList const& basisList
     _isInitialized = true;
 }
 
+template <typename PixelT>
+Eigen::MatrixXd KernelCandidate<PixelT>::_projectDesignMatrix(lsst::afw::math::KernelList const& basisList) {
+    if ((!_kernelSolutionOrig) || (_kernelSolutionOrig->getDesignMatrix().size() == 0) ||
+        (basisList.size() == 0)) {
+        return Eigen::MatrixXd();
+    }
+    afwMath::KernelList origList =
+            std::dynamic_pointer_cast<afwMath::LinearCombinationKernel>(_kernelSolutionOrig->getKernel())
+                    ->getKernelList();
+    for (auto const& kernel : basisList) {
+        if (kernel->isSpatiallyVarying() || (kernel->getWidth() != origList[0]->getWidth()) ||
+            (kernel->getHeight() != origList[0]->getHeight()) ||
+            (kernel->getCtrX() != origList[0]->getCtrX()) || (kernel->getCtrY() != origList[0]->getCtrY())) {
+            return Eigen::MatrixXd();
+        }
+    }
+
+    boost::timer t;
+    t.restart();
+
+    /* Solve K_orig P = K_new in the least squares sense, and require it to be exact */
+    Eigen::MatrixXd origMat = kernelListToEigenMatrix(origList);
+    Eigen::MatrixXd newMat = kernelListToEigenMatrix(basisList);
+    Eigen::MatrixXd pMat = origMat.colPivHouseholderQr().solve(newMat);
+    double residual = (origMat * pMat - newMat).norm();
+    if (!(residual <= 1e-6 * newMat.norm())) {
+        LOGL_DEBUG("TRACE4.ip.diffim.KernelCandidate._projectDesignMatrix",
+                   "Candidate %d basis is not spanned by the original basis (residual %.3e)", this->getId(),
+                   residual);
+        return Eigen::MatrixXd();
+    }
+
+    Eigen::MatrixXd const& cMatOrig = _kernelSolutionOrig->getDesignMatrix();
+    unsigned int const nKernelParameters = basisList.size();
+    Eigen::MatrixXd cMat(cMatOrig.rows(), nKernelParameters + (_fitForBackground ? 1 : 0));
+    cMat.leftCols(nKernelParameters) = cMatOrig.leftCols(origList.size()) * pMat;
+    if (_fitForBackground) {
+        cMat.col(nKernelParameters).fill(1.);
+    }
+
+    LOGL_DEBUG("TRACE4.ip.diffim.KernelCandidate._projectDesignMatrix",
+               "Candidate %d projected %d basis images in %.2f s", this->getId(),
+               static_cast<int>(nKernelParameters), t.elapsed());
+    return cMat;
+}
+
 template <typename PixelT>
 void KernelCandidate<PixelT>::_buildKernelSolution(lsst::afw::math::KernelList const& basisList,
-                                                   Eigen::MatrixXd const& hMat) {
+                                                   Eigen::MatrixXd const& hMat,
+                                                   Eigen::MatrixXd const& cMat) {
     bool checkConditionNumber = _policy.getBool("checkConditionNumber");
     double maxConditionNumber = _policy.getDouble("maxConditionNumber");
     std::string conditionNumberType = _policy.getString("conditionNumberType");
@@ -147,6 +219,29 @@ void KernelCandidate<PixelT>::_buildKernelSolution(lsst::afw::math::KernelList c
         throw LSST_EXCEPT(pexExcept::Exception, "conditionNumberType not recognized");
     }
 
+    std::string basisConvolution = _policy.getString("basisConvolution");
+    KernelSolution::BasisConvolutionType btype;
+    if (basisConvolution == "direct") {
+        btype = KernelSolution::DIRECT;
+    } else if (basisConvolution == "fft") {
+        btype = KernelSolution::FFT;
+    } else {
+        throw LSST_EXCEPT(pexExcept::Exception, "basisConvolution not recognized");
+    }
+    bool useFastDeltaFunctionBuild = _policy.getBool("useFastDeltaFunctionBuild");
+
+    std::string kernelSolver = _policy.getString("kernelSolver");
+    KernelSolution::KernelSolvedBy stype;
+    if (kernelSolver == "CHOLESKY_LDLT") {
+        stype = KernelSolution::CHOLESKY_LDLT;
+    } else if (kernelSolver == "CHOLESKY_LLT") {
+        stype = KernelSolution::CHOLESKY_LLT;
+    } else if (kernelSolver == "LU") {
+        stype = KernelSolution::LU;
+    } else {
+        throw LSST_EXCEPT(pexExcept::Exception, "kernelSolver not recognized");
+    }
+
     /* Do we have a regularization matrix?  If so use it */
     if (hMat.size() > 0) {
         _useRegularization = true;
@@ -155,6 +250,12 @@ void KernelCandidate<PixelT>::_buildKernelSolution(lsst::afw::math::KernelList c
         if (_isInitialized) {
             _kernelSolutionPca = std::shared_ptr<StaticKernelSolution<PixelT> >(
                     new RegularizedKernelSolution<PixelT>(basisList, _fitForBackground, hMat, _policy));
+            _kernelSolutionPca->setBasisConvolution(btype);
+            _kernelSolutionPca->setFastDeltaFunctionBuild(useFastDeltaFunctionBuild);
+            _kernelSolutionPca->setPreferredSolver(stype);
+            if (cMat.size() > 0) {
+                _kernelSolutionPca->setDesignMatrix(cMat);
+            }
             _kernelSolutionPca->build(*(_templateMaskedImage->getImage()), *(_scienceMaskedImage->getImage()),
                                       *_varianceEstimate);
             if (checkConditionNumber) {
@@ -169,6 +270,9 @@ void KernelCandidate<PixelT>::_buildKernelSolution(lsst::afw::math::KernelList c
         } else {
             _kernelSolutionOrig = std::shared_ptr<StaticKernelSolution<PixelT> >(
                     new RegularizedKernelSolution<PixelT>(basisList, _fitForBackground, hMat, _policy));
+            _kernelSolutionOrig->setBasisConvolution(btype);
+            _kernelSolutionOrig->setFastDeltaFunctionBuild(useFastDeltaFunctionBuild);
+            _kernelSolutionOrig->setPreferredSolver(stype);
             _kernelSolutionOrig->build(*(_templateMaskedImage->getImage()),
                                        *(_scienceMaskedImage->getImage()), *_varianceEstimate);
             if (checkConditionNumber) {
@@ -187,6 +291,12 @@ void KernelCandidate<PixelT>::_buildKernelSolution(lsst::afw::math::KernelList c
         if (_isInitialized) {
             _kernelSolutionPca = std::shared_ptr<StaticKernelSolution<PixelT> >(
                     new StaticKernelSolution<PixelT>(basisList, _fitForBackground));
+            _kernelSolutionPca->setBasisConvolution(btype);
+            _kernelSolutionPca->setFastDeltaFunctionBuild(useFastDeltaFunctionBuild);
+            _kernelSolutionPca->setPreferredSolver(stype);
+            if (cMat.size() > 0) {
+                _kernelSolutionPca->setDesignMatrix(cMat);
+            }
             _kernelSolutionPca->build(*(_templateMaskedImage->getImage()), *(_scienceMaskedImage->getImage()),
                                       *_varianceEstimate);
             if (checkConditionNumber) {
@@ -201,6 +311,9 @@ void KernelCandidate<PixelT>::_buildKernelSolution(lsst::afw::math::KernelList c
         } else {
             _kernelSolutionOrig = std::shared_ptr<StaticKernelSolution<PixelT> >(
                     new StaticKernelSolution<PixelT>(basisList, _fitForBackground));
+            _kernelSolutionOrig->setBasisConvolution(btype);
+            _kernelSolutionOrig->setFastDeltaFunctionBuild(useFastDeltaFunctionBuild);
+            _kernelSolutionOrig->setPreferredSolver(stype);
             _kernelSolutionOrig->build(*(_templateMaskedImage->getImage()),
                                        *(_scienceMaskedImage->getImage()), *_varianceEstimate);
             if (checkConditionNumber) {
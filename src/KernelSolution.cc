@@ -12,6 +12,9 @@
 #include <cmath>
 #include <algorithm>
 #include <limits>
+#include <map>
+#include <utility>
+#include <vector>
 
 #include <memory>
 #include "boost/timer.hpp"
@@ -49,8 +52,34 @@ namespace lsst {
 namespace ip {
 namespace diffim {
 
+namespace {
+
+    /*
+     * Return the (row, col) offsets into the Eigen representation of the
+     * template for each kernel in basisList, or false if any of them is not
+     * a DeltaFunctionKernel.  The Eigen rows run opposite to image y (see
+     * imageToEigenMatrix).
+     */
+    bool getDeltaFunctionOffsets(lsst::afw::math::KernelList const& basisList,
+                                 std::vector<std::pair<int, int> > &offsets) {
+        offsets.clear();
+        for (auto const & kernel : basisList) {
+            std::shared_ptr<afwMath::DeltaFunctionKernel> deltaKernel =
+                std::dynamic_pointer_cast<afwMath::DeltaFunctionKernel>(kernel);
+            if (!deltaKernel) {
+                return false;
+            }
+            lsst::afw::geom::Point2I pixel = deltaKernel->getPixel();
+            offsets.push_back(std::make_pair(deltaKernel->getCtrY() - pixel.getY(),
+                                             pixel.getX() - deltaKernel->getCtrX()));
+        }
+        return !offsets.empty();
+    }
+
+} // anonymous namespace
+
     /* Unique identifier for solution */
-    int KernelSolution::_SolutionId = 0;
+    std::atomic<int> KernelSolution::_SolutionId(0);
 
     KernelSolution::KernelSolution(
         Eigen::MatrixXd mMat,
@@ -62,6 +91,7 @@ namespace diffim {
         _bVec(bVec),
         _aVec(),
         _solvedBy(NONE),
+        _preferredSolver(LU),
         _fitForBackground(fitForBackground)
     {};
 
@@ -73,6 +103,7 @@ namespace diffim {
         _bVec(),
         _aVec(),
         _solvedBy(NONE),
+        _preferredSolver(LU),
         _fitForBackground(fitForBackground)
     {};
 
@@ -82,6 +113,7 @@ namespace diffim {
         _bVec(),
         _aVec(),
         _solvedBy(NONE),
+        _preferredSolver(LU),
         _fitForBackground(true)
     {};
 
@@ -89,6 +121,14 @@ namespace diffim {
         solve(_mMat, _bVec);
     }
 
+    void KernelSolution::setPreferredSolver(KernelSolvedBy solver) {
+        if ((solver != CHOLESKY_LDLT) && (solver != CHOLESKY_LLT) && (solver != LU)) {
+            throw LSST_EXCEPT(pexExcept::InvalidParameterError,
+                              "Preferred solver must be one of CHOLESKY_LDLT, CHOLESKY_LLT, LU");
+        }
+        _preferredSolver = solver;
+    }
+
     double KernelSolution::getConditionNumber(ConditionNumberType conditionType) {
         return getConditionNumber(_mMat, conditionType);
     }
@@ -143,37 +183,79 @@ namespace diffim {
 
         LOGL_DEBUG("TRACE2.ip.diffim.KernelSolution.solve",
                    "Solving for kernel");
-		_solvedBy = LU;
-		Eigen::FullPivLU<Eigen::MatrixXd> lu(mMat);
-		if (lu.isInvertible()) {
-			aVec = lu.solve(bVec);
-		} else {
-			LOGL_DEBUG("TRACE3.ip.diffim.KernelSolution.solve",
-                                   "Unable to determine kernel via LU");
-			/* LAST RESORT */
-			try {
-
-				_solvedBy = EIGENVECTOR;
-				Eigen::SelfAdjointEigenSolver<Eigen::MatrixXd> eVecValues(mMat);
-				Eigen::MatrixXd const& rMat = eVecValues.eigenvectors();
-				Eigen::VectorXd eValues = eVecValues.eigenvalues();
-
-				for (int i = 0; i != eValues.rows(); ++i) {
-					if (eValues(i) != 0.0) {
-						eValues(i) = 1.0/eValues(i);
-					}
-				}
-
-				aVec = rMat * eValues.asDiagonal() * rMat.transpose() * bVec;
-			} catch (pexExcept::Exception& e) {
-
-				_solvedBy = NONE;
-				LOGL_DEBUG("TRACE3.ip.diffim.KernelSolution.solve",
-                                           "Unable to determine kernel via eigen-values");
-
-				throw LSST_EXCEPT(pexExcept::Exception, "Unable to determine kernel solution");
-			}
-		}
+
+        /*
+           M is symmetric positive (semi-)definite, so try a Cholesky factorization
+           first if requested.  Reject it when a pivot is (relatively) zero, as
+           FullPivLU::isInvertible would, and fall through to LU.
+        */
+        _solvedBy = NONE;
+        double const pivotThreshold = std::numeric_limits<double>::epsilon() * mMat.rows();
+        if (_preferredSolver == CHOLESKY_LDLT) {
+            Eigen::LDLT<Eigen::MatrixXd> ldlt(mMat);
+            if ((ldlt.info() == Eigen::Success) && ldlt.isPositive()) {
+                Eigen::VectorXd dVec = ldlt.vectorD();
+                if (dVec.minCoeff() > pivotThreshold * dVec.maxCoeff()) {
+                    aVec = ldlt.solve(bVec);
+                    if (aVec.allFinite()) {
+                        _solvedBy = CHOLESKY_LDLT;
+                    }
+                }
+            }
+            if (_solvedBy == NONE) {
+                LOGL_DEBUG("TRACE3.ip.diffim.KernelSolution.solve",
+                           "Unable to determine kernel via Cholesky LDLT");
+            }
+        } else if (_preferredSolver == CHOLESKY_LLT) {
+            Eigen::LLT<Eigen::MatrixXd> llt(mMat);
+            if (llt.info() == Eigen::Success) {
+                Eigen::VectorXd dVec = Eigen::MatrixXd(llt.matrixL()).diagonal().array().square();
+                if (dVec.minCoeff() > pivotThreshold * dVec.maxCoeff()) {
+                    aVec = llt.solve(bVec);
+                    if (aVec.allFinite()) {
+                        _solvedBy = CHOLESKY_LLT;
+                    }
+                }
+            }
+            if (_solvedBy == NONE) {
+                LOGL_DEBUG("TRACE3.ip.diffim.KernelSolution.solve",
+                           "Unable to determine kernel via Cholesky LLT");
+            }
+        }
+
+        if (_solvedBy == NONE) {
+            _solvedBy = LU;
+            Eigen::FullPivLU<Eigen::MatrixXd> lu(mMat);
+            if (lu.isInvertible()) {
+                aVec = lu.solve(bVec);
+            } else {
+                LOGL_DEBUG("TRACE3.ip.diffim.KernelSolution.solve",
+                           "Unable to determine kernel via LU");
+                /* LAST RESORT */
+                try {
+
+                    _solvedBy = EIGENVECTOR;
+                    Eigen::SelfAdjointEigenSolver<Eigen::MatrixXd> eVecValues(mMat);
+                    Eigen::MatrixXd const& rMat = eVecValues.eigenvectors();
+                    Eigen::VectorXd eValues = eVecValues.eigenvalues();
+
+                    for (int i = 0; i != eValues.rows(); ++i) {
+                        if (eValues(i) != 0.0) {
+                            eValues(i) = 1.0/eValues(i);
+                        }
+                    }
+
+                    aVec = rMat * eValues.asDiagonal() * rMat.transpose() * bVec;
+                } catch (pexExcept::Exception& e) {
+
+                    _solvedBy = NONE;
+                    LOGL_DEBUG("TRACE3.ip.diffim.KernelSolution.solve",
+                               "Unable to determine kernel via eigen-values");
+
+                    throw LSST_EXCEPT(pexExcept::Exception, "Unable to determine kernel solution");
+                }
+            }
+        }
 
         double time = t.elapsed();
         LOGL_DEBUG("TRACE3.ip.diffim.KernelSolution.solve",
@@ -201,7 +283,10 @@ namespace diffim {
         _ivVec(),
         _kernel(),
         _background(0.0),
-        _kSum(0.0)
+        _kSum(0.0),
+        _basisConvolution(DIRECT),
+        _useFastDeltaFunctionBuild(false),
+        _useDesignMatrix(false)
     {
         std::vector<double> kValues(basisList.size());
         _kernel = std::shared_ptr<afwMath::Kernel>(
@@ -336,30 +421,75 @@ namespace diffim {
     	    startRow, startCol, endRow-startRow, endCol-startCol
     	).array().inverse().matrix();
 
+        /* A precomputed design matrix, e.g. projected from another basis; skip the convolutions */
+        if (_useDesignMatrix) {
+            if ((_cMat.rows() != eigenScience.size()) || (_cMat.cols() != static_cast<int>(nParameters))) {
+                throw LSST_EXCEPT(pexExcept::LengthError,
+                                  str(boost::format("Design matrix is %d x %d; expected %d x %d") %
+                                      _cMat.rows() % _cMat.cols() % eigenScience.size() % nParameters));
+            }
+            eigenScience.resize(eigenScience.rows()*eigenScience.cols(), 1);
+            eigeniVariance.resize(eigeniVariance.rows()*eigeniVariance.cols(), 1);
+            _ivVec = eigeniVariance.col(0);
+            _iVec = eigenScience.col(0);
+
+            _mMat = _cMat.transpose() * (_ivVec.asDiagonal() * _cMat);
+            _bVec = _cMat.transpose() * (_ivVec.asDiagonal() * _iVec);
+            return;
+        }
+
+        /* Delta-function bases are pure shifts of the template; skip the convolutions and C */
+        std::vector<std::pair<int, int> > offsets;
+        if (_useFastDeltaFunctionBuild && (!_needsDesignMatrix()) &&
+            getDeltaFunctionOffsets(basisList, offsets)) {
+            _buildDeltaFunction(imageToEigenMatrix(templateImage), eigenScience, eigeniVariance,
+                                startRow, startCol, offsets);
+            LOGL_DEBUG("TRACE3.ip.diffim.StaticKernelSolution.build",
+                       "Total compute time to build delta-function normal equations : %.2f s",
+                       t.elapsed());
+            return;
+        }
+
         /* Resize into 1-D for later usage */
         eigenTemplate.resize(eigenTemplate.rows()*eigenTemplate.cols(), 1);
         eigenScience.resize(eigenScience.rows()*eigenScience.cols(), 1);
         eigeniVariance.resize(eigeniVariance.rows()*eigeniVariance.cols(), 1);
 
-        /* Holds image convolved with basis function */
-        afwImage::Image<PixelT> cimage(templateImage.getDimensions());
-
         /* Holds eigen representation of image convolved with all basis functions */
         std::vector<Eigen::MatrixXd> convolvedEigenList(nKernelParameters);
 
         /* Iterators over convolved image list and basis list */
         typename std::vector<Eigen::MatrixXd>::iterator eiter = convolvedEigenList.begin();
-        /* Create C_i in the formalism of Alard & Lupton */
-        for (kiter = basisList.begin(); kiter != basisList.end(); ++kiter, ++eiter) {
-            afwMath::convolve(cimage, templateImage, **kiter, false); /* cimage stores convolved image */
+        if (_basisConvolution == FFT) {
+            /* Create C_i in Fourier space; the template is only transformed once */
+            std::vector<std::shared_ptr<afwImage::Image<PixelT>>> cimageList =
+                convolveBasisFft(templateImage, basisList);
+
+            for (auto const & cimage : cimageList) {
+                Eigen::MatrixXd cMat = imageToEigenMatrix(*cimage).block(startRow,
+                                                                         startCol,
+                                                                         endRow-startRow,
+                                                                         endCol-startCol);
+                cMat.resize(cMat.size(), 1);
+                *eiter = cMat;
+                ++eiter;
+            }
+        } else {
+            /* Holds image convolved with basis function */
+            afwImage::Image<PixelT> cimage(templateImage.getDimensions());
 
-            Eigen::MatrixXd cMat = imageToEigenMatrix(cimage).block(startRow,
-                                                                    startCol,
-                                                                    endRow-startRow,
-                                                                    endCol-startCol);
-            cMat.resize(cMat.size(), 1);
-            *eiter = cMat;
+            /* Create C_i in the formalism of Alard & Lupton */
+            for (kiter = basisList.begin(); kiter != basisList.end(); ++kiter, ++eiter) {
+                afwMath::convolve(cimage, templateImage, **kiter, false); /* cimage stores convolved image */
+
+                Eigen::MatrixXd cMat = imageToEigenMatrix(cimage).block(startRow,
+                                                                        startCol,
+                                                                        endRow-startRow,
+                                                                        endCol-startCol);
+                cMat.resize(cMat.size(), 1);
+                *eiter = cMat;
 
+            }
         }
 
         double time = t.elapsed();
@@ -390,6 +520,110 @@ namespace diffim {
         _bVec = _cMat.transpose() * (_ivVec.asDiagonal() * _iVec);
     }
 
+    template <typename InputT>
+    void StaticKernelSolution<InputT>::_buildDeltaFunction(
+        Eigen::MatrixXd const& tMat,
+        Eigen::MatrixXd const& iMat,
+        Eigen::MatrixXd const& ivMat,
+        int startRow,
+        int startCol,
+        std::vector<std::pair<int, int> > const& offsets
+        ) {
+
+        int const nRows = iMat.rows();
+        int const nCols = iMat.cols();
+        unsigned int const nKernelParameters     = offsets.size();
+        unsigned int const nBackgroundParameters = _fitForBackground ? 1 : 0;
+        unsigned int const nParameters           = nKernelParameters + nBackgroundParameters;
+
+        Eigen::MatrixXd mMat(nParameters, nParameters);
+        Eigen::VectorXd bVec(nParameters);
+        Eigen::MatrixXd wiMat = ivMat.cwiseProduct(iMat);
+
+        /* B and the background terms only need one pass over each shifted window */
+        for (unsigned int k = 0; k < nKernelParameters; ++k) {
+            Eigen::MatrixXd const tWindow = tMat.block(startRow + offsets[k].first,
+                                                       startCol + offsets[k].second,
+                                                       nRows, nCols);
+            bVec(k) = tWindow.cwiseProduct(wiMat).sum();
+            if (_fitForBackground) {
+                mMat(k, nParameters-1) = mMat(nParameters-1, k) = tWindow.cwiseProduct(ivMat).sum();
+            }
+        }
+        if (_fitForBackground) {
+            mMat(nParameters-1, nParameters-1) = ivMat.sum();
+            bVec(nParameters-1) = wiMat.sum();
+        }
+
+        if (ivMat.maxCoeff() == ivMat.minCoeff()) {
+            /*
+               Constant weighting : M_jk = w sum_{q in window j} T(q) T(q + o_k - o_j).
+               Group the pairs by relative shift and take every windowed sum from one
+               summed-area table of the shifted product image.
+            */
+            double const weight = ivMat(0, 0);
+            std::map<std::pair<int, int>, std::vector<std::pair<int, int> > > pairsByShift;
+            for (unsigned int j = 0; j < nKernelParameters; ++j) {
+                for (unsigned int k = j; k < nKernelParameters; ++k) {
+                    std::pair<int, int> shift(offsets[k].first - offsets[j].first,
+                                              offsets[k].second - offsets[j].second);
+                    pairsByShift[shift].push_back(std::make_pair(j, k));
+                }
+            }
+
+            int const tRows = tMat.rows();
+            int const tCols = tMat.cols();
+            Eigen::MatrixXd sumTable = Eigen::MatrixXd::Zero(tRows + 1, tCols + 1);
+            for (auto const & entry : pairsByShift) {
+                int const dRow = entry.first.first;
+                int const dCol = entry.first.second;
+                for (int r = 0; r < tRows; ++r) {
+                    bool const rowOk = (r + dRow >= 0) && (r + dRow < tRows);
+                    for (int c = 0; c < tCols; ++c) {
+                        double product = 0.0;
+                        if (rowOk && (c + dCol >= 0) && (c + dCol < tCols)) {
+                            product = tMat(r, c) * tMat(r + dRow, c + dCol);
+                        }
+                        sumTable(r+1, c+1) = product + sumTable(r, c+1) + sumTable(r+1, c) - sumTable(r, c);
+                    }
+                }
+                for (auto const & jk : entry.second) {
+                    int const r0 = startRow + offsets[jk.first].first;
+                    int const c0 = startCol + offsets[jk.first].second;
+                    int const r1 = r0 + nRows;
+                    int const c1 = c0 + nCols;
+                    double const windowSum = sumTable(r1, c1) - sumTable(r0, c1) - sumTable(r1, c0) +
+                        sumTable(r0, c0);
+                    mMat(jk.first, jk.second) = mMat(jk.second, jk.first) = weight * windowSum;
+                }
+            }
+        } else {
+            /* Spatially varying weights : direct shifted-window cross-products */
+            for (unsigned int j = 0; j < nKernelParameters; ++j) {
+                Eigen::MatrixXd const wtWindow = tMat.block(startRow + offsets[j].first,
+                                                            startCol + offsets[j].second,
+                                                            nRows, nCols).cwiseProduct(ivMat);
+                for (unsigned int k = j; k < nKernelParameters; ++k) {
+                    mMat(j, k) = mMat(k, j) = wtWindow.cwiseProduct(
+                        tMat.block(startRow + offsets[k].first, startCol + offsets[k].second,
+                                   nRows, nCols)).sum();
+                }
+            }
+        }
+
+        Eigen::MatrixXd iCol = iMat;
+        Eigen::MatrixXd ivCol = ivMat;
+        iCol.resize(iCol.size(), 1);
+        ivCol.resize(ivCol.size(), 1);
+
+        /* There is no design matrix to keep */
+        _cMat.resize(0, 0);
+        _ivVec = ivCol.col(0);
+        _iVec = iCol.col(0);
+        _mMat = mMat;
+        _bVec = bVec;
+    }
+
     template <typename InputT>
     void StaticKernelSolution<InputT>::solve() {
         LOGL_DEBUG("TRACE3.ip.diffim.StaticKernelSolution.solve",
@@ -1163,8 +1397,11 @@ namespace diffim {
         }
 
 
-        this->_mMat = this->_cMat.transpose() * this->_ivVec.asDiagonal() * this->_cMat;
-        this->_bVec = this->_cMat.transpose() * this->_ivVec.asDiagonal() * this->_iVec;
+        /* The delta-function fast build leaves M and B in place without a C */
+        if (this->_cMat.size() > 0) {
+            this->_mMat = this->_cMat.transpose() * this->_ivVec.asDiagonal() * this->_cMat;
+            this->_bVec = this->_cMat.transpose() * this->_ivVec.asDiagonal() * this->_iVec;
+        }
 
 
         /* See N.R. 18.5
@@ -1249,6 +1486,13 @@ namespace diffim {
         StaticKernelSolution<InputT>::_setKernel();
     }
 
+    template <typename InputT>
+    bool RegularizedKernelSolution<InputT>::_needsDesignMatrix() {
+        /* The risk estimates use the singular vectors of C */
+        std::string lambdaType = _policy.getString("lambdaType");
+        return (lambdaType == "minimizeBiasedRisk") || (lambdaType == "minimizeUnbiasedRisk");
+    }
+
     template <typename InputT>
     std::vector<double> RegularizedKernelSolution<InputT>::_createLambdaSteps() {
         std::vector<double> lambdas;
@@ -1294,7 +1538,10 @@ namespace diffim {
         _nbases(0),
         _nkt(0),
         _nbt(0),
-        _nt(0) {
+        _nt(0),
+        _useIncrementalFactorization(false),
+        _hasFactorization(false),
+        _mFactorization() {
 
         bool isAlardLupton    = _policy.getString("kernelBasisSet") == "alard-lupton";
         bool usePca           = _policy.getBool("usePcaForSpatialKernel");
@@ -1303,6 +1550,18 @@ namespace diffim {
         }
         this->_fitForBackground = _policy.getBool("fitForBackground");
 
+        std::string kernelSolver = _policy.getString("kernelSolver");
+        if (kernelSolver == "CHOLESKY_LDLT") {
+            setPreferredSolver(CHOLESKY_LDLT);
+        } else if (kernelSolver == "CHOLESKY_LLT") {
+            setPreferredSolver(CHOLESKY_LLT);
+        } else if (kernelSolver == "LU") {
+            setPreferredSolver(LU);
+        } else {
+            throw LSST_EXCEPT(pexExcept::Exception, "kernelSolver not recognized");
+        }
+        setIncrementalFactorization(_policy.getBool("useIncrementalSpatialSolution"));
+
         _nbases = basisList.size();
         _nkt = _spatialKernelFunction->getParameters().size();
         _nbt = _fitForBackground ? _background->getParameters().size() : 0;
@@ -1338,6 +1597,44 @@ namespace diffim {
 
         LOGL_DEBUG("TRACE5.ip.diffim.SpatialKernelSolution.addConstraint",
                    "Adding candidate at %f, %f", xCenter, yCenter);
+        _accumulateConstraint(xCenter, yCenter, qMat, wVec, 1.0);
+    }
+
+    /**
+     * @brief Remove the constraint of a candidate previously passed to addConstraint
+     *
+     * @note qMat and wVec must be the values that were added; the candidate's
+     * contribution is subtracted from M and B, so the spatial solution does
+     * not have to be accumulated again from the remaining candidates.
+     */
+    void SpatialKernelSolution::removeConstraint(float xCenter, float yCenter,
+                                                 Eigen::MatrixXd const& qMat,
+                                                 Eigen::VectorXd const& wVec) {
+
+        LOGL_DEBUG("TRACE5.ip.diffim.SpatialKernelSolution.removeConstraint",
+                   "Removing candidate at %f, %f", xCenter, yCenter);
+        _accumulateConstraint(xCenter, yCenter, qMat, wVec, -1.0);
+    }
+
+    /**
+     * @brief Keep the Cholesky factor of M up to date as constraints are added and removed
+     *
+     * @note When set, solve() factors M once and afterwards applies each
+     * constraint as a few rank-one updates (downdates when removing) to the
+     * factor, instead of refactoring M.  It falls back to the preferred
+     * solver when M is not numerically positive definite.
+     */
+    void SpatialKernelSolution::setIncrementalFactorization(bool incremental) {
+        _useIncrementalFactorization = incremental;
+        if (!incremental) {
+            _hasFactorization = false;
+        }
+    }
+
+    void SpatialKernelSolution::_accumulateConstraint(float xCenter, float yCenter,
+                                                      Eigen::MatrixXd const& qMat,
+                                                      Eigen::VectorXd const& wVec,
+                                                      double sign) {
 
         /* Calculate P matrices */
         /* Pure kernel terms */
@@ -1399,14 +1696,14 @@ namespace diffim {
             m0 = 1;       /* we need to manually fill in the first (non-spatial) terms below */
             dm = _nkt-1;  /* need to shift terms due to lack of spatial variation in first term */
 
-            _mMat(0, 0) += qMat(0,0);
+            _mMat(0, 0) += sign * qMat(0,0);
             for(int m2 = 1; m2 < _nbases; m2++)  {
-                _mMat.block(0, m2*_nkt-dm, 1, _nkt) += qMat(0,m2) * pK.transpose();
+                _mMat.block(0, m2*_nkt-dm, 1, _nkt) += sign * qMat(0,m2) * pK.transpose();
             }
-            _bVec(0) += wVec(0);
+            _bVec(0) += sign * wVec(0);
 
             if (_fitForBackground) {
-                _mMat.block(0, mb, 1, _nbt) += qMat(0,_nbases) * pB.transpose();
+                _mMat.block(0, mb, 1, _nbt) += sign * qMat(0,_nbases) * pB.transpose();
             }
         }
 
@@ -1414,27 +1711,42 @@ namespace diffim {
         for(int m1 = m0; m1 < _nbases; m1++)  {
             /* Diagonal kernel-kernel term; only use upper triangular part of pKpKt */
             _mMat.block(m1*_nkt-dm, m1*_nkt-dm, _nkt, _nkt) +=
-                (pKpKt * qMat(m1,m1)).triangularView<Eigen::Upper>();
+                (pKpKt * (sign * qMat(m1,m1))).triangularView<Eigen::Upper>();
 
             /* Kernel-kernel terms */
             for(int m2 = m1+1; m2 < _nbases; m2++)  {
-                _mMat.block(m1*_nkt-dm, m2*_nkt-dm, _nkt, _nkt) += qMat(m1,m2) * pKpKt;
+                _mMat.block(m1*_nkt-dm, m2*_nkt-dm, _nkt, _nkt) += sign * qMat(m1,m2) * pKpKt;
             }
 
             if (_fitForBackground) {
                 /* Kernel cross terms with background */
-                _mMat.block(m1*_nkt-dm, mb, _nkt, _nbt) += qMat(m1,_nbases) * pKpBt;
+                _mMat.block(m1*_nkt-dm, mb, _nkt, _nbt) += sign * qMat(m1,_nbases) * pKpBt;
             }
 
             /* B vector */
-            _bVec.segment(m1*_nkt-dm, _nkt) += wVec(m1) * pK;
+            _bVec.segment(m1*_nkt-dm, _nkt) += sign * wVec(m1) * pK;
         }
 
         if (_fitForBackground) {
             /* Background-background terms only */
             _mMat.block(mb, mb, _nbt, _nbt) +=
-                (pBpBt * qMat(_nbases,_nbases)).triangularView<Eigen::Upper>();
-            _bVec.segment(mb, _nbt)         += wVec(_nbases) * pB;
+                (pBpBt * (sign * qMat(_nbases,_nbases))).triangularView<Eigen::Upper>();
+            _bVec.segment(mb, _nbt)         += sign * wVec(_nbases) * pB;
+        }
+
+        if (_hasFactorization) {
+            /* M changes by sign * P Q P^T, where column m of P holds the spatial weights of basis m */
+            Eigen::MatrixXd pMat = Eigen::MatrixXd::Zero(_nt, qMat.rows());
+            if (_constantFirstTerm) {
+                pMat(0, 0) = 1.0;
+            }
+            for (int m1 = m0; m1 < _nbases; m1++) {
+                pMat.block(m1*_nkt-dm, m1, _nkt, 1) = pK;
+            }
+            if (_fitForBackground) {
+                pMat.block(mb, _nbases, _nbt, 1) = pB;
+            }
+            _updateFactorization(pMat, qMat, sign);
         }
 
         if (DEBUG_MATRIX) {
@@ -1445,6 +1757,35 @@ namespace diffim {
 
     }
 
+    void SpatialKernelSolution::_updateFactorization(Eigen::MatrixXd const& pMat,
+                                                     Eigen::MatrixXd const& qMat,
+                                                     double sign) {
+        /* Q = V diag(lambda) V^T, so P Q P^T is a sum of rank-one terms lambda (P v)(P v)^T */
+        Eigen::MatrixXd qSym = qMat.selfadjointView<Eigen::Upper>();
+        Eigen::SelfAdjointEigenSolver<Eigen::MatrixXd> eVecValues(qSym);
+        Eigen::MatrixXd const& vMat = eVecValues.eigenvectors();
+        Eigen::VectorXd const& eValues = eVecValues.eigenvalues();
+        double const threshold = std::numeric_limits<double>::epsilon() * eValues.rows() *
+            eValues.cwiseAbs().maxCoeff();
+
+        /* Apply the updates before the downdates, so the intermediate factors stay positive definite */
+        int const nValues = eValues.rows();
+        for (int i = 0; i < nValues; i++) {
+            int idx = (sign > 0) ? nValues - 1 - i : i;
+            if (std::fabs(eValues(idx)) <= threshold) {
+                continue;
+            }
+            Eigen::VectorXd uVec = pMat * vMat.col(idx);
+            _mFactorization.rankUpdate(uVec, sign * eValues(idx));
+            if (_mFactorization.info() != Eigen::Success) {
+                LOGL_DEBUG("TRACE3.ip.diffim.SpatialKernelSolution._updateFactorization",
+                           "Rank update failed; refactoring at the next solve");
+                _hasFactorization = false;
+                return;
+            }
+        }
+    }
+
     std::shared_ptr<lsst::afw::image::Image<lsst::afw::math::Kernel::Pixel>> SpatialKernelSolution::makeKernelImage(afwGeom::Point2D const& pos) {
         if (_solvedBy == KernelSolution::NONE) {
             throw LSST_EXCEPT(pexExcept::Exception, "Kernel not solved; cannot return image");
@@ -1464,11 +1805,38 @@ namespace diffim {
             }
         }
 
-        try {
-            KernelSolution::solve();
-        } catch (pexExcept::Exception &e) {
-            LSST_EXCEPT_ADD(e, "Unable to solve spatial kernel matrix");
-            throw e;
+        _solvedBy = KernelSolution::NONE;
+        if (_useIncrementalFactorization) {
+            if (!_hasFactorization) {
+                _mFactorization.compute(_mMat);
+                _hasFactorization = (_mFactorization.info() == Eigen::Success);
+            }
+            if (_hasFactorization) {
+                /* Same acceptance criteria as the Cholesky paths of KernelSolution::solve */
+                double const pivotThreshold = std::numeric_limits<double>::epsilon() * _nt;
+                Eigen::VectorXd dVec = Eigen::MatrixXd(_mFactorization.matrixL()).diagonal().array().square();
+                if (dVec.minCoeff() > pivotThreshold * dVec.maxCoeff()) {
+                    Eigen::VectorXd aVec = _mFactorization.solve(_bVec);
+                    if (aVec.allFinite()) {
+                        _aVec = aVec;
+                        _solvedBy = KernelSolution::CHOLESKY_LLT;
+                    }
+                }
+                if (_solvedBy == KernelSolution::NONE) {
+                    LOGL_DEBUG("TRACE3.ip.diffim.SpatialKernelSolution.solve",
+                               "Unable to solve with the incremental factorization");
+                    _hasFactorization = false;
+                }
+            }
+        }
+
+        if (_solvedBy == KernelSolution::NONE) {
+            try {
+                KernelSolution::solve();
+            } catch (pexExcept::Exception &e) {
+                LSST_EXCEPT_ADD(e, "Unable to solve spatial kernel matrix");
+                throw e;
+            }
         }
         /* Turn matrices into _kernel and _background */
         _setKernel();
@@ -1484,9 +1852,7 @@ namespace diffim {
     }
 
     void SpatialKernelSolution::_setKernel() {
-        /* Report on condition number */
-        double cNumber = this->getConditionNumber(EIGENVALUE);
-
+        /* The condition number, an eigen-decomposition of M, is only computed to report a failure */
         if (_nkt == 1) {
             /* Not spatially varying; this fork is a specialization for convolution speed--up */
 
@@ -1497,7 +1863,7 @@ namespace diffim {
                     throw LSST_EXCEPT(
                         pexExcept::Exception,
                         str(boost::format(
-                                "I. Unable to determine spatial kernel solution %d (nan).  Condition number = %.3e") % i % cNumber));
+                                "I. Unable to determine spatial kernel solution %d (nan).  Condition number = %.3e") % i % this->getConditionNumber(EIGENVALUE)));
                 }
                 kCoeffs[i] = _aVec(i);
             }
@@ -1521,7 +1887,7 @@ namespace diffim {
                         throw LSST_EXCEPT(
                             pexExcept::Exception,
                             str(boost::format(
-                                    "II. Unable to determine spatial kernel solution %d (nan).  Condition number = %.3e") % idx % cNumber));
+                                    "II. Unable to determine spatial kernel solution %d (nan).  Condition number = %.3e") % idx % this->getConditionNumber(EIGENVALUE)));
                     }
                     kCoeffs[i][0] = _aVec(idx++);
                 }
@@ -1531,7 +1897,7 @@ namespace diffim {
                             throw LSST_EXCEPT(
                                 pexExcept::Exception,
                                 str(boost::format(
-                                        "III. Unable to determine spatial kernel solution %d (nan).  Condition number = %.3e") % idx % cNumber));
+                                        "III. Unable to determine spatial kernel solution %d (nan).  Condition number = %.3e") % idx % this->getConditionNumber(EIGENVALUE)));
                         }
                         kCoeffs[i][j] = _aVec(idx++);
                     }
@@ -86,6 +86,21 @@ namespace detail {
         _nRejected = 0;
     }
 
+    template<typename PixelT>
+    typename KernelSumVisitor<PixelT>::Ptr KernelSumVisitor<PixelT>::makeWorker() const {
+        /* Keep the mode and the kernel sum statistics; start with no sums or rejections */
+        Ptr worker(new KernelSumVisitor<PixelT>(*this));
+        worker->_kSums.clear();
+        worker->_nRejected = 0;
+        return worker;
+    }
+
+    template<typename PixelT>
+    void KernelSumVisitor<PixelT>::mergeWorker(KernelSumVisitor<PixelT> const& worker) {
+        _kSums.insert(_kSums.end(), worker._kSums.begin(), worker._kSums.end());
+        _nRejected += worker._nRejected;
+    }
+
     template<typename PixelT>
     void KernelSumVisitor<PixelT>::processCandidate(lsst::afw::math::SpatialCellCandidate 
                                                     *candidate) {
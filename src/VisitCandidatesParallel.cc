@@ -0,0 +1,41 @@
+// -*- lsst-c++ -*-
+/**
+ * @file VisitCandidatesParallel.cc
+ *
+ * @brief Implementation of the thread-parallel candidate visiting helpers
+ *
+ * @ingroup ip_diffim
+ */
+
+#include "lsst/afw/math.h"
+
+#include "lsst/ip/diffim/VisitCandidatesParallel.h"
+
+namespace afwMath        = lsst::afw::math;
+
+namespace lsst {
+namespace ip {
+namespace diffim {
+namespace detail {
+
+    std::vector<afwMath::SpatialCellCandidate *> getCandidatesToVisit(
+        afwMath::SpatialCellSet &cellSet,
+        int const nMaxPerCell
+        ) {
+        std::vector<afwMath::SpatialCellCandidate *> candidates;
+
+        /* Same traversal as SpatialCell::visitCandidates; the iterators skip BAD candidates */
+        for (auto const &cell : cellSet.getCellList()) {
+            int i = 0;
+            for (afwMath::SpatialCell::iterator candidate = cell->begin(), candidateEnd = cell->end();
+                 candidate != candidateEnd; ++candidate, ++i) {
+                if (nMaxPerCell > 0 && i == nMaxPerCell) {
+                    break;
+                }
+                candidates.push_back((*candidate).get());
+            }
+        }
+        return candidates;
+    }
+
+}}}} // end of namespace lsst::ip::diffim::detail
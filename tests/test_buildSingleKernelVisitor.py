@@ -256,6 +256,42 @@ class DiffimTestCases(unittest.TestCase):
             for cand in cell.begin(False):
                 self.assertEqual(cand.getStatus(), afwMath.SpatialCellCandidate.GOOD)
 
+    def testVisitParallel(self, nCell=3, nThreads=4):
+        # A single, central delta function can only fit candidates with
+        # centered power, so the off-center candidates are rejected
+        kList = [self.kList[len(self.kList)//2]]
+        sizeCellX = self.policy.get("sizeCellX")
+        sizeCellY = self.policy.get("sizeCellY")
+        bbox = afwGeom.Box2I(afwGeom.Point2I(0, 0), afwGeom.Extent2I(sizeCellX * nCell, sizeCellY * nCell))
+
+        results = []
+        for threads in (1, nThreads):
+            kernelCellSet = afwMath.SpatialCellSet(bbox, sizeCellX, sizeCellY)
+            for candX in range(nCell):
+                for candY in range(nCell):
+                    xCen = candX * sizeCellX + sizeCellX // 2
+                    yCen = candY * sizeCellY + sizeCellY // 2
+                    kernelCellSet.insertCandidate(self.makeCandidate(1.0, xCen, yCen))
+                    if (candX + candY) % 2 == 0:
+                        mi1 = afwImage.MaskedImageF(afwGeom.Extent2I(self.size, self.size))
+                        mi1.getVariance().set(0.1)
+                        mi1[self.size//2, self.size//2, afwImage.LOCAL] = (1, 0x0, 1)
+                        mi2 = afwImage.MaskedImageF(afwGeom.Extent2I(self.size, self.size))
+                        mi2.getVariance().set(0.1)
+                        mi2[self.size//3, self.size//3, afwImage.LOCAL] = (self.size**2, 0x0, 1)
+                        kc = ipDiffim.makeKernelCandidate(xCen, yCen, mi1, mi2, self.policy)
+                        kernelCellSet.insertCandidate(kc)
+
+            bskv = ipDiffim.BuildSingleKernelVisitorF(kList, self.policy)
+            ipDiffim.visitCandidatesParallel(bskv, kernelCellSet, 2, threads)
+            statuses = [cand.getStatus() for cell in kernelCellSet.getCellList()
+                        for cand in cell.begin(False)]
+            results.append((bskv.getNProcessed(), bskv.getNRejected(), statuses))
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][0], nCell * nCell + (nCell * nCell + 1) // 2)
+        self.assertEqual(results[0][1], (nCell * nCell + 1) // 2)
+
     def tearDown(self):
         del self.config
         del self.policy
@@ -1,5 +1,6 @@
 import unittest
 
+import numpy as np
 
 import lsst.utils.tests
 import lsst.afw.geom as afwGeom
@@ -16,7 +17,7 @@ logUtils.traceSetAt("ip.diffim", 4)
 # FitSpatialKernelFromCandidates.py
 
 
-class DiffimTestCases(unittest.TestCase):
+class DiffimTestCases(lsst.utils.tests.TestCase):
 
     def setUp(self):
         self.config = ipDiffim.ImagePsfMatchTask.ConfigClass()
@@ -163,6 +164,55 @@ class DiffimTestCases(unittest.TestCase):
         nBgTerms = int(0.5 * (bgo + 1) * (bgo + 2))
         self.assertEqual(len(spatialBgSolution), nBgTerms)
 
+    def testIncrementalSolution(self):
+        # Re-using a visitor, which removes the constraints of the candidates
+        # not visited again, must give the solution of a fresh visitor
+        basisList = ipDiffim.makeKernelBasisList(self.subconfig)
+        self.policy.set('spatialKernelOrder', 1)
+        self.policy.set('spatialBgOrder', 1)
+        self.policy.set('fitForBackground', True)
+
+        bbox = afwGeom.Box2I(afwGeom.Point2I(0, 0),
+                             afwGeom.Extent2I(self.size*10, self.size*10))
+
+        bsikv = ipDiffim.BuildSingleKernelVisitorF(basisList, self.policy)
+        cands = []
+        for x in range(1, self.size, 10):
+            for y in range(1, self.size, 10):
+                cand = self.makeCandidate(1.0 + 0.001*(x + y), x, y)
+                bsikv.processCandidate(cand)
+                cands.append(cand)
+        kept = cands[::2]
+
+        for incremental in (False, True):
+            self.policy.set('useIncrementalSpatialSolution', incremental)
+
+            bspkv1 = ipDiffim.BuildSpatialKernelVisitorF(basisList, bbox, self.policy)
+            for cand in kept:
+                bspkv1.processCandidate(cand)
+            bspkv1.solveLinearEquation()
+
+            bspkv2 = ipDiffim.BuildSpatialKernelVisitorF(basisList, bbox, self.policy)
+            for cand in cands:
+                bspkv2.processCandidate(cand)
+            bspkv2.solveLinearEquation()
+            bspkv2.reset()
+            for cand in kept:
+                bspkv2.processCandidate(cand)
+            bspkv2.solveLinearEquation()
+            self.assertEqual(bspkv2.getNCandidates(), len(kept))
+
+            m1 = bspkv1.getKernelSolution().getM()
+            m2 = bspkv2.getKernelSolution().getM()
+            self.assertFloatsAlmostEqual(m2, m1, rtol=None, atol=1e-10*np.abs(m1).max())
+
+            sk1, sb1 = bspkv1.getSolutionPair()
+            sk2, sb2 = bspkv2.getSolutionPair()
+            self.assertFloatsAlmostEqual(np.array(sk2.getSpatialParameters()),
+                                         np.array(sk1.getSpatialParameters()), rtol=1e-6)
+            self.assertFloatsAlmostEqual(np.array(sb2.getParameters()),
+                                         np.array(sb1.getParameters()), rtol=1e-6)
+
 
 #####
 
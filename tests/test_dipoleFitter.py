@@ -123,11 +123,51 @@ class DipoleFitTest(lsst.utils.tests.TestCase):
             self.assertFloatsAlmostEqual(result.negCentroidX, params.xc[i] - offsets[i], rtol=rtol)
             self.assertFloatsAlmostEqual(result.negCentroidY, params.yc[i] - offsets[i], rtol=rtol)
 
-    def _runDetection(self, params):
+    def testDipoleAlgorithmAnalytic(self):
+        """Test that the analytic-derivative fitting engine reproduces the
+        fluxes/centroids of the lmfit one, and the input values, with the
+        background pre-fit (fitBackground=1) or also fit (fitBackground=2).
+        """
+        params = DipoleTestImage()
+        catalog = params.testImage.detectDipoleSources(minBinSize=32)
+
+        rtol = params.rtol
+        offsets = params.offsets
+        testImage = params.testImage
+        for fitBackground in (1, 2):
+            for separateNegParams in (False, True):
+                for i, s in enumerate(catalog):
+                    msg = "fitBackground=%d, separateNegParams=%s, dipole %d" % (
+                        fitBackground, separateNegParams, i)
+                    alg = DipoleFitAlgorithm(testImage.diffim, testImage.posImage, testImage.negImage)
+                    results = {engine: alg.fitDipole(s, rel_weight=0.5, fitBackground=fitBackground,
+                                                     separateNegParams=separateNegParams,
+                                                     engine=engine)[0]
+                               for engine in ("lmfit", "analytic")}
+                    result = results["analytic"]
+
+                    self.assertFloatsAlmostEqual((result.posFlux + abs(result.negFlux))/2.,
+                                                 params.flux[i], rtol=rtol, msg=msg)
+                    self.assertFloatsAlmostEqual(result.posCentroidX, params.xc[i] + offsets[i],
+                                                 rtol=rtol, msg=msg)
+                    self.assertFloatsAlmostEqual(result.posCentroidY, params.yc[i] + offsets[i],
+                                                 rtol=rtol, msg=msg)
+                    self.assertFloatsAlmostEqual(result.negCentroidX, params.xc[i] - offsets[i],
+                                                 rtol=rtol, msg=msg)
+                    self.assertFloatsAlmostEqual(result.negCentroidY, params.yc[i] - offsets[i],
+                                                 rtol=rtol, msg=msg)
+                    for name in ("posFlux", "negFlux", "posCentroidX", "posCentroidY",
+                                 "negCentroidX", "negCentroidY", "signalToNoise"):
+                        self.assertFloatsAlmostEqual(getattr(result, name), getattr(results["lmfit"], name),
+                                                     rtol=1e-3, msg="%s: %s" % (msg, name))
+                    self.assertFloatsAlmostEqual(result.chi2, results["lmfit"].chi2, rtol=0.01, msg=msg)
+
+    def _runDetection(self, params, fitEngine="lmfit"):
         """!Run 'diaSource' detection on the diffim, including merging of
         positive and negative sources.
 
-        Then run DipoleFitTask on the image and return the resulting catalog.
+        Then run DipoleFitTask on the image, fitting with `fitEngine`, and
+        return the resulting catalog.
         """
 
         # Create the various tasks and schema -- avoid code reuse.
@@ -142,6 +182,7 @@ class DipoleFitTest(lsst.utils.tests.TestCase):
         measureConfig.slots.shape = None
         measureConfig.slots.centroid = "ip_diffim_NaiveDipoleCentroid"
         measureConfig.doReplaceWithNoise = False
+        measureConfig.plugins["ip_diffim_DipoleFit"].fitEngine = fitEngine
 
         measureConfig.plugins.names = ["base_CircularApertureFlux",
                                        "base_PixelFlags",
@@ -236,6 +277,14 @@ class DipoleFitTest(lsst.utils.tests.TestCase):
         sources = self._runDetection(params)
         self._checkTaskOutput(params, sources)
 
+    def testDipoleTaskAnalytic(self):
+        """Test the dipole fitting singleFramePlugin with the
+        analytic-derivative fitting engine, as in `testDipoleTask`.
+        """
+        params = DipoleTestImage()
+        sources = self._runDetection(params, fitEngine="analytic")
+        self._checkTaskOutput(params, sources)
+
     def testDipoleTaskNoPosImage(self):
         """!Test the dipole fitting singleFramePlugin in the case where no
         `posImage` is provided. It should be the same as above because
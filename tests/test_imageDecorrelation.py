@@ -18,7 +18,10 @@
 # You should have received a copy of the LSST License Statement and
 # the GNU General Public License along with this program.  If not,
 # see <https://www.lsstcorp.org/LegalNotices/>.
+import os
+import tempfile
 import unittest
+import unittest.mock
 
 import numpy as np
 
@@ -346,6 +349,143 @@ class DiffimCorrectionTest(lsst.utils.tests.TestCase):
         # Template variance is higher than that of the science img.
         self._testDiffimCorrection(svar=0.04, tvar=0.08)
 
+    def testSinglePrecision(self):
+        """Test that the single-precision decorrelation kernel, corrected PSF
+        and diffim agree with the double-precision ones.
+        """
+        self._setUpImages()
+        diffExp, mKernel, expected_var = self._makeAndTestUncorrectedDiffim()
+        results = {}
+        for useSinglePrecision in (False, True):
+            config = DecorrelateALKernelTask.ConfigClass()
+            config.useSinglePrecision = useSinglePrecision
+            task = DecorrelateALKernelTask(config=config)
+            results[useSinglePrecision] = task.run(self.im1ex, self.im2ex, diffExp, mKernel)
+
+        kimg = afwImage.ImageD(mKernel.getDimensions())
+        mKernel.computeImage(kimg, False)
+        kernel64 = DecorrelateALKernelTask._computeDecorrelationKernel(kimg.getArray(), 0.04, 0.04)
+        kernel32 = DecorrelateALKernelTask._computeDecorrelationKernel(kimg.getArray(), 0.04, 0.04,
+                                                                       dtype=np.float32)
+        self.assertEqual(kernel32.dtype, np.float32)
+        self.assertFloatsAlmostEqual(kernel32, kernel64, atol=1e-5*np.max(np.abs(kernel64)))
+
+        corrected64 = results[False].correctedExposure
+        corrected32 = results[True].correctedExposure
+        arr64 = corrected64.getMaskedImage().getImage().getArray()
+        arr32 = corrected32.getMaskedImage().getImage().getArray()
+        good = np.isfinite(arr64) & np.isfinite(arr32)
+        self.assertLess(np.std(arr32[good] - arr64[good]), 1e-4*np.std(arr64[good]))
+        self._testDecorrelation(expected_var, corrected32)
+
+    def testBatchedDecorrelationKernels(self):
+        """Test that the batched decorrelation kernels and corrected PSFs are
+        the same as those computed one at a time.
+        """
+        self._setUpImages()
+        diffExp, mKernel, expected_var = self._makeAndTestUncorrectedDiffim()
+        kimg = afwImage.ImageD(mKernel.getDimensions())
+        mKernel.computeImage(kimg, False)
+        kappa = kimg.getArray()
+        # Kernels shifted by different amounts, so that their peaks are re-centered differently
+        kappas = np.array([kappa, np.roll(kappa, 1, axis=0), np.roll(kappa, -2, axis=1)])
+        svars = np.array([0.04, 0.04, 0.08])
+        tvars = np.array([0.04, 0.08, 0.04])
+        psf = self.im1ex.getPsf().computeKernelImage().getArray()
+
+        for preConvKernel in (None, psf):
+            kernels = DecorrelateALKernelTask._computeDecorrelationKernels(kappas, svars, tvars,
+                                                                           preConvKernel)
+            psfs = DecorrelateALKernelTask.computeCorrectedDiffimPsfs(kernels, psf, svars, tvars)
+            for i in range(len(kappas)):
+                kernel = DecorrelateALKernelTask._computeDecorrelationKernel(kappas[i], svars[i], tvars[i],
+                                                                             preConvKernel)
+                self.assertFloatsAlmostEqual(kernels[i], kernel, rtol=1e-10, atol=1e-12)
+                psfc = DecorrelateALKernelTask.computeCorrectedDiffimPsf(kernel, psf, svars[i], tvars[i])
+                self.assertFloatsAlmostEqual(psfs[i], psfc, rtol=1e-10, atol=1e-12)
+
+    def testFftConvolution(self):
+        """Test that the FFT convolution, in one block or overlap-add blocks,
+        gives the same decorrelated diffim as the direct convolution.
+        """
+        self._setUpImages()
+        diffExp, mKernel, expected_var = self._makeAndTestUncorrectedDiffim()
+        config = DecorrelateALKernelTask.ConfigClass()
+        direct = DecorrelateALKernelTask(config=config).run(self.im1ex, self.im2ex, diffExp, mKernel)
+        config.convolutionMethod = "fft"
+        for blockSize in (0, 100):
+            config.fftBlockSize = blockSize
+            fft = DecorrelateALKernelTask(config=config).run(self.im1ex, self.im2ex, diffExp, mKernel)
+            self.assertMaskedImagesAlmostEqual(fft.correctedExposure.getMaskedImage(),
+                                               direct.correctedExposure.getMaskedImage(),
+                                               rtol=1e-6, atol=1e-10)
+            self._testDecorrelation(expected_var, fft.correctedExposure)
+
+    def testKernelCache(self):
+        """Test that repeated decorrelations reuse the cached decorrelation
+        kernel and corrected PSF, from memory or disk, and give the same
+        results as without the cache.
+        """
+        import lsst.ip.diffim.imageDecorrelation as imageDecorrelation
+        self._setUpImages()
+        diffExp, mKernel, expected_var = self._makeAndTestUncorrectedDiffim()
+        DecorrelateALKernelTask.clearKernelCache()
+        self.addCleanup(DecorrelateALKernelTask.clearKernelCache)
+        cache = imageDecorrelation._decorrelationKernelCache
+
+        def runTask(config):
+            task = DecorrelateALKernelTask(config=config)
+            return task.run(self.im1ex, self.im2ex, diffExp, mKernel).correctedExposure
+
+        expected = runTask(DecorrelateALKernelTask.ConfigClass())
+        config = DecorrelateALKernelTask.ConfigClass()
+        config.kernelCacheSize = 10
+        with tempfile.TemporaryDirectory() as cacheDir:
+            config.kernelCacheDir = cacheDir
+            results = [runTask(config) for i in range(2)]
+            self.assertEqual((cache.nMisses, cache.nHits, cache.nDiskHits), (1, 1, 0))
+
+            # Another process (here, an emptied memory cache) reads them from disk
+            DecorrelateALKernelTask.clearKernelCache()
+            results.append(runTask(config))
+            self.assertEqual((cache.nMisses, cache.nHits, cache.nDiskHits), (0, 0, 1))
+
+        for result in results:
+            self.assertMaskedImagesEqual(result.getMaskedImage(), expected.getMaskedImage())
+            self.assertImagesEqual(result.getPsf().computeKernelImage(),
+                                   expected.getPsf().computeKernelImage())
+
+    def testKernelCacheFiles(self):
+        """Test that the kernel cache files are keyed by the cache version,
+        that a failed save leaves no temporary file behind, and that only the
+        arrays kept in memory are made read-only.
+        """
+        from lsst.ip.diffim.imageDecorrelation import _DecorrelationKernelCache
+
+        class NewerCache(_DecorrelationKernelCache):
+            version = _DecorrelationKernelCache.version + 1
+
+        arr = np.arange(4.)
+        key = _DecorrelationKernelCache.makeKey(arr)
+        self.assertNotEqual(NewerCache.makeKey(arr), key)
+
+        with tempfile.TemporaryDirectory() as cacheDir:
+            cache = _DecorrelationKernelCache()
+            with unittest.mock.patch.object(np, "savez", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    cache.get(key, lambda: (arr.copy(),), cacheDir)
+            self.assertEqual(os.listdir(cacheDir), [])
+
+            computed = cache.get(key, lambda: (arr.copy(),), cacheDir)
+            self.assertEqual(os.listdir(cacheDir), [key + ".npz"])
+            loaded = cache.get(key, lambda: (arr.copy(),), cacheDir)
+            self.assertTrue(computed[0].flags.writeable)
+            self.assertTrue(loaded[0].flags.writeable)
+            cached = _DecorrelationKernelCache(maxEntries=1).get(key, lambda: (arr.copy(),), cacheDir)
+            self.assertFalse(cached[0].flags.writeable)
+            newer = NewerCache().get(NewerCache.makeKey(arr), lambda: (arr + 1.,), cacheDir)
+            self.assertFloatsEqual(newer[0], arr + 1.)
+
     def _runDecorrelationTaskMapReduced(self, diffExp, mKernel):
         """ Run decorrelation using the imageMapReducer.
         """
@@ -382,10 +522,13 @@ class DiffimCorrectionTest(lsst.utils.tests.TestCase):
         # Template variance is higher than that of the science img.
         self._testDiffimCorrection_mapReduced(svar=0.08, tvar=0.04)
 
-    def _runDecorrelationSpatialTask(self, diffExp, mKernel, spatiallyVarying=False):
+    def _runDecorrelationSpatialTask(self, diffExp, mKernel, spatiallyVarying=False,
+                                     spatialMethod="mapReduce"):
         """ Run decorrelation using the DecorrelateALKernelSpatialTask.
         """
         config = DecorrelateALKernelSpatialConfig()
+        config.spatialMethod = spatialMethod
+        config.kernelGridStep = 50
         task = DecorrelateALKernelSpatialTask(config=config)
         decorrResult = task.run(scienceExposure=self.im1ex, templateExposure=self.im2ex,
                                 subtractedExposure=diffExp, psfMatchingKernel=mKernel,
@@ -420,6 +563,43 @@ class DiffimCorrectionTest(lsst.utils.tests.TestCase):
         # Template variance is higher than that of the science img.
         self._testDiffimCorrection_spatialTask(svar=0.08, tvar=0.04)
 
+    def testDiffimCorrection_interpolated(self):
+        """Test decorrelated diffim when interpolating the decorrelation kernel
+        across the exposure, and compare it with the non spatially-varying one.
+        """
+        for svar, tvar in [(0.04, 0.04), (0.04, 0.08), (0.08, 0.04)]:
+            self._setUpImages(svar=svar, tvar=tvar)
+            diffExp, mKernel, expected_var = self._makeAndTestUncorrectedDiffim()
+            corrected_diffExp = self._runDecorrelationSpatialTask(diffExp, mKernel, True,
+                                                                  spatialMethod="interpolate")
+            var, mn = self._testDecorrelation(expected_var, corrected_diffExp)
+            self.assertTrue(np.array_equal(corrected_diffExp.getMaskedImage().getMask().getArray(),
+                                           diffExp.getMaskedImage().getMask().getArray()))
+
+            corrected_diffExp_OLD = self._runDecorrelationSpatialTask(diffExp, mKernel, False)
+            var_OLD, mn_OLD = self._testDecorrelation(expected_var, corrected_diffExp_OLD)
+            self.assertFloatsAlmostEqual(var, var_OLD, rtol=0.03)
+
+            # Compare with the map-reduced decorrelation, away from the edges
+            mapReduced = self._runDecorrelationSpatialTask(diffExp, mKernel, True, spatialMethod="mapReduce")
+            border = 2*max(mKernel.getDimensions())
+            inner = (slice(border, -border), slice(border, -border))
+            expected = mapReduced.getMaskedImage().getImage().getArray()[inner]
+            self.assertFloatsAlmostEqual(corrected_diffExp.getMaskedImage().getImage().getArray()[inner],
+                                         expected, atol=0.1*np.std(expected), rtol=None)
+
+            # The PSF varies as that of the map-reduced decorrelation, rather than being fixed
+            psf = corrected_diffExp.getPsf()
+            self.assertGreater(psf.getComponentCount(), 1)
+            bbox = diffExp.getBBox()
+            for x, y in [(bbox.getBeginX() + border, bbox.getBeginY() + border),
+                         ((bbox.getBeginX() + bbox.getEndX())/2., (bbox.getBeginY() + bbox.getEndY())/2.),
+                         (bbox.getEndX() - border, bbox.getEndY() - border)]:
+                point = afwGeom.Point2D(x, y)
+                self.assertFloatsAlmostEqual(psf.computeShape(point).getDeterminantRadius(),
+                                             mapReduced.getPsf().computeShape(point).getDeterminantRadius(),
+                                             rtol=0.02)
+
 
 class MemoryTester(lsst.utils.tests.MemoryTestCase):
     pass
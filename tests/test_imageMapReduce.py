@@ -256,6 +256,34 @@ class ImageMapReduceTest(lsst.utils.tests.TestCase):
                                      msg='Failed on withNaNs: %s' % str(withNaNs))
         self._testCoaddPsf(newExp)
 
+    def testBlendWithOverlaps(self):
+        """Test sample grid task that adds 5.0 to a noise image and uses
+        the 'blend' `reduceOperation` on overlapping subimages.
+        """
+        exposure = self.exposure.clone()
+        img = exposure.getMaskedImage().getImage()
+        afwMath.randomGaussianImage(img, afwMath.Random())
+        config = AddAmountImageMapReduceConfig()
+        config.gridStepX = config.gridStepY = 8.
+        config.reducer.reduceOperation = 'blend'
+        config.mapper.addAmount = 5.
+        task = ImageMapReduceTask(config)
+        newExp = task.run(exposure).exposure
+        newArr = newExp.getMaskedImage().getImage().getArray()
+        self.assertEqual(np.sum(np.isnan(newArr)), 0)
+        self.assertFloatsAlmostEqual(img.getArray(), newArr - 5., atol=1e-5)
+        self._testCoaddPsf(newExp)
+
+        # Weights taper towards the inner edges only, and never vanish
+        fullBBox = exposure.getBBox()
+        box = afwGeom.Box2I(afwGeom.Point2I(0, 20), afwGeom.Extent2I(16, 16))
+        wts = task.reducer._getBlendWeights(box, fullBBox)
+        self.assertEqual(wts.shape, (16, 16))
+        self.assertTrue(np.all(wts > 0.))
+        self.assertFloatsAlmostEqual(wts[:, 0], wts[:, 7])
+        self.assertLess(wts[0, 7], wts[7, 7])
+        self.assertLess(wts[7, 15], wts[7, 7])
+
     def _testCoaddPsf(self, newExposure):
         """Test that the new CoaddPsf of the `newExposure` returns PSF images
         ~identical to the input PSF of `self.exposure` across a grid
@@ -338,6 +366,159 @@ class ImageMapReduceTest(lsst.utils.tests.TestCase):
         firstPixel = testExposure.getMaskedImage().getImage().getArray()[0, 0]
         self.assertFloatsAlmostEqual(np.array(subMeans), firstPixel)
 
+    def testExecutors(self):
+        """Test that the thread and process executors return the mapper
+        results of the serial executor, in grid order.
+        """
+        testExposure = self.exposure.clone()
+        rng = np.random.RandomState(1)
+        imArr = testExposure.getMaskedImage().getImage().getArray()
+        imArr[:] = rng.normal(size=imArr.shape)
+
+        subMeans = {}
+        for executor in ('serial', 'thread', 'process'):
+            config = GetMeanImageMapReduceConfig()
+            config.reducer.reduceOperation = 'none'
+            config.executor = executor
+            config.nWorkers = 3
+            task = ImageMapReduceTask(config)
+            subMeans[executor] = np.array([x.subExposure for x in task.run(testExposure).result])
+
+        self.assertEqual(len(subMeans['serial']), len(task.boxes0))
+        self.assertFloatsEqual(subMeans['thread'], subMeans['serial'])
+        self.assertFloatsEqual(subMeans['process'], subMeans['serial'])
+
+    def testSharedMemoryExecutor(self):
+        """Test that the process executor returns the same reduced exposure
+        with and without shared memory transport of the pixels.
+        """
+        testExposure = self.exposure.clone()
+        rng = np.random.RandomState(2)
+        imArr = testExposure.getMaskedImage().getImage().getArray()
+        imArr[:] = rng.normal(size=imArr.shape)
+
+        newExps = {}
+        for executor, useSharedMemory in (('serial', False), ('process', False), ('process', True)):
+            config = AddAmountImageMapReduceConfig()
+            config.reducer.reduceOperation = 'average'
+            config.executor = executor
+            config.nWorkers = 3
+            config.useSharedMemory = useSharedMemory
+            task = ImageMapReduceTask(config)
+            newExps[(executor, useSharedMemory)] = task.run(testExposure).exposure
+
+        expected = newExps[('serial', False)].getMaskedImage()
+        for key in [('process', False), ('process', True)]:
+            self.assertMaskedImagesEqual(newExps[key].getMaskedImage(), expected, msg=str(key))
+
+        # There are fewer shared slots than cells, so the returned sub-exposures must not share them
+        subExps = {}
+        for executor in ('serial', 'process'):
+            config = AddAmountImageMapReduceConfig()
+            config.reducer.reduceOperation = 'none'
+            config.executor = executor
+            config.nWorkers = 2
+            task = ImageMapReduceTask(config)
+            subExps[executor] = [r.subExposure for r in task.run(testExposure).result]
+        self.assertGreater(len(task.boxes0), 2*config.nWorkers)
+        for subExp, expected in zip(subExps['process'], subExps['serial']):
+            self.assertMaskedImagesEqual(subExp.getMaskedImage(), expected.getMaskedImage())
+
+    def testStreamReduce(self):
+        """Test that reducing the mapper results as they are produced gives
+        the same exposure as reducing the list of all results.
+        """
+        testExposure = self.exposure.clone()
+        rng = np.random.RandomState(3)
+        imArr = testExposure.getMaskedImage().getImage().getArray()
+        imArr[:] = rng.normal(size=imArr.shape)
+
+        for executor in ('serial', 'thread', 'process'):
+            newExps = {}
+            for streamReduce in (False, True):
+                config = AddAmountImageMapReduceConfig()
+                config.reducer.reduceOperation = 'average'
+                config.executor = executor
+                config.nWorkers = 3
+                config.streamReduce = streamReduce
+                task = ImageMapReduceTask(config)
+                newExps[streamReduce] = task.run(testExposure).exposure
+
+            # Cells may be reduced in another order when streaming, hence rounding differences
+            self.assertMaskedImagesAlmostEqual(newExps[True].getMaskedImage(),
+                                               newExps[False].getMaskedImage(), msg=executor)
+            self.assertEqual(newExps[True].getPsf().getComponentCount(),
+                             newExps[False].getPsf().getComponentCount())
+
+    def testCellScheduling(self):
+        """Test that cells without data are skipped, and that the parallel
+        executors dispatch the other cells by decreasing cost.
+        """
+        testExposure = self.exposure.clone()
+        mask = testExposure.getMaskedImage().getMask()
+        mask.getArray()[:, :64] |= mask.getPlaneBitMask('NO_DATA')
+
+        results = {}
+        for skipNoDataCells in (False, True):
+            config = GetMeanImageMapReduceConfig()
+            config.reducer.reduceOperation = 'none'
+            config.skipNoDataCells = skipNoDataCells
+            task = ImageMapReduceTask(config)
+            results[skipNoDataCells] = task.run(testExposure).result
+        hasData = [box.getMaxX() >= 64 for box in task.boxes0]
+        self.assertLess(sum(hasData), len(task.boxes0))
+        # Skipped cells are None, so the results stay aligned with the grid
+        self.assertEqual(len(results[False]), len(task.boxes0))
+        self.assertEqual(len(results[True]), len(task.boxes0))
+        for cellHasData, skipped, notSkipped in zip(hasData, results[True], results[False]):
+            if cellHasData:
+                self.assertEqual(skipped.subExposure, notSkipped.subExposure)
+            else:
+                self.assertIsNone(skipped)
+
+        # Other reductions only get the results of the cells with data
+        config = AddAmountImageMapReduceConfig()
+        config.reducer.reduceOperation = 'average'
+        config.skipNoDataCells = True
+        task = ImageMapReduceTask(config)
+        self.assertEqual(len(task._runMapper(testExposure)), sum(hasData))
+
+        config.executor = 'thread'
+        config.nWorkers = 2
+        task = ImageMapReduceTask(config)
+        cells = task._scheduleCells(self.exposure)
+        self.assertEqual(sorted(cells), list(range(len(task.boxes0))))
+        costs = [task._estimateCellCost(task.boxes1[i], 1.) for i in cells]
+        self.assertEqual(costs, sorted(costs, reverse=True))
+
+    def testFastFftBorders(self):
+        """Test that the expanded sub-exposures have fast FFT dimensions
+        when `fastFftBorders` is set, unless clipped by the exposure edges.
+        """
+        def isFast(n):
+            for p in (2, 3, 5):
+                while n % p == 0:
+                    n //= p
+            return n == 1
+
+        config = AddAmountImageMapReduceConfig()
+        config.scaleByFwhm = False
+        config.cellSizeX = config.cellSizeY = 16.
+        config.gridStepX = config.gridStepY = 16.
+        config.borderSizeX = config.borderSizeY = 5.  # 16 + 2*5 = 26 = 2*13 is slow
+        config.fastFftBorders = True
+        task = ImageMapReduceTask(config)
+        boxes0, boxes1 = task._generateGrid(self.exposure)
+        fullBBox = self.exposure.getBBox()
+        nUnclipped = 0
+        for box0, box1 in zip(boxes0, boxes1):
+            if fullBBox.contains(afwGeom.Box2I(box1.getMin() - afwGeom.Extent2I(1, 1),
+                                               box1.getMax() + afwGeom.Extent2I(1, 1))):
+                nUnclipped += 1
+                self.assertGreaterEqual(box1.getWidth() - box0.getWidth(), 2*5)
+                self.assertTrue(isFast(box1.getWidth()) and isFast(box1.getHeight()))
+        self.assertGreater(nUnclipped, 0)
+
     def testCellCentroids(self):
         """Test sample grid task which is provided a set of `cellCentroids` and
         returns the mean of the subimages surrounding those centroids using 'none'
@@ -22,6 +22,7 @@
 import os
 import unittest
 
+import numpy as np
 
 import lsst.utils.tests
 import lsst.utils
@@ -118,6 +119,77 @@ class DiffimTestCases(lsst.utils.tests.TestCase):
         self.runConvolveAndSubtract2(bgOrder=0)
         self.runConvolveAndSubtract2(bgOrder=2)
 
+    def testConvolveAndSubtractInto(self, bgVal=10.):
+        # The single-pass subtraction into a caller-supplied image must
+        # match convolving and subtracting the planes one at a time
+        rng = np.random.RandomState(2)
+        bbox = afwGeom.Box2I(afwGeom.Point2I(5, 7), afwGeom.Extent2I(4*self.gSize, 3*self.gSize))
+        tmi = afwImage.MaskedImageF(bbox)
+        smi = afwImage.MaskedImageF(bbox)
+        for mi in (tmi, smi):
+            mi.image.array[:] = rng.normal(100., 10., mi.image.array.shape)
+            mi.variance.array[:] = rng.uniform(50., 150., mi.variance.array.shape)
+        tmi.mask.array[5, 20] = tmi.mask.getPlaneBitMask("BAD")
+        smi.mask.array[15, 25] = smi.mask.getPlaneBitMask("SAT")
+
+        convolutionControl = afwMath.ConvolutionControl()
+        convolutionControl.setDoNormalize(False)
+        matched = afwImage.MaskedImageF(bbox)
+        afwMath.convolve(matched, tmi, self.gaussKernel, convolutionControl)
+        expected = afwImage.MaskedImageF(matched, True)
+        expected.image += bgVal
+        expected -= smi
+        expected *= -1
+
+        goodBBox = self.gaussKernel.shrinkBBox(expected.getBBox(afwImage.LOCAL))
+        expected = afwImage.MaskedImageF(expected, goodBBox, afwImage.LOCAL)
+
+        diffIm1 = afwImage.MaskedImageF(bbox)
+        ipDiffim.convolveAndSubtract(diffIm1, tmi, smi, self.gaussKernel, bgVal)
+        # In place, over a copy of the science image
+        diffIm2 = afwImage.MaskedImageF(smi, True)
+        ipDiffim.subtractMatchedImage(diffIm2, matched, diffIm2, bgVal)
+        for diffIm in (diffIm1, diffIm2):
+            diffIm = afwImage.MaskedImageF(diffIm, goodBBox, afwImage.LOCAL)
+            self.assertFloatsAlmostEqual(diffIm.image.array, expected.image.array, rtol=1e-6)
+            self.assertFloatsAlmostEqual(diffIm.variance.array, expected.variance.array, rtol=1e-6)
+            self.assertTrue(np.all(diffIm.mask.array == expected.mask.array))
+
+    def testConvolveLinearCombination(self):
+        # The basis decomposition must reproduce afw.math.convolve with the
+        # kernel evaluated at every pixel, directly and in Fourier space
+        kSize = 11
+        basisList = []
+        for sigma in (1.0, 2.0, 3.0):
+            basisList.append(afwMath.AnalyticKernel(kSize, kSize, afwMath.GaussianFunction2D(sigma, sigma)))
+        kernel = afwMath.LinearCombinationKernel(basisList, afwMath.PolynomialFunction2D(1))
+        kernel.setSpatialParameters([[1.0, 0.0, 0.0], [0.1, 1e-3, -2e-3], [-0.2, 2e-3, 1e-3]])
+
+        rng = np.random.RandomState(1)
+        mi = afwImage.MaskedImageF(afwGeom.Extent2I(60, 50))
+        mi.setXY0(afwGeom.Point2I(10, 20))
+        mi.image.array[:] = rng.normal(100., 10., mi.image.array.shape)
+        mi.variance.array[:] = rng.uniform(50., 150., mi.variance.array.shape)
+        mi.mask.array[25, 30] = mi.mask.getPlaneBitMask("BAD")
+        mi.mask.array[10, 12] = mi.mask.getPlaneBitMask("SAT")
+
+        convolutionControl = afwMath.ConvolutionControl()
+        convolutionControl.setDoNormalize(False)
+        convolutionControl.setMaxInterpolationDistance(0)
+        expected = afwImage.MaskedImageF(mi.getBBox())
+        afwMath.convolve(expected, mi, kernel, convolutionControl)
+        goodBBox = kernel.shrinkBBox(mi.getBBox(afwImage.LOCAL))
+        expected = afwImage.MaskedImageF(expected, goodBBox, afwImage.LOCAL)
+
+        for useFft in (False, True):
+            convolved = afwImage.MaskedImageF(mi.getBBox())
+            ipDiffim.convolveLinearCombination(convolved, mi, kernel, useFft)
+            self.assertTrue(np.all(np.isnan(convolved.image.array[0, :])))
+            convolved = afwImage.MaskedImageF(convolved, goodBBox, afwImage.LOCAL)
+            self.assertFloatsAlmostEqual(convolved.image.array, expected.image.array, rtol=1e-5)
+            self.assertFloatsAlmostEqual(convolved.variance.array, expected.variance.array, rtol=1e-5)
+            self.assertTrue(np.all(convolved.mask.array == expected.mask.array))
+
 #####
 
 
@@ -22,6 +22,8 @@
 import os
 import unittest
 
+import numpy as np
+
 import lsst.utils.tests
 import lsst.utils
 import lsst.afw.geom as afwGeom
@@ -468,6 +470,181 @@ class DiffimTestCases(lsst.utils.tests.TestCase):
                 self.assertAlmostEqual(kImageOut[i, j, afwImage.LOCAL]/kImageIn[i, j, afwImage.LOCAL],
                                        1.0, 5)
 
+    def testFftBasisConvolution(self, imsize=50):
+        # Fourier-space basis convolution must reproduce the normal equations
+        # built with direct convolution
+        gsize = self.policy.getInt("kernelSize")
+        tsize = imsize + gsize
+
+        tmi = afwImage.MaskedImageF(afwGeom.Extent2I(tsize, tsize))
+        tmi.set(0, 0x0, 1.0)
+        rdm = afwMath.Random(afwMath.Random.MT19937, 10)
+        afwMath.randomGaussianImage(tmi.getImage(), rdm)
+
+        gaussFunction = afwMath.GaussianFunction2D(2, 3)
+        gaussKernel = afwMath.AnalyticKernel(gsize, gsize, gaussFunction)
+        smi = afwImage.MaskedImageF(tmi.getDimensions())
+        afwMath.convolve(smi, tmi, gaussKernel, False)
+        bbox = gaussKernel.shrinkBBox(smi.getBBox(afwImage.LOCAL))
+        tmi2 = afwImage.MaskedImageF(tmi, bbox, origin=afwImage.LOCAL)
+        smi2 = afwImage.MaskedImageF(smi, bbox, origin=afwImage.LOCAL)
+
+        alConfig = ipDiffim.ImagePsfMatchTask.ConfigClass()
+        alConfig.kernel.name = "AL"
+        kList = ipDiffim.makeKernelBasisList(alConfig.kernel.active)
+
+        solutions = []
+        for basisConvolution in ("direct", "fft"):
+            self.policy.set("basisConvolution", basisConvolution)
+            kc = ipDiffim.KernelCandidateF(0.0, 0.0, tmi2, smi2, self.policy)
+            kc.build(kList)
+            solutions.append(kc.getKernelSolution(ipDiffim.KernelCandidateF.ORIG))
+
+        mDirect, mFft = solutions[0].getM(), solutions[1].getM()
+        bDirect, bFft = solutions[0].getB(), solutions[1].getB()
+        self.assertFloatsAlmostEqual(mFft, mDirect, rtol=None, atol=1e-6*np.abs(mDirect).max())
+        self.assertFloatsAlmostEqual(bFft, bDirect, rtol=None, atol=1e-6*np.abs(bDirect).max())
+        self.assertAlmostEqual(solutions[1].getKsum(), solutions[0].getKsum(), 5)
+
+    def testFftBasisConvolutionCache(self):
+        # Stamps of the same shape share the cached basis transforms; each
+        # convolution must still match direct convolution with its own stamp
+        alConfig = ipDiffim.ImagePsfMatchTask.ConfigClass()
+        alConfig.kernel.name = "AL"
+        kList = ipDiffim.makeKernelBasisList(alConfig.kernel.active)
+
+        rdm = afwMath.Random(afwMath.Random.MT19937, 10)
+        for size in (45, 45, 52, 45):
+            image = afwImage.ImageF(afwGeom.Extent2I(size, size))
+            afwMath.randomGaussianImage(image, rdm)
+            convolvedList = ipDiffim.convolveBasisFft(image, kList)
+            self.assertEqual(len(convolvedList), len(kList))
+            for kernel, convolved in zip(kList, convolvedList):
+                direct = afwImage.ImageD(image.getDimensions())
+                afwMath.convolve(direct, image, kernel, False)
+                bbox = kernel.shrinkBBox(direct.getBBox(afwImage.LOCAL))
+                self.assertFloatsAlmostEqual(
+                    afwImage.ImageD(convolved, bbox, origin=afwImage.LOCAL).getArray(),
+                    afwImage.ImageD(direct, bbox, origin=afwImage.LOCAL).getArray(),
+                    rtol=None, atol=1e-5)
+
+    def testFastDeltaFunctionBuild(self, imsize=30):
+        # The shifted-window delta-function build must reproduce the normal
+        # equations built from the convolved design matrix, with both
+        # constant and spatially varying weights
+        gsize = self.policy.getInt("kernelSize")
+        tsize = imsize + gsize
+
+        tmi = afwImage.MaskedImageF(afwGeom.Extent2I(tsize, tsize))
+        tmi.set(0, 0x0, 1.0)
+        rdm = afwMath.Random(afwMath.Random.MT19937, 10)
+        afwMath.randomGaussianImage(tmi.getImage(), rdm)
+
+        gaussFunction = afwMath.GaussianFunction2D(2, 3)
+        gaussKernel = afwMath.AnalyticKernel(gsize, gsize, gaussFunction)
+        smi = afwImage.MaskedImageF(tmi.getDimensions())
+        afwMath.convolve(smi, tmi, gaussKernel, False)
+        afwMath.randomUniformImage(smi.getVariance(), rdm)
+        smi.getVariance().getArray()[:, :] += 1.0
+        bbox = gaussKernel.shrinkBBox(smi.getBBox(afwImage.LOCAL))
+        tmi2 = afwImage.MaskedImageF(tmi, bbox, origin=afwImage.LOCAL)
+        smi2 = afwImage.MaskedImageF(smi, bbox, origin=afwImage.LOCAL)
+
+        kList = ipDiffim.makeKernelBasisList(self.subconfig)
+        self.policy.set("iterateSingleKernel", False)
+        for constantVarianceWeighting in (True, False):
+            self.policy.set("constantVarianceWeighting", constantVarianceWeighting)
+            solutions = []
+            for useFastDeltaFunctionBuild in (False, True):
+                self.policy.set("useFastDeltaFunctionBuild", useFastDeltaFunctionBuild)
+                kc = ipDiffim.KernelCandidateF(0.0, 0.0, tmi2, smi2, self.policy)
+                kc.build(kList)
+                solutions.append(kc.getKernelSolution(ipDiffim.KernelCandidateF.ORIG))
+
+            mDirect, mFast = solutions[0].getM(), solutions[1].getM()
+            bDirect, bFast = solutions[0].getB(), solutions[1].getB()
+            self.assertFloatsAlmostEqual(mFast, mDirect, rtol=None, atol=1e-8*np.abs(mDirect).max())
+            self.assertFloatsAlmostEqual(bFast, bDirect, rtol=None, atol=1e-8*np.abs(bDirect).max())
+            self.assertAlmostEqual(solutions[1].getKsum(), solutions[0].getKsum(), 5)
+            self.assertAlmostEqual(solutions[1].getBackground(), solutions[0].getBackground(), 5)
+
+    def testReuseConvolvedBasis(self, imsize=30):
+        # Rebuilding with a basis spanned by the original one must give the
+        # same normal equations whether or not the stamps are convolved again
+        gsize = self.policy.getInt("kernelSize")
+        tsize = imsize + gsize
+
+        tmi = afwImage.MaskedImageF(afwGeom.Extent2I(tsize, tsize))
+        tmi.set(0, 0x0, 1.0)
+        rdm = afwMath.Random(afwMath.Random.MT19937, 10)
+        afwMath.randomGaussianImage(tmi.getImage(), rdm)
+
+        gaussFunction = afwMath.GaussianFunction2D(2, 3)
+        gaussKernel = afwMath.AnalyticKernel(gsize, gsize, gaussFunction)
+        smi = afwImage.MaskedImageF(tmi.getDimensions())
+        afwMath.convolve(smi, tmi, gaussKernel, False)
+        bbox = gaussKernel.shrinkBBox(smi.getBBox(afwImage.LOCAL))
+        tmi2 = afwImage.MaskedImageF(tmi, bbox, origin=afwImage.LOCAL)
+        smi2 = afwImage.MaskedImageF(smi, bbox, origin=afwImage.LOCAL)
+
+        # Stand-in for a Pca basis : Gaussians of several widths
+        pcaList = []
+        for sigma in (1.0, 2.0, 3.0):
+            kImage = afwImage.ImageD(gaussKernel.getDimensions())
+            afwMath.AnalyticKernel(gsize, gsize, afwMath.GaussianFunction2D(sigma, sigma)).computeImage(
+                kImage, False)
+            pcaList.append(afwMath.FixedKernel(kImage))
+        pcaList = ipDiffim.renormalizeKernelList(pcaList)
+
+        kList = ipDiffim.makeKernelBasisList(self.subconfig)
+        solutions = []
+        for reuseConvolvedBasis in (False, True):
+            self.policy.set("reuseConvolvedBasis", reuseConvolvedBasis)
+            kc = ipDiffim.KernelCandidateF(0.0, 0.0, tmi2, smi2, self.policy)
+            kc.build(kList)
+            kc.build(pcaList)
+            solutions.append(kc.getKernelSolution(ipDiffim.KernelCandidateF.PCA))
+
+        self.assertEqual(solutions[1].getDesignMatrix().shape[1], len(pcaList) + 1)
+        mDirect, mReuse = solutions[0].getM(), solutions[1].getM()
+        bDirect, bReuse = solutions[0].getB(), solutions[1].getB()
+        self.assertFloatsAlmostEqual(mReuse, mDirect, rtol=None, atol=1e-5*np.abs(mDirect).max())
+        self.assertFloatsAlmostEqual(bReuse, bDirect, rtol=None, atol=1e-5*np.abs(bDirect).max())
+        self.assertAlmostEqual(solutions[1].getKsum(), solutions[0].getKsum(), 4)
+
+    def testPreferredSolver(self):
+        # Cholesky factorizations solve a positive definite matrix directly,
+        # and fall back to the eigenvector decomposition when it is singular
+        rdm = np.random.RandomState(10)
+        cMat = rdm.normal(size=(50, 6))
+        mMat = np.dot(cMat.T, cMat)
+        bVec = np.dot(cMat.T, rdm.normal(size=50))
+
+        for solver in (ipDiffim.KernelSolution.CHOLESKY_LLT,
+                       ipDiffim.KernelSolution.CHOLESKY_LDLT,
+                       ipDiffim.KernelSolution.LU):
+            ks = ipDiffim.KernelSolution(mMat, bVec, False)
+            ks.setPreferredSolver(solver)
+            self.assertEqual(ks.getPreferredSolver(), solver)
+            ks.solve()
+            self.assertEqual(ks.getSolvedBy(), solver)
+            ks.solve(mMat, bVec)
+            self.assertEqual(ks.getSolvedBy(), solver)
+
+        singularMat = mMat.copy()
+        singularMat[:, -1] = singularMat[:, 0]
+        singularMat[-1, :] = singularMat[0, :]
+        for solver in (ipDiffim.KernelSolution.CHOLESKY_LLT,
+                       ipDiffim.KernelSolution.CHOLESKY_LDLT):
+            ks = ipDiffim.KernelSolution(singularMat, bVec, False)
+            ks.setPreferredSolver(solver)
+            ks.solve()
+            self.assertEqual(ks.getSolvedBy(), ipDiffim.KernelSolution.EIGENVECTOR)
+
+        ks = ipDiffim.KernelSolution(mMat, bVec, False)
+        with self.assertRaises(Exception):
+            ks.setPreferredSolver(ipDiffim.KernelSolution.EIGENVECTOR)
+
     def testZeroVariance(self, imsize=50):
         gsize = self.policy.getInt("kernelSize")
         tsize = imsize + gsize
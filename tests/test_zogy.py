@@ -162,6 +162,185 @@ class ZogyTest(lsst.utils.tests.TestCase):
         self._testZogyScorr()
         self._testZogyScorr(varAst=0.1)
 
+    def testFftBackends(self):
+        """Test that the Fourier-space diffim and Scorr do not depend on the FFT backend.
+        """
+        try:
+            import scipy.fft  # noqa: F401
+        except ImportError:
+            self.skipTest("scipy.fft is not available")
+        self._setUpImages()
+        results = {}
+        for backend, workers in (('numpy', 1), ('scipy', 1), ('scipy', 2)):
+            config = ZogyConfig()
+            config.fftBackend = backend
+            config.fftWorkers = workers
+            task = ZogyTask(templateExposure=self.im2ex.clone(), scienceExposure=self.im1ex.clone(),
+                            config=config)
+            D = task.computeDiffim(inImageSpace=False).D
+            S = task.computeScorr(inImageSpace=False, xVarAst=0.1, yVarAst=0.1).S
+            results[(backend, workers)] = (D, S)
+
+        D0, S0 = results[('numpy', 1)]
+        for key in [('scipy', 1), ('scipy', 2)]:
+            D, S = results[key]
+            self.assertMaskedImagesAlmostEqual(D.getMaskedImage(), D0.getMaskedImage(), atol=1e-8,
+                                               msg=str(key))
+            self.assertMaskedImagesAlmostEqual(S.getMaskedImage(), S0.getMaskedImage(), atol=1e-8,
+                                               msg=str(key))
+
+    def testPadToFastFftSize(self):
+        """Test that padding the images to fast FFT sizes gives diffims and
+        Scorr images similar to the unpadded ones, with the image dimensions.
+        """
+        self._setUpImages()
+        results = {}
+        for pad in (False, True):
+            config = ZogyConfig()
+            config.padToFastFftSize = pad
+            task = ZogyTask(templateExposure=self.im2ex.clone(), scienceExposure=self.im1ex.clone(),
+                            config=config)
+            D = task.computeDiffim(inImageSpace=False).D
+            S = task.computeScorr(inImageSpace=False, xVarAst=0.1, yVarAst=0.1).S
+            self.assertEqual(D.getDimensions(), self.im1ex.getDimensions())
+            results[pad] = (D, S)
+
+        self._compareExposures(results[True][0], results[False][0])
+        self._compareExposures(results[True][1], results[False][1], Scorr=True)
+
+        # The 255x257 images are padded to even dimensions, which must not shift S
+        border = max(task.im1_psf.shape)
+        inner = (slice(border, -border), slice(border, -border))
+        for plane in ('Image', 'Variance'):
+            padded = getattr(results[True][1].getMaskedImage(), 'get' + plane)().getArray()[inner]
+            unpadded = getattr(results[False][1].getMaskedImage(), 'get' + plane)().getArray()[inner]
+            self.assertLess(np.std(padded - unpadded), 1e-2*np.std(unpadded), msg=plane)
+
+    def testZogyDiffimAndScorr(self):
+        """Test that computing D, S and the matched template in a single pass
+        gives the same results as computing them separately.
+        """
+        self._setUpImages()
+        config = ZogyConfig()
+
+        def makeTask():
+            return ZogyTask(templateExposure=self.im2ex.clone(), scienceExposure=self.im1ex.clone(),
+                            config=config)
+        res = makeTask().computeDiffimAndScorr(xVarAst=0.1, yVarAst=0.1)
+        D = makeTask().computeDiffim(inImageSpace=False, returnMatchedTemplate=True)
+        S = makeTask().computeScorr(inImageSpace=False, xVarAst=0.1, yVarAst=0.1).S
+
+        self.assertMaskedImagesAlmostEqual(res.D.getMaskedImage(), D.D.getMaskedImage())
+        self.assertMaskedImagesAlmostEqual(res.R.getMaskedImage(), D.R.getMaskedImage())
+        self.assertMaskedImagesAlmostEqual(res.S.getMaskedImage(), S.getMaskedImage())
+        # Pd is cropped from the image-sized PSF transforms, so its wings are not wrapped
+        Pd = makeTask().computeDiffimPsf()
+        self.assertFloatsAlmostEqual(res.Pd, Pd, atol=1e-2*Pd.max(), rtol=0)
+
+        results = {}
+        for doDiffimAndScorr in (False, True):
+            for doPreConvolve in (False, True):
+                config = ZogyImagePsfMatchConfig()
+                config.doDiffimAndScorr = doDiffimAndScorr
+                results[doDiffimAndScorr, doPreConvolve] = ZogyImagePsfMatchTask(
+                    config=config).subtractExposures(self.im2ex.clone(), self.im1ex.clone(),
+                                                     doWarping=False, spatiallyVarying=False,
+                                                     doPreConvolve=doPreConvolve)
+        for doPreConvolve in (False, True):
+            self.assertMaskedImagesAlmostEqual(
+                results[True, doPreConvolve].subtractedExposure.getMaskedImage(),
+                results[False, doPreConvolve].subtractedExposure.getMaskedImage())
+        self.assertMaskedImagesAlmostEqual(results[True, False].scoreExposure.getMaskedImage(),
+                                           results[False, True].subtractedExposure.getMaskedImage())
+
+    def testTemplateFftCache(self):
+        """Test that repeated subtractions against the same template reuse its
+        cached FFTs and give the same results as without the cache.
+        """
+        import lsst.ip.diffim.zogy as zogy
+        self._setUpImages()
+        ZogyTask.clearTemplateFftCache()
+        self.addCleanup(ZogyTask.clearTemplateFftCache)
+
+        results = {}
+        for cacheSize in (0., 100.):
+            config = ZogyConfig()
+            config.templateFftCacheSize = cacheSize
+            for i in range(2):
+                task = ZogyTask(templateExposure=self.im2ex.clone(), scienceExposure=self.im1ex.clone(),
+                                config=config)
+                results[(cacheSize, i)] = task.computeDiffim(inImageSpace=False).D
+
+        cache = zogy._templateFftCache
+        self.assertEqual(cache.nMisses, 3)  # the image, the image-sized PSF and the PSF-sized PSF
+        self.assertEqual(cache.nHits, 3)
+        self.assertGreater(cache.nBytes, 0)
+        self.assertLessEqual(cache.nBytes, 100*2**20)
+        for key in [(0., 1), (100., 0), (100., 1)]:
+            self.assertMaskedImagesEqual(results[key].getMaskedImage(), results[(0., 0)].getMaskedImage())
+
+        # A budget too small for the transforms caches nothing
+        ZogyTask.clearTemplateFftCache()
+        config.templateFftCacheSize = 0.001
+        task = ZogyTask(templateExposure=self.im2ex.clone(), scienceExposure=self.im1ex.clone(),
+                        config=config)
+        task.computeDiffim(inImageSpace=False)
+        self.assertLessEqual(cache.nBytes, 0.001*2**20)
+
+    def testOverlapSave(self):
+        """Test that the overlap-save mode gives the same Scorr image and
+        variance as the global transform away from the edges, and that it
+        refuses to compute the diffim.
+        """
+        self._setUpImages()
+        results = {}
+        for tileSize in (0, 128):
+            config = ZogyConfig()
+            config.overlapSaveTileSize = tileSize
+            task = ZogyTask(templateExposure=self.im2ex.clone(), scienceExposure=self.im1ex.clone(),
+                            config=config)
+            results[tileSize] = task.computeScorrFourierSpace(xVarAst=0.1, yVarAst=0.1)
+
+        border = task._getOverlapSaveMargin(128)
+        self.assertLess(border, max(task.im1_psf.shape) + max(task.im2_psf.shape))
+        inner = (slice(border, -border), slice(border, -border))
+        for name in ('S', 'S_var'):
+            self.assertEqual(getattr(results[128], name).shape, getattr(results[0], name).shape, msg=name)
+        S, S_var = results[0].S[inner], results[0].S_var[inner]
+        self.assertFloatsAlmostEqual(results[128].S[inner], S, atol=2e-3*np.std(S), rtol=None)
+        self.assertFloatsAlmostEqual(results[128].S_var[inner], S_var, rtol=1e-3)
+
+        for method in (task.computeDiffimFourierSpace, task.computeDiffimAndScorrFourierSpace):
+            with self.assertRaises(ValueError):
+                method()
+
+        config = ZogyConfig()
+        config.overlapSaveTileSize = border
+        task = ZogyTask(templateExposure=self.im2ex.clone(), scienceExposure=self.im1ex.clone(),
+                        config=config)
+        with self.assertRaises(ValueError):
+            task.computeScorrFourierSpace()
+
+    def testSinglePrecision(self):
+        """Test that single-precision ZOGY agrees with double precision
+        to well within the noise of the diffim and likelihood images.
+        """
+        self._setUpImages()
+        results = {}
+        for useSinglePrecision in (False, True):
+            config = ZogyConfig()
+            config.useSinglePrecision = useSinglePrecision
+            task = ZogyTask(templateExposure=self.im2ex.clone(), scienceExposure=self.im1ex.clone(),
+                            config=config)
+            results[useSinglePrecision] = task.computeDiffimAndScorrFourierSpace()
+
+        res64, res32 = results[False], results[True]
+        for name in ('D', 'D_var', 'S', 'S_var', 'R'):
+            arr64, arr32 = getattr(res64, name), getattr(res32, name)
+            self.assertLess(np.std(arr32 - arr64), 1e-4*np.std(arr64), msg=name)
+        self.assertEqual(res32.D.dtype, np.float32)
+        self.assertEqual(res32.S.dtype, np.float32)
+
     def _testZogyDiffimMapReduced(self, inImageSpace=False, doScorr=False, **kwargs):
         """Test running Zogy using ImageMapReduceTask framework.
 